@@ -10,12 +10,22 @@ import asyncio
 import yt_dlp
 import logging
 import os
+import re
 import json
+import time
 import string
+import bisect
+import heapq
+import contextlib
+import threading
+import functools
+import concurrent.futures
 import aiohttp
 from datetime import datetime, timedelta
-from collections import deque
-from typing import Optional, List, Dict, Tuple
+from urllib.parse import urlsplit
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple, NamedTuple, Callable
 from logging.handlers import RotatingFileHandler
 # Manual .env loader (avoids python-dotenv encoding issues on Windows)
 def load_env_file():
@@ -95,10 +105,85 @@ intents.members = True
 intents.voice_states = True
 intents.reactions = True
 intents.presences = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+
+class JarvisBot(commands.Bot):
+    """commands.Bot that also owns the shared outbound HTTP client"""
+
+    async def setup_hook(self):
+        await http_client.start()
+
+    async def close(self):
+        await http_client.close()
+        await super().close()
+
+bot = JarvisBot(command_prefix='!', intents=intents)
 
 # Database Configuration
 DB_FILE = 'jarvisqueue_full.db'
+DB_POOL_SIZE = 5  # Long-lived connections kept open between calls
+DB_POOL_MAX_OVERFLOW = 10  # Extra temporary connections allowed during bursts
+DB_POOL_TIMEOUT = 10  # Seconds to wait for a free connection before failing
+DB_SLOW_QUERY_MS = 250  # Statements slower than this get a warning in the log
+DB_READER_THREADS = 4  # Worker threads for reads (writes always use one dedicated thread)
+AUDIT_LOG_FLUSH_ROWS = 100  # Buffered command/activity log rows that trigger a flush
+AUDIT_LOG_FLUSH_SECONDS = 5  # Max age of buffered log rows before they are written
+AUDIT_LOG_MAX_PENDING = 5000  # Hard cap on buffered rows; the oldest are dropped beyond this
+QUEUE_SETTINGS_CACHE_TTL = 300  # Seconds a cached queue_settings row stays valid
+QUEUE_SETTINGS_CACHE_SIZE = 10000  # Max cached (guild, queue) entries before LRU eviction
+PERMISSION_CACHE_TTL = 900  # Seconds before a guild's staff/blacklist/role snapshot is re-read
+PERMISSION_CACHE_SIZE = 5000  # Max guild snapshots kept before LRU eviction
+RANK_CACHE_TTL = 600  # Seconds a queue's rank table stays cached
+RANK_CACHE_SIZE = 5000  # Max cached (guild, queue) rank tables before LRU eviction
+RANK_ROLE_EDIT_INTERVAL = 0.5  # Seconds between rank role edits within one guild
+VOICE_MOVE_CONCURRENCY = 5  # Voice moves in flight at once per match
+VOICE_MOVE_RETRIES = 2  # Extra attempts for moves that hit server errors or timeouts
+QUEUE_RENDER_DEBOUNCE_SECONDS = 1.0  # Queue changes within this window share one embed edit
+VOTE_RENDER_DEBOUNCE_SECONDS = 1.0  # Match votes within this window share one tally edit
+STICKY_MIN_REPOST_SECONDS = 5  # Minimum gap between sticky queue reposts in one channel
+STICKY_SKIP_LAST_N = 3  # No repost while the sticky is still among this many latest messages
+STATE_JOURNAL_FLUSH_SECONDS = 1.0  # Max age of unsaved queue/match state changes before they are written
+STATE_JOURNAL_FLUSH_KEYS = 50  # Changed queue/match state keys that trigger an early write
+STATE_JOURNAL_COMPACT_ROWS = 2000  # Journal rows that trigger folding it into the snapshot table
+SCHEDULER_LOOKAHEAD_HOURS = 6  # Scheduled tasks due within this window are kept in memory
+
+# Outbound HTTP (stream platform APIs)
+HTTP_POOL_LIMIT = 100  # Open connections across all hosts
+HTTP_POOL_LIMIT_PER_HOST = 10  # Open connections to any single host
+HTTP_KEEPALIVE_SECONDS = 150  # Idle keep-alive; longer than the 2 minute stream check so connections are reused
+HTTP_DNS_CACHE_SECONDS = 300  # How long resolved host addresses are reused
+HTTP_TIMEOUT_SECONDS = 15  # Whole request, including reading the body
+HTTP_CONNECT_TIMEOUT_SECONDS = 5  # Establishing the TCP/TLS connection
+TWITCH_STREAMS_BATCH = 100  # user_login values per Helix /streams request (the API maximum)
+
+# Stream notifications
+STREAM_CHECK_MINUTES = 2  # How often tracked streamers are checked
+STREAM_CHECK_CONCURRENCY = 20  # Platform API requests in flight at once
+STREAM_CHECK_DEADLINE_SECONDS = 100  # Checks still running this long into a cycle are cancelled
+STREAM_RATE_LIMITS = {  # platform: (requests per second, burst)
+    'twitch': (10, 20),
+    'kick': (3, 6),
+    'youtube': (5, 10),
+    'youtube_feed': (5, 10),  # public RSS feeds, no API quota
+    'tiktok': (1, 3),
+}
+STREAM_POLL_MAX_MINUTES = 30  # Longest gap between checks of a long-dormant channel
+STREAM_POLL_OFFLINE_GRACE_MINUTES = 60  # Channels stay on the fast interval this long after going offline
+STREAM_POLL_GO_LIVE_WINDOW_MINUTES = 45  # ...and this close to the time of day they usually go live
+STREAM_GO_LIVE_HISTORY = 20  # Go-live times kept per channel
+
+# Team balancing
+BALANCE_EXACT_MAX_PLAYERS = 24  # Lobbies up to this size are split optimally; larger use Karmarkar-Karp
+BALANCE_TIME_BUDGET_MS = 50  # Balancing stops here and keeps the best split found so far
+
+# Applied once to every pooled connection when it is opened
+DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+)
 
 # Music Configuration
 YDL_OPTIONS = {
@@ -155,14 +240,13 @@ class MusicQueue:
 # ============================================================================
 
 # Queue System
-guild_queues = {}  # {guild_id: {queue_name: [player_ids]}}
+guild_queues = {}  # {guild_id: {queue_name: QueueEngine}}
 active_matches = {}  # {guild_id: {queue_name: match_data}}
 captain_drafts = {}  # {guild_id: {queue_name: draft_data}}
 active_match_channels = {}  # {guild_id: {queue_name: {'text': channel_id, 'voice1': channel_id, 'voice2': channel_id}}}
-match_votes = {}  # {match_id: {'team1': set(), 'team2': set()}}
 
 # Sticky Queue Messages - tracks queue messages that should stay at bottom
-# {channel_id: {'message': message_object, 'view': QueueView_object, 'queue_name': str, 'guild_id': int}}
+# {channel_id: {'message': message_object, 'view': QueueView_object, 'queue_name': str, 'guild_id': int, ...repost state}}
 sticky_queue_messages = {}
 
 # Music System
@@ -175,16 +259,998 @@ blacklisted_users = {}  # {guild_id: {queue_name: [user_ids]}}
 # Scheduled tasks
 scheduled_commands = {}  # {guild_id: [scheduled_task_data]}
 
+# ============================================================================
+# DATABASE CONNECTION POOL
+# ============================================================================
+
+_SQL_OP_PATTERN = re.compile(
+    r'^\s*(SELECT|INSERT(?:\s+OR\s+\w+)?|REPLACE|UPDATE|DELETE|CREATE|ALTER|DROP|PRAGMA|WITH)\b'
+    r'(?:.*?\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+NOT\s+EXISTS)?|INDEX(?:\s+IF\s+NOT\s+EXISTS)?)\s+(\w+))?',
+    re.IGNORECASE | re.DOTALL
+)
+
+@functools.lru_cache(maxsize=1024)
+def sql_operation_name(sql: str) -> str:
+    """Short label for a statement used as the timing key, e.g. 'SELECT queue_settings'"""
+    match = _SQL_OP_PATTERN.match(sql)
+    if not match:
+        return sql.strip().split(None, 1)[0].upper() if sql.strip() else "EMPTY"
+    verb = match.group(1).split()[0].upper()
+    if verb == 'UPDATE':
+        table = sql.split()[1]
+    else:
+        table = match.group(2)
+    return f"{verb} {table}" if table else verb
+
+
+class TimedCursor:
+    """sqlite3 cursor wrapper that records how long each statement takes"""
+
+    def __init__(self, pool: 'ConnectionPool', cursor: sqlite3.Cursor):
+        self._pool = pool
+        self._cursor = cursor
+
+    def execute(self, sql: str, params=()):
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, params)
+        finally:
+            self._pool.record(sql_operation_name(sql), time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_params)
+        finally:
+            self._pool.record(sql_operation_name(sql), time.perf_counter() - start)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class PooledConnection:
+    """A connection checked out from the pool - close() hands it back instead of closing it"""
+
+    def __init__(self, pool: 'ConnectionPool', conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def cursor(self) -> TimedCursor:
+        return TimedCursor(self._pool, self._conn.cursor())
+
+    def execute(self, sql: str, params=()) -> TimedCursor:
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, seq_of_params) -> TimedCursor:
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            self._conn.commit()
+        finally:
+            self._pool.record("COMMIT", time.perf_counter() - start)
+
+    def rollback(self):
+        self._conn.rollback()
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._conn is not None and self._conn.in_transaction
+
+    def close(self):
+        """Return the connection to the pool (uncommitted work is rolled back, like sqlite3 close)"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._conn is not None:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        self.close()
+
+    def __del__(self):
+        # Code paths that return early without close() must not leak a pool slot
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared by every database helper.
+
+    Keeps up to `size` idle connections open with WAL mode and tuned pragmas applied once
+    at open time. When all are busy, up to `max_overflow` extra connections are opened and
+    closed again on release; beyond that, callers wait up to `timeout` seconds.
+    Per-operation timings are collected for /perfstats."""
+
+    def __init__(self, db_file: str, size: int = DB_POOL_SIZE, max_overflow: int = DB_POOL_MAX_OVERFLOW,
+                 timeout: float = DB_POOL_TIMEOUT):
+        self.db_file = db_file
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self._idle = deque()
+        self._open_count = 0
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._op_stats = {}  # {operation: [count, total_seconds, max_seconds]}
+        self.checkouts = 0
+        self.waits = 0
+        self.overflow_opened = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+        for pragma in DB_PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not apply '{pragma}': {e}")
+        return conn
+
+    def connect(self) -> PooledConnection:
+        """Check out a connection (drop-in replacement for sqlite3.connect(DB_FILE))"""
+        deadline = None
+        with self._cond:
+            self.checkouts += 1
+            while True:
+                if self._idle:
+                    return PooledConnection(self, self._idle.pop())
+                if self._open_count < self.size + self.max_overflow:
+                    if self._open_count >= self.size:
+                        self.overflow_opened += 1
+                    self._open_count += 1
+                    break
+                if deadline is None:
+                    self.waits += 1
+                    deadline = time.monotonic() + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        f"Timed out after {self.timeout}s waiting for a database connection")
+                self._cond.wait(remaining)
+
+        try:
+            return PooledConnection(self, self._open())
+        except Exception:
+            with self._cond:
+                self._open_count -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+        self._discard(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._open_count -= 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (called on shutdown)"""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+
+    def record(self, operation: str, elapsed: float):
+        with self._stats_lock:
+            entry = self._op_stats.get(operation)
+            if entry is None:
+                self._op_stats[operation] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+        if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+            logger.warning(f"Slow database operation: {operation} took {elapsed * 1000:.1f}ms")
+
+    def operation_stats(self) -> List[Dict]:
+        """Per-operation timings, slowest total time first"""
+        with self._stats_lock:
+            snapshot = [(op, *entry) for op, entry in self._op_stats.items()]
+        return sorted((
+            {
+                'operation': op,
+                'count': count,
+                'total_ms': total * 1000,
+                'avg_ms': total * 1000 / count,
+                'max_ms': peak * 1000,
+            }
+            for op, count, total, peak in snapshot
+        ), key=lambda s: s['total_ms'], reverse=True)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                'open': self._open_count,
+                'idle': len(self._idle),
+                'in_use': self._open_count - len(self._idle),
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'overflow_opened': self.overflow_opened,
+            }
+
+
+db_pool = ConnectionPool(DB_FILE)
+
+# ============================================================================
+# ASYNC DATABASE EXECUTOR
+# ============================================================================
+
+class WriteResult(NamedTuple):
+    lastrowid: Optional[int]
+    rowcount: int
+
+
+class _LaneStats:
+    """Queue depth and wait/run timings for one executor lane"""
+
+    def __init__(self):
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def snapshot(self) -> Dict:
+        done = self.completed + self.failed
+        return {
+            'pending': self.pending,
+            'peak_pending': self.peak_pending,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_wait_ms': (self.total_wait / done * 1000) if done else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+            'avg_run_ms': (self.total_run / done * 1000) if done else 0.0,
+        }
+
+
+class DatabaseExecutor:
+    """Async data-access API: blocking SQLite work runs on worker threads, never on the event loop.
+
+    All writes are serialized through one dedicated writer thread (SQLite only allows a single
+    writer, so this avoids lock contention), while reads fan out over a small reader pool.
+    Every method returns an awaitable; `write_nowait` queues a write without waiting for it."""
+
+    def __init__(self, pool: ConnectionPool, readers: int = DB_READER_THREADS):
+        self.pool = pool
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+        self._lock = threading.Lock()
+        self._stats = {'read': _LaneStats(), 'write': _LaneStats()}
+
+    def _run(self, lane: str, submitted: float, func, args, kwargs):
+        started = time.perf_counter()
+        stats = self._stats[lane]
+        ok = False
+        try:
+            result = func(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                wait = started - submitted
+                stats.pending -= 1
+                stats.total_wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+                stats.total_run += finished - started
+                if ok:
+                    stats.completed += 1
+                else:
+                    stats.failed += 1
+
+    def _submit(self, lane: str, func, args, kwargs) -> concurrent.futures.Future:
+        stats = self._stats[lane]
+        with self._lock:
+            stats.pending += 1
+            stats.peak_pending = max(stats.peak_pending, stats.pending)
+        executor = self._writer if lane == 'write' else self._readers
+        try:
+            return executor.submit(self._run, lane, time.perf_counter(), func, args, kwargs)
+        except RuntimeError:
+            with self._lock:
+                stats.pending -= 1
+            raise
+
+    async def read(self, func, *args, **kwargs):
+        """Run a read-only callable on a reader thread"""
+        return await asyncio.wrap_future(self._submit('read', func, args, kwargs))
+
+    async def write(self, func, *args, **kwargs):
+        """Run a callable that modifies the database on the writer thread"""
+        return await asyncio.wrap_future(self._submit('write', func, args, kwargs))
+
+    def write_nowait(self, func, *args, **kwargs) -> concurrent.futures.Future:
+        """Queue a write without awaiting it; failures are logged"""
+        future = self._submit('write', func, args, kwargs)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    def execute_nowait(self, sql: str, params=()) -> concurrent.futures.Future:
+        """Queue a single write statement without awaiting it"""
+        return self.write_nowait(self._execute, sql, params)
+
+    @staticmethod
+    def _log_failure(future: concurrent.futures.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Background database write failed: {future.exception()}")
+
+    # --- Statement helpers -------------------------------------------------
+
+    def _fetchone(self, sql: str, params) -> Optional[tuple]:
+        conn = self.pool.connect()
+        try:
+            return conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+
+    def _fetchall(self, sql: str, params) -> List[tuple]:
+        conn = self.pool.connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _execute(self, sql: str, params) -> WriteResult:
+        conn = self.pool.connect()
+        try:
+            c = conn.execute(sql, params)
+            conn.commit()
+            return WriteResult(c.lastrowid, c.rowcount)
+        finally:
+            conn.close()
+
+    def _executemany(self, sql: str, seq_of_params) -> WriteResult:
+        conn = self.pool.connect()
+        try:
+            c = conn.executemany(sql, seq_of_params)
+            conn.commit()
+            return WriteResult(c.lastrowid, c.rowcount)
+        finally:
+            conn.close()
+
+    def _transaction(self, func, args, kwargs):
+        conn = self.pool.connect()
+        try:
+            result = func(conn, *args, **kwargs)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _snapshot(self, func, args, kwargs):
+        conn = self.pool.connect()
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+
+    async def fetchone(self, sql: str, params=()) -> Optional[tuple]:
+        return await self.read(self._fetchone, sql, params)
+
+    async def fetchall(self, sql: str, params=()) -> List[tuple]:
+        return await self.read(self._fetchall, sql, params)
+
+    async def execute(self, sql: str, params=()) -> WriteResult:
+        return await self.write(self._execute, sql, params)
+
+    async def executemany(self, sql: str, seq_of_params) -> WriteResult:
+        return await self.write(self._executemany, sql, list(seq_of_params))
+
+    async def transaction(self, func, *args, **kwargs):
+        """Run func(conn, ...) on the writer thread inside one transaction (commit or rollback)"""
+        return await self.write(self._transaction, func, args, kwargs)
+
+    def transaction_nowait(self, func, *args, **kwargs) -> concurrent.futures.Future:
+        """Queue func(conn, ...) as one transaction without awaiting it"""
+        return self.write_nowait(self._transaction, func, args, kwargs)
+
+    async def snapshot(self, func, *args, **kwargs):
+        """Run func(conn, ...) on a reader thread with one connection for several queries"""
+        return await self.read(self._snapshot, func, args, kwargs)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {lane: s.snapshot() for lane, s in self._stats.items()}
+
+    def shutdown(self):
+        """Finish queued work and stop the worker threads"""
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+
+
+db = DatabaseExecutor(db_pool)
+
+# ============================================================================
+# AUDIT LOG BUFFER
+# ============================================================================
+
+class AuditLogBuffer:
+    """Write-behind buffer for command_logs/activity_logs.
+
+    Rows are collected in memory and written with one executemany per table inside a
+    single transaction, when AUDIT_LOG_FLUSH_ROWS rows are waiting, when the oldest row
+    is AUDIT_LOG_FLUSH_SECONDS old, on demand (before the log viewers read) and on shutdown."""
+
+    INSERT_SQL = {
+        'command_logs': '''INSERT INTO command_logs (guild_id, user_id, command_name, timestamp, success)
+                           VALUES (?, ?, ?, ?, ?)''',
+        'activity_logs': '''INSERT INTO activity_logs (guild_id, queue_name, user_id, action, timestamp)
+                            VALUES (?, ?, ?, ?, ?)''',
+    }
+
+    def __init__(self, executor: DatabaseExecutor, flush_rows: int = AUDIT_LOG_FLUSH_ROWS,
+                 flush_interval: float = AUDIT_LOG_FLUSH_SECONDS, max_pending: int = AUDIT_LOG_MAX_PENDING):
+        self.executor = executor
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._rows = deque()  # (table, params) in arrival order
+        self._oldest = None  # monotonic time of the oldest buffered row
+        self._last_flush = None  # future of the most recently queued write
+        self.buffered = 0
+        self.written = 0
+        self.flushes = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def add(self, table: str, params: tuple):
+        """Buffer one row; starts a background flush once a threshold is reached"""
+        with self._lock:
+            if len(self._rows) >= self.max_pending:
+                self._rows.popleft()
+                self.dropped += 1
+            self._rows.append((table, params))
+            self.buffered += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = (len(self._rows) >= self.flush_rows or
+                   time.monotonic() - self._oldest >= self.flush_interval)
+        if due:
+            self.flush_nowait()
+
+    def _take(self) -> List[Tuple[str, tuple]]:
+        with self._lock:
+            batch = list(self._rows)
+            self._rows.clear()
+            self._oldest = None
+        return batch
+
+    def _write_batch(self, conn, batch: List[Tuple[str, tuple]]):
+        by_table = {}
+        for table, params in batch:
+            by_table.setdefault(table, []).append(params)
+        for table, rows in by_table.items():
+            conn.executemany(self.INSERT_SQL[table], rows)
+
+    def _done(self, size: int, future: concurrent.futures.Future):
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                self.failed += size
+            else:
+                self.written += size
+                self.flushes += 1
+
+    def flush_nowait(self) -> Optional[concurrent.futures.Future]:
+        """Queue everything buffered so far as one write transaction"""
+        batch = self._take()
+        if not batch:
+            return None
+        future = self.executor.transaction_nowait(self._write_batch, batch)
+        future.add_done_callback(functools.partial(self._done, len(batch)))
+        with self._lock:
+            self._last_flush = future
+        return future
+
+    async def flush(self):
+        """Write buffered rows and wait until they (and earlier queued flushes) are committed"""
+        future = self.flush_nowait()
+        if future is None:
+            # Nothing buffered, but a background flush may still be on the writer; the writer
+            # runs in order, so waiting for the latest one covers every earlier one too
+            with self._lock:
+                future = self._last_flush
+        if future is not None:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception:
+                pass  # already counted and logged by the executor
+
+    def flush_if_due(self):
+        """Flush rows that have waited longer than the flush interval"""
+        with self._lock:
+            due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+        if due:
+            self.flush_nowait()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pending': len(self._rows),
+                'buffered': self.buffered,
+                'written': self.written,
+                'flushes': self.flushes,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+
+audit_log = AuditLogBuffer(db)
+
+# ============================================================================
+# STATE JOURNAL
+# ============================================================================
+
+def state_key(kind: str, *parts) -> str:
+    """Journal key for one piece of runtime state, e.g. state_key('queue', guild_id, queue_name)"""
+    return ':'.join([kind, *map(str, parts)])
+
+class StateJournal:
+    """Crash-safe copy of the in-memory queue/match state (queues, active matches, match
+    channels, queue messages). Match votes have their own tables (see MatchVoteRegistry).
+
+    Each change is a put (the full JSON value for a key) or a delete. Changes are coalesced
+    per key in memory and appended to state_journal in one transaction once
+    STATE_JOURNAL_FLUSH_KEYS keys are dirty or the oldest change is STATE_JOURNAL_FLUSH_SECONDS
+    old, so recording a join costs a json.dumps and a dict assignment. When the journal grows
+    past STATE_JOURNAL_COMPACT_ROWS rows it is folded into state_snapshots in the same
+    transaction. load() replays snapshot + journal into {key: value}."""
+
+    def __init__(self, executor: DatabaseExecutor, flush_keys: int = STATE_JOURNAL_FLUSH_KEYS,
+                 flush_interval: float = STATE_JOURNAL_FLUSH_SECONDS, compact_rows: int = STATE_JOURNAL_COMPACT_ROWS):
+        self.executor = executor
+        self.flush_keys = flush_keys
+        self.flush_interval = flush_interval
+        self.compact_rows = compact_rows
+        self._lock = threading.Lock()
+        self._dirty: Dict[str, Optional[str]] = {}  # key -> JSON value, None = delete
+        self._oldest = None  # monotonic time of the oldest unflushed change
+        self.restored = False
+        self.recorded = 0
+        self.coalesced = 0
+        self.written = 0
+        self.flushes = 0
+        self.compactions = 0
+        self.failed = 0
+
+    def put(self, key: str, value):
+        self._record(key, json.dumps(value))
+
+    def delete(self, key: str):
+        self._record(key, None)
+
+    def _record(self, key: str, data: Optional[str]):
+        with self._lock:
+            if key in self._dirty:
+                self.coalesced += 1
+            self._dirty[key] = data
+            self.recorded += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = (len(self._dirty) >= self.flush_keys or
+                   time.monotonic() - self._oldest >= self.flush_interval)
+        if due:
+            self.flush_nowait()
+
+    def _take(self) -> Dict[str, Optional[str]]:
+        with self._lock:
+            batch, self._dirty = self._dirty, {}
+            self._oldest = None
+        return batch
+
+    def _write_batch(self, conn, batch: Dict[str, Optional[str]]):
+        now = datetime.now().isoformat()
+        conn.executemany('INSERT INTO state_journal (key, data, ts) VALUES (?, ?, ?)',
+                         [(key, data, now) for key, data in batch.items()])
+        if conn.execute('SELECT COUNT(*) FROM state_journal').fetchone()[0] >= self.compact_rows:
+            self._compact(conn)
+
+    def _compact(self, conn):
+        """Fold the journal into state_snapshots and truncate it"""
+        rows = conn.execute('SELECT seq, key, data FROM state_journal ORDER BY seq').fetchall()
+        latest = {key: data for _, key, data in rows}
+        conn.executemany('DELETE FROM state_snapshots WHERE key = ?',
+                         [(key,) for key, data in latest.items() if data is None])
+        conn.executemany('INSERT OR REPLACE INTO state_snapshots (key, data, updated_at) VALUES (?, ?, ?)',
+                         [(key, data, datetime.now().isoformat()) for key, data in latest.items() if data is not None])
+        conn.execute('DELETE FROM state_journal WHERE seq <= ?', (rows[-1][0],))
+        with self._lock:
+            self.compactions += 1
+
+    def _done(self, size: int, future: concurrent.futures.Future):
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                self.failed += size
+            else:
+                self.written += size
+                self.flushes += 1
+
+    def flush_nowait(self) -> Optional[concurrent.futures.Future]:
+        """Queue every pending change as one write transaction"""
+        batch = self._take()
+        if not batch:
+            return None
+        future = self.executor.transaction_nowait(self._write_batch, batch)
+        future.add_done_callback(functools.partial(self._done, len(batch)))
+        return future
+
+    def flush_if_due(self):
+        with self._lock:
+            due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+        if due:
+            self.flush_nowait()
+
+    @staticmethod
+    def _load(conn) -> Dict:
+        state = {key: data for key, data in conn.execute('SELECT key, data FROM state_snapshots')}
+        for key, data in conn.execute('SELECT key, data FROM state_journal ORDER BY seq'):
+            if data is None:
+                state.pop(key, None)
+            else:
+                state[key] = data
+        return {key: json.loads(data) for key, data in state.items()}
+
+    async def load(self) -> Dict:
+        """Current persisted state: snapshot with the journal replayed on top"""
+        return await self.executor.snapshot(self._load)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pending': len(self._dirty),
+                'recorded': self.recorded,
+                'coalesced': self.coalesced,
+                'written': self.written,
+                'flushes': self.flushes,
+                'compactions': self.compactions,
+                'failed': self.failed,
+            }
+
+
+state_journal = StateJournal(db)
+
+# ============================================================================
+# IN-PROCESS CACHES
+# ============================================================================
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Small LRU cache with per-entry expiry and hit/miss counters.
+
+    Only touched from the event loop, so no locking is needed."""
+
+    registry: Dict[str, 'TTLCache'] = {}
+
+    def __init__(self, name: str, ttl: float, maxsize: int):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        TTLCache.registry[name] = self
+
+    def get(self, key, default=_MISSING):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def peek(self, key, default=_MISSING):
+        """Return a live entry without touching LRU order or counters"""
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return default
+        return entry[1]
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+        }
+
+
+# (guild_id, queue_name) -> settings dict; callers always get a copy
+queue_settings_cache = TTLCache('queue_settings', QUEUE_SETTINGS_CACHE_TTL, QUEUE_SETTINGS_CACHE_SIZE)
+# (guild_id, queue_name) -> bumped on every settings write, so a load that raced it isn't cached
+queue_settings_versions: Dict[Tuple[int, str], int] = {}
+rank_table_cache = TTLCache('ranks', RANK_CACHE_TTL, RANK_CACHE_SIZE)
+
+
+class GuildAccess:
+    """In-memory access-control snapshot for one guild"""
+
+    __slots__ = ('staff_roles', 'required_roles', 'blacklist', 'role_limits')
+
+    def __init__(self):
+        self.staff_roles = set()  # role ids
+        self.required_roles: Dict[str, set] = {}  # queue_name -> role ids
+        self.blacklist: Dict[str, set] = {}  # queue_name -> user ids
+        self.role_limits: Dict[str, Dict[int, int]] = {}  # queue_name -> {role_id: max_count}
+
+
+def _load_guild_access(conn, guild_id: int) -> GuildAccess:
+    """Read all access-control rows for a guild - runs on a reader thread"""
+    access = GuildAccess()
+    c = conn.cursor()
+    c.execute('SELECT role_id FROM staff_roles WHERE guild_id=?', (guild_id,))
+    access.staff_roles = {row[0] for row in c.fetchall()}
+    c.execute('SELECT queue_name, role_id FROM required_roles WHERE guild_id=?', (guild_id,))
+    for queue_name, role_id in c.fetchall():
+        access.required_roles.setdefault(queue_name, set()).add(role_id)
+    c.execute('SELECT queue_name, user_id FROM blacklist WHERE guild_id=?', (guild_id,))
+    for queue_name, user_id in c.fetchall():
+        access.blacklist.setdefault(queue_name, set()).add(user_id)
+    c.execute('SELECT queue_name, role_id, max_count FROM role_limits WHERE guild_id=?', (guild_id,))
+    for queue_name, role_id, max_count in c.fetchall():
+        access.role_limits.setdefault(queue_name, {})[role_id] = max_count
+    return access
+
+
+class PermissionCache:
+    """Per-guild GuildAccess snapshots, loaded once and kept current by the commands that edit them.
+
+    Concurrent first lookups for a guild share one load. A change made while a load is in
+    flight bumps the guild's version so the possibly stale result is re-read."""
+
+    def __init__(self, executor: DatabaseExecutor, ttl: float = PERMISSION_CACHE_TTL,
+                 maxsize: int = PERMISSION_CACHE_SIZE):
+        self.executor = executor
+        self._cache = TTLCache('guild_access', ttl, maxsize)
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._versions: Dict[int, int] = {}
+
+    async def get(self, guild_id: int) -> GuildAccess:
+        access = self._cache.get(guild_id)
+        if access is not _MISSING:
+            return access
+        pending = self._loading.get(guild_id)
+        if pending is not None:
+            return await pending
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[guild_id] = future
+        try:
+            while True:
+                version = self._versions.get(guild_id, 0)
+                access = await self.executor.snapshot(_load_guild_access, guild_id)
+                if self._versions.get(guild_id, 0) == version:
+                    break
+            self._cache.set(guild_id, access)
+            future.set_result(access)
+            return access
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            self._loading.pop(guild_id, None)
+
+    def _update(self, guild_id: int, apply):
+        self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+        access = self._cache.peek(guild_id)
+        if access is not _MISSING:
+            apply(access)
+
+    def add_staff_role(self, guild_id: int, role_id: int):
+        self._update(guild_id, lambda a: a.staff_roles.add(role_id))
+
+    def remove_staff_role(self, guild_id: int, role_id: int):
+        self._update(guild_id, lambda a: a.staff_roles.discard(role_id))
+
+    def add_required_role(self, guild_id: int, queue_name: str, role_id: int):
+        self._update(guild_id, lambda a: a.required_roles.setdefault(queue_name, set()).add(role_id))
+
+    def remove_required_role(self, guild_id: int, queue_name: str, role_id: int):
+        self._update(guild_id, lambda a: a.required_roles.get(queue_name, set()).discard(role_id))
+
+    def blacklist_user(self, guild_id: int, queue_name: str, user_id: int):
+        self._update(guild_id, lambda a: a.blacklist.setdefault(queue_name, set()).add(user_id))
+
+    def unblacklist_user(self, guild_id: int, queue_name: str, user_id: int):
+        self._update(guild_id, lambda a: a.blacklist.get(queue_name, set()).discard(user_id))
+
+    def set_role_limit(self, guild_id: int, queue_name: str, role_id: int, max_count: int):
+        self._update(guild_id, lambda a: a.role_limits.setdefault(queue_name, {}).__setitem__(role_id, max_count))
+
+    def remove_role_limit(self, guild_id: int, queue_name: str, role_id: int):
+        self._update(guild_id, lambda a: a.role_limits.get(queue_name, {}).pop(role_id, None))
+
+
+permission_cache = PermissionCache(db)
+
 # ============================================================================
 # DATABASE MANAGEMENT
 # ============================================================================
 
+# Managed secondary indexes: name -> (table, columns). init_db creates anything missing and
+# drops indexes it created earlier that are no longer listed here; the names it manages are
+# recorded in managed_indexes, so indexes added by hand or by other modules are left alone.
+SECONDARY_INDEXES = {
+    'idx_matches_queue_number': ('matches', ('guild_id', 'queue_name', 'match_number')),
+    'idx_matches_history': ('matches', ('guild_id', 'queue_name', 'cancelled', 'match_id')),
+    'idx_match_participants_player': ('match_participants', ('guild_id', 'user_id', 'match_id', 'queue_name', 'result')),
+    'idx_match_participants_queue_player': ('match_participants', ('guild_id', 'queue_name', 'user_id', 'match_id', 'result')),
+    'idx_queue_stats_mmr': ('queue_stats', ('guild_id', 'queue_name', 'mmr')),
+    'idx_players_mmr': ('players', ('mmr',)),
+    'idx_command_logs_guild': ('command_logs', ('guild_id', 'log_id')),
+    'idx_activity_logs_queue': ('activity_logs', ('guild_id', 'queue_name', 'log_id')),
+    'idx_scheduled_tasks_next_run': ('scheduled_tasks', ('next_run_at',)),
+}
+
+# Hot queries checked with EXPLAIN QUERY PLAN - keep in sync with the commands that run them
+HOT_QUERIES = {
+    'match number': 'SELECT MAX(match_number) FROM matches WHERE guild_id=? AND queue_name=?',
+    'matchhistory': '''SELECT match_id, timestamp, team1, team2, winner, mmr_change, match_number 
+                       FROM matches 
+                       WHERE guild_id=? AND queue_name=? AND cancelled=0 
+                       ORDER BY match_id DESC LIMIT ?''',
+    'recentmatches': '''SELECT p.match_id, m.timestamp, p.result, p.queue_name 
+                        FROM match_participants p JOIN matches m ON m.match_id = p.match_id
+                        WHERE p.guild_id=? AND p.user_id=?
+                        ORDER BY p.match_id DESC LIMIT ?''',
+    'recentmatches (queue)': '''SELECT p.match_id, m.timestamp, p.result, p.queue_name 
+                                FROM match_participants p JOIN matches m ON m.match_id = p.match_id
+                                WHERE p.guild_id=? AND p.queue_name=? AND p.user_id=?
+                                ORDER BY p.match_id DESC LIMIT ?''',
+    'winstreak': '''SELECT p.match_id, p.result 
+                    FROM match_participants p JOIN matches m ON m.match_id = p.match_id
+                    WHERE p.guild_id=? AND p.user_id=? AND p.result IS NOT NULL
+                    ORDER BY p.match_id DESC LIMIT 50''',
+    'winstreak (queue)': '''SELECT p.match_id, p.result 
+                            FROM match_participants p JOIN matches m ON m.match_id = p.match_id
+                            WHERE p.guild_id=? AND p.queue_name=? AND p.user_id=? AND p.result IS NOT NULL
+                            ORDER BY p.match_id DESC LIMIT 50''',
+    'leaderboard (queue)': '''SELECT user_id, mmr, wins, losses, games_played 
+                              FROM queue_stats 
+                              WHERE guild_id=? AND queue_name=? 
+                              ORDER BY mmr DESC LIMIT ?''',
+    'leaderboard (global)': 'SELECT user_id, username, mmr, wins, losses FROM players ORDER BY mmr DESC LIMIT ?',
+    'rank (queue)': '''SELECT COUNT(*) + 1 FROM queue_stats 
+                       WHERE guild_id=? AND queue_name=? AND mmr > (
+                           SELECT mmr FROM queue_stats 
+                           WHERE guild_id=? AND queue_name=? AND user_id=?
+                       )''',
+    'rank (global)': '''SELECT COUNT(*) + 1 FROM players WHERE mmr > (
+                            SELECT mmr FROM players WHERE user_id=?
+                        )''',
+    'commandlog': '''SELECT user_id, command_name, timestamp, success 
+                     FROM command_logs 
+                     WHERE guild_id=? 
+                     ORDER BY log_id DESC LIMIT ?''',
+    'activitylog': '''SELECT user_id, action, timestamp 
+                      FROM activity_logs 
+                      WHERE guild_id=? AND queue_name=? 
+                      ORDER BY log_id DESC LIMIT ?''',
+    'scheduled tasks (due soon)': '''SELECT task_id, guild_id, channel_id, command_name, command_args, schedule_times, next_run_at 
+                                     FROM scheduled_tasks 
+                                     WHERE next_run_at < ? 
+                                     ORDER BY next_run_at''',
+}
+
+# Hot queries allowed to walk a whole index: their ORDER BY follows the index and LIMIT stops
+# the walk after the first rows, so they never read the full table
+INDEX_WALKS = {'leaderboard (global)'}
+
+def _ensure_secondary_indexes(c) -> Tuple[List[str], List[str]]:
+    """Create missing or changed managed indexes and drop the ones no longer listed"""
+    c.execute('''CREATE TABLE IF NOT EXISTS managed_indexes (
+        name TEXT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        columns TEXT NOT NULL
+    ) WITHOUT ROWID''')
+    c.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    existing = {row[0] for row in c.fetchall()}
+    c.execute('SELECT name, columns FROM managed_indexes')
+    managed = dict(c.fetchall())
+    created = []
+    for name, (table, columns) in SECONDARY_INDEXES.items():
+        definition = ','.join(columns)
+        if name in existing and managed.get(name, definition) != definition:
+            c.execute(f"DROP INDEX IF EXISTS {name}")
+            existing.discard(name)
+        if name not in existing:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+            created.append(name)
+        if managed.get(name) != definition:
+            # Also adopts indexes created before this table existed
+            c.execute('INSERT OR REPLACE INTO managed_indexes (name, table_name, columns) VALUES (?, ?, ?)',
+                      (name, table, definition))
+    dropped = sorted(managed.keys() - SECONDARY_INDEXES.keys())
+    for name in dropped:
+        c.execute(f"DROP INDEX IF EXISTS {name}")
+        c.execute('DELETE FROM managed_indexes WHERE name=?', (name,))
+    return created, dropped
+
+def check_query_plans() -> Dict[str, str]:
+    """EXPLAIN every hot query; returns {query: plan step} for any that falls back to a full table
+    scan, or to a full index walk unless it is listed in INDEX_WALKS"""
+    # Own connection with no statement cache - cached EXPLAIN statements keep reporting the
+    # plan from when they were prepared, even after indexes change
+    conn = sqlite3.connect(DB_FILE, cached_statements=0)
+    try:
+        regressions = {}
+        for label, sql in HOT_QUERIES.items():
+            params = (0,) * sql.count('?')
+            for _, _, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+                if detail.startswith('SCAN') and ('INDEX' not in detail or label not in INDEX_WALKS):
+                    regressions[label] = detail
+                    break
+        return regressions
+    finally:
+        conn.close()
+
 def init_db():
     """Initialize all database tables"""
     logger.info(f"Initializing database: {DB_FILE}")
     
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = db_pool.connect()
         c = conn.cursor()
         
         # Players table
@@ -220,6 +1286,61 @@ def init_db():
             lobby_details TEXT
         )''')
         
+        # One row per player per match - indexed per-player history instead of LIKE over team JSON
+        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='match_participants'")
+        backfill_participants = c.fetchone() is None
+        c.execute('''CREATE TABLE IF NOT EXISTS match_participants (
+            match_id INTEGER,
+            guild_id INTEGER,
+            queue_name TEXT,
+            user_id INTEGER,
+            team INTEGER,
+            result TEXT,
+            PRIMARY KEY (match_id, user_id)
+        ) WITHOUT ROWID''')
+        if backfill_participants:
+            backfilled = _backfill_match_participants(c)
+            logger.info(f"Backfilled match_participants from {backfilled} existing matches")
+        
+        # Runtime queue/match state: compacted snapshot plus append-only journal
+        c.execute('''CREATE TABLE IF NOT EXISTS state_snapshots (
+            key TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at TEXT
+        ) WITHOUT ROWID''')
+        c.execute('''CREATE TABLE IF NOT EXISTS state_journal (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL,
+            data TEXT,
+            ts TEXT
+        )''')
+        
+        # Open best-of-3 votes (one row per match) and the ballots of each match's current game
+        c.execute('''CREATE TABLE IF NOT EXISTS match_vote_state (
+            match_id INTEGER PRIMARY KEY,
+            guild_id INTEGER,
+            queue_name TEXT,
+            team1 TEXT,
+            team2 TEXT,
+            team1_name TEXT,
+            team2_name TEXT,
+            required_votes INTEGER,
+            bo3_maps TEXT,
+            current_game INTEGER DEFAULT 1,
+            team1_wins INTEGER DEFAULT 0,
+            team2_wins INTEGER DEFAULT 0,
+            game_results TEXT DEFAULT '[]',
+            channel_id INTEGER,
+            message_id INTEGER,
+            updated_at TEXT
+        )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS match_vote_ballots (
+            match_id INTEGER,
+            user_id INTEGER,
+            team INTEGER,
+            PRIMARY KEY (match_id, user_id)
+        ) WITHOUT ROWID''')
+        
         # Queue settings table - expanded
         c.execute('''CREATE TABLE IF NOT EXISTS queue_settings (
             guild_id INTEGER,
@@ -372,6 +1493,15 @@ def init_db():
             created_at TEXT
         )''')
         
+        # Migrate scheduled_tasks: run cursor + indexed next run time
+        c.execute("PRAGMA table_info(scheduled_tasks)")
+        task_columns = {row[1] for row in c.fetchall()}
+        for col_name in ('next_run_at', 'last_fired_at'):
+            if col_name not in task_columns:
+                c.execute(f"ALTER TABLE scheduled_tasks ADD COLUMN {col_name} TEXT")
+        if 'next_run_at' not in task_columns:
+            logger.info(f"Scheduled next runs for {_backfill_next_run(c)} existing scheduled tasks")
+        
         # Command logs
         c.execute('''CREATE TABLE IF NOT EXISTS command_logs (
             log_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -532,6 +1662,22 @@ def init_db():
             UNIQUE(guild_id, platform, username)
         )''')
         
+        # Recent go-live times per channel, used to poll faster around them
+        c.execute('''CREATE TABLE IF NOT EXISTS stream_go_live (
+            platform TEXT NOT NULL,
+            username TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            PRIMARY KEY (platform, username, started_at)
+        ) WITHOUT ROWID''')
+        
+        # YouTube handles resolved to channel IDs, so each is looked up only once
+        c.execute('''CREATE TABLE IF NOT EXISTS youtube_channels (
+            handle TEXT PRIMARY KEY,
+            channel_id TEXT NOT NULL,
+            title TEXT,
+            resolved_at TEXT
+        ) WITHOUT ROWID''')
+        
         conn.commit()
         
         # =====================================================================
@@ -597,8 +1743,16 @@ def init_db():
             profile_badge TEXT DEFAULT '👑',
             custom_title TEXT
         )''')
+        
+        created, dropped = _ensure_secondary_indexes(c)
+        if created or dropped:
+            c.execute('PRAGMA optimize')
+            logger.info(f"Indexes created: {', '.join(created) or 'none'} | dropped: {', '.join(dropped) or 'none'}")
         conn.commit()
         
+        for label, detail in check_query_plans().items():
+            logger.warning(f"Query plan regression in '{label}': {detail}")
+        
         # Log stats
         c.execute('SELECT COUNT(*) FROM players')
         player_count = c.fetchone()[0]
@@ -617,52 +1771,215 @@ def init_db():
     except Exception as e:
         logger.error(f"Database initialization failed: {e}", exc_info=True)
 
+def _participant_result(team: int, winner: Optional[int]) -> Optional[str]:
+    """'win'/'loss' for a player on `team`, or None while there is no result"""
+    if winner not in (1, 2):
+        return None
+    return 'win' if winner == team else 'loss'
+
+def _participant_rows(match_id: int, guild_id: int, queue_name: str, team1: List, team2: List,
+                      winner: Optional[int] = None) -> List[tuple]:
+    return [(match_id, guild_id, queue_name, user_id, team, _participant_result(team, winner))
+            for team, players in ((1, team1), (2, team2)) for user_id in players]
+
+def _backfill_match_participants(c) -> int:
+    """One-shot copy of existing matches into match_participants"""
+    c.execute('SELECT match_id, guild_id, queue_name, team1, team2, winner FROM matches')
+    rows = []
+    matches = 0
+    for match_id, guild_id, queue_name, team1_json, team2_json, winner in c.fetchall():
+        try:
+            team1 = json.loads(team1_json or '[]')
+            team2 = json.loads(team2_json or '[]')
+        except (TypeError, ValueError):
+            continue
+        rows.extend(_participant_rows(match_id, guild_id, queue_name, team1, team2, winner))
+        matches += 1
+    c.executemany('INSERT OR IGNORE INTO match_participants VALUES (?, ?, ?, ?, ?, ?)', rows)
+    return matches
+
 def log_command(guild_id: int, user_id: int, command_name: str, success: bool = True):
-    """Log command usage"""
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('''INSERT INTO command_logs (guild_id, user_id, command_name, timestamp, success)
-                     VALUES (?, ?, ?, ?, ?)''',
-                  (guild_id, user_id, command_name, datetime.now().isoformat(), 1 if success else 0))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        logger.error(f"Failed to log command: {e}")
+    """Log command usage (buffered, written in batches)"""
+    audit_log.add('command_logs', (guild_id, user_id, command_name, datetime.now().isoformat(), 1 if success else 0))
 
 def log_activity(guild_id: int, queue_name: str, user_id: int, action: str):
-    """Log queue activity"""
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('''INSERT INTO activity_logs (guild_id, queue_name, user_id, action, timestamp)
-                     VALUES (?, ?, ?, ?, ?)''',
-                  (guild_id, queue_name, user_id, action, datetime.now().isoformat()))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        logger.error(f"Failed to log activity: {e}")
+    """Log queue activity (buffered, written in batches)"""
+    audit_log.add('activity_logs', (guild_id, queue_name, user_id, action, datetime.now().isoformat()))
 
 # ============================================================================
 # HELPER FUNCTIONS - QUEUE MANAGEMENT
 # ============================================================================
 
-def get_queue(guild_id: int, queue_name: str = "default") -> List:
+class QueueEngine:
+    """Players waiting in one (guild, queue) and where the queue is in its match lifecycle.
+
+    Players live in an insertion-ordered dict used as an ordered set (O(1) membership and
+    removal). State goes open -> filling -> starting -> in_match; claim_start() is the only
+    way into 'starting' and takes the players out atomically under the lock, so one fill
+    becomes exactly one match no matter how many callers try to start it. Every change is
+    recorded in the state journal so the queue survives a restart."""
+
+    OPEN = 'open'
+    FILLING = 'filling'
+    STARTING = 'starting'
+    IN_MATCH = 'in_match'
+    TRANSITIONS = {
+        OPEN: {FILLING},
+        FILLING: {OPEN, STARTING},
+        STARTING: {IN_MATCH, FILLING, OPEN},
+        IN_MATCH: {OPEN, FILLING},
+    }
+
+    def __init__(self, guild_id: int, queue_name: str):
+        self.guild_id = guild_id
+        self.queue_name = queue_name
+        self.lock = asyncio.Lock()
+        self.state = self.OPEN
+        self._players: Dict[int, None] = {}
+        self._claimed: List[int] = []  # players taken by a start that hasn't finished yet
+        self.starts = 0
+        self.rejected_starts = 0
+
+    def __len__(self):
+        return len(self._players)
+
+    def __iter__(self):
+        return iter(list(self._players))
+
+    def __contains__(self, user_id):
+        return user_id in self._players
+
+    def snapshot(self) -> List[int]:
+        return list(self._players)
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        if state not in self.TRANSITIONS[self.state]:
+            logger.warning(f"Queue {self.guild_id}/{self.queue_name}: unexpected transition {self.state} -> {state}")
+        self.state = state
+
+    def _journal(self):
+        key = state_key('queue', self.guild_id, self.queue_name)
+        if self._players or self.state != self.OPEN:
+            state_journal.put(key, {'players': list(self._players), 'state': self.state, 'claimed': self._claimed})
+        else:
+            state_journal.delete(key)
+    
+    def restore(self, data: Dict):
+        """Load journaled players/state; a start interrupted by the restart hands its players back"""
+        players = data.get('players', [])
+        state = data.get('state', self.OPEN)
+        if state == self.STARTING:
+            players = data.get('claimed', []) + players
+            state = self.FILLING if players else self.OPEN
+        self._players = dict.fromkeys(players)
+        self._claimed = []
+        self.state = state
+        self._journal()
+    
+    def _settle(self):
+        """Re-derive open/filling from the player count (a start in progress is left alone)"""
+        if self.state == self.STARTING or (self.state == self.IN_MATCH and not self._players):
+            return
+        self._set_state(self.FILLING if self._players else self.OPEN)
+
+    async def add(self, user_id: int) -> bool:
+        """Add a player; False if they were already queued"""
+        async with self.lock:
+            if user_id in self._players:
+                return False
+            self._players[user_id] = None
+            self._settle()
+            self._journal()
+            return True
+
+    async def remove(self, user_id: int) -> bool:
+        """Remove a player; False if they weren't queued"""
+        async with self.lock:
+            if self._players.pop(user_id, _MISSING) is _MISSING:
+                return False
+            self._settle()
+            self._journal()
+            return True
+
+    async def clear(self) -> int:
+        async with self.lock:
+            count = len(self._players)
+            self._players.clear()
+            self._settle()
+            self._journal()
+            return count
+
+    async def claim_start(self, required: int) -> Optional[List[int]]:
+        """Take the first `required` players for a new match, or None if not full / already starting"""
+        async with self.lock:
+            if self.state == self.STARTING or len(self._players) < required:
+                self.rejected_starts += 1
+                return None
+            players = list(self._players)[:required]
+            for user_id in players:
+                del self._players[user_id]
+            self._claimed = players
+            self._set_state(self.STARTING)
+            self._journal()
+            return players
+
+    async def finish_start(self):
+        """The claimed players are now in a match"""
+        async with self.lock:
+            self.starts += 1
+            self._claimed = []
+            self._set_state(self.IN_MATCH)
+            self._journal()
+
+    async def abort_start(self, players: List[int]):
+        """Start failed before a match existed - put the players back at the front of the queue"""
+        async with self.lock:
+            waiting = self._players
+            self._players = dict.fromkeys(players)
+            self._players.update(waiting)
+            self._claimed = []
+            self.state = self.FILLING if self._players else self.OPEN
+            self._journal()
+
+    def end_match(self):
+        """The match this queue started is over (reported, voted or cancelled)"""
+        if self.state == self.IN_MATCH:
+            self._set_state(self.FILLING if self._players else self.OPEN)
+            self._journal()
+
+def get_queue(guild_id: int, queue_name: str = "default") -> QueueEngine:
     """Get or create a queue for a guild"""
     if guild_id not in guild_queues:
         guild_queues[guild_id] = {}
     if queue_name not in guild_queues[guild_id]:
-        guild_queues[guild_id][queue_name] = []
+        guild_queues[guild_id][queue_name] = QueueEngine(guild_id, queue_name)
     return guild_queues[guild_id][queue_name]
 
-def get_queue_settings(guild_id: int, queue_name: str = "default") -> Dict:
-    """Get queue settings from database"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT * FROM queue_settings WHERE guild_id=? AND queue_name=?', 
-              (guild_id, queue_name))
-    result = c.fetchone()
-    conn.close()
+async def get_queue_settings(guild_id: int, queue_name: str = "default") -> Dict:
+    """Get queue settings (cached, falls back to database)"""
+    cached = queue_settings_cache.get((guild_id, queue_name))
+    if cached is not _MISSING:
+        return dict(cached)
+    
+    key = (guild_id, queue_name)
+    version = queue_settings_versions.get(key, 0)
+    settings = await _load_queue_settings(guild_id, queue_name)
+    if queue_settings_versions.get(key, 0) == version:
+        queue_settings_cache.set(key, settings)
+    return dict(settings)
+
+def invalidate_queue_settings(guild_id: int, queue_name: str):
+    """Drop cached settings after a direct queue_settings write"""
+    key = (guild_id, queue_name)
+    queue_settings_versions[key] = queue_settings_versions.get(key, 0) + 1
+    queue_settings_cache.invalidate(key)
+
+async def _load_queue_settings(guild_id: int, queue_name: str) -> Dict:
+    """Read queue settings from database, or the defaults if none are saved"""
+    result = await db.fetchone('SELECT * FROM queue_settings WHERE guild_id=? AND queue_name=?',
+                               (guild_id, queue_name))
     
     if result:
         return {
@@ -712,85 +2029,68 @@ def get_queue_settings(guild_id: int, queue_name: str = "default") -> Dict:
         'game_mode': 'mix'
     }
 
-def save_queue_settings(settings: Dict):
+async def save_queue_settings(settings: Dict):
     """Save queue settings to database"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''INSERT OR REPLACE INTO queue_settings 
-                 (guild_id, queue_name, team_size, team_selection_mode, captain_mode,
-                  required_role, locked, results_channel, auto_move, create_channels,
-                  channel_category, map_voting, ping_players, sticky_message, name_type,
-                  mmr_decay_enabled, lobby_details_template, team1_name, team2_name, game_mode)
-                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-              (settings['guild_id'], settings['queue_name'], settings['team_size'],
-               settings['team_selection_mode'], settings['captain_mode'],
-               settings['required_role'], settings['locked'],
-               settings['results_channel'], settings['auto_move'],
-               settings['create_channels'], settings['channel_category'],
-               settings['map_voting'], settings['ping_players'],
-               settings['sticky_message'], settings['name_type'],
-               settings['mmr_decay_enabled'], settings['lobby_details_template'],
-               settings.get('team1_name', 'Team 1'), settings.get('team2_name', 'Team 2'),
-               settings.get('game_mode', 'mix')))
-    conn.commit()
-    conn.close()
-
-def is_user_staff(guild: discord.Guild, user: discord.Member) -> bool:
+    await db.execute('''INSERT OR REPLACE INTO queue_settings 
+                        (guild_id, queue_name, team_size, team_selection_mode, captain_mode,
+                         required_role, locked, results_channel, auto_move, create_channels,
+                         channel_category, map_voting, ping_players, sticky_message, name_type,
+                         mmr_decay_enabled, lobby_details_template, team1_name, team2_name, game_mode)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                     (settings['guild_id'], settings['queue_name'], settings['team_size'],
+                      settings['team_selection_mode'], settings['captain_mode'],
+                      settings['required_role'], settings['locked'],
+                      settings['results_channel'], settings['auto_move'],
+                      settings['create_channels'], settings['channel_category'],
+                      settings['map_voting'], settings['ping_players'],
+                      settings['sticky_message'], settings['name_type'],
+                      settings['mmr_decay_enabled'], settings['lobby_details_template'],
+                      settings.get('team1_name', 'Team 1'), settings.get('team2_name', 'Team 2'),
+                      settings.get('game_mode', 'mix')))
+    key = (settings['guild_id'], settings['queue_name'])
+    queue_settings_versions[key] = queue_settings_versions.get(key, 0) + 1
+    queue_settings_cache.set(key, dict(settings))
+
+async def is_user_staff(guild: discord.Guild, user: discord.Member) -> bool:
     """Check if user is staff (admin or has staff role)"""
     if user.guild_permissions.administrator:
         return True
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT role_id FROM staff_roles WHERE guild_id=?', (guild.id,))
-    staff_roles = [row[0] for row in c.fetchall()]
-    conn.close()
-    
+    staff_roles = (await permission_cache.get(guild.id)).staff_roles
     return any(role.id in staff_roles for role in user.roles)
 
-def is_user_blacklisted(guild_id: int, queue_name: str, user_id: int) -> bool:
+async def is_user_blacklisted(guild_id: int, queue_name: str, user_id: int) -> bool:
     """Check if user is blacklisted from queue"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT user_id FROM blacklist WHERE guild_id=? AND queue_name=? AND user_id=?',
-              (guild_id, queue_name, user_id))
-    result = c.fetchone()
-    conn.close()
-    return result is not None
+    access = await permission_cache.get(guild_id)
+    return user_id in access.blacklist.get(queue_name, ())
 
-def check_required_roles(guild: discord.Guild, user: discord.Member, queue_name: str) -> bool:
+async def check_required_roles(guild: discord.Guild, user: discord.Member, queue_name: str) -> bool:
     """Check if user has required roles for queue"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT role_id FROM required_roles WHERE guild_id=? AND queue_name=?',
-              (guild.id, queue_name))
-    required_roles = [row[0] for row in c.fetchall()]
-    conn.close()
+    access = await permission_cache.get(guild.id)
+    required_roles = access.required_roles.get(queue_name)
     
     if not required_roles:
         return True
     
-    user_role_ids = [role.id for role in user.roles]
-    return any(role_id in user_role_ids for role_id in required_roles)
+    return any(role.id in required_roles for role in user.roles)
 
-def get_or_create_player(user_id: int, username: str) -> Dict:
-    """Get player stats or create new player"""
-    conn = sqlite3.connect(DB_FILE)
+def _create_player(conn, user_id: int, username: str) -> tuple:
+    """Insert a new player row (if still missing) and return it - runs on the writer thread"""
     c = conn.cursor()
+    join_date = datetime.now().isoformat()
+    c.execute('''INSERT OR IGNORE INTO players 
+                 (user_id, username, mmr, wins, losses, total_games, win_streak, highest_mmr, join_date)
+                 VALUES (?, ?, 1000, 0, 0, 0, 0, 1000, ?)''',
+              (user_id, username, join_date))
     c.execute('SELECT * FROM players WHERE user_id=?', (user_id,))
-    result = c.fetchone()
+    return c.fetchone()
+
+async def get_or_create_player(user_id: int, username: str) -> Dict:
+    """Get player stats or create new player"""
+    result = await db.fetchone('SELECT * FROM players WHERE user_id=?', (user_id,))
     
     if not result:
-        join_date = datetime.now().isoformat()
-        c.execute('''INSERT INTO players 
-                     (user_id, username, mmr, wins, losses, total_games, win_streak, highest_mmr, join_date)
-                     VALUES (?, ?, 1000, 0, 0, 0, 0, 1000, ?)''',
-                  (user_id, username, join_date))
-        conn.commit()
-        c.execute('SELECT * FROM players WHERE user_id=?', (user_id,))
-        result = c.fetchone()
-    
-    conn.close()
+        result = await db.transaction(_create_player, user_id, username)
     
     return {
         'user_id': result[0],
@@ -806,24 +2106,23 @@ def get_or_create_player(user_id: int, username: str) -> Dict:
         'grace_period_until': result[10] if len(result) > 10 else None
     }
 
-def get_queue_player_stats(user_id: int, guild_id: int, queue_name: str) -> Dict:
-    """Get player stats for specific queue"""
-    conn = sqlite3.connect(DB_FILE)
+def _create_queue_player_stats(conn, user_id: int, guild_id: int, queue_name: str) -> tuple:
+    """Insert a default queue_stats row (if still missing) and return it - runs on the writer thread"""
     c = conn.cursor()
+    c.execute('''INSERT OR IGNORE INTO queue_stats (user_id, guild_id, queue_name, mmr)
+                 VALUES (?, ?, ?, 1000)''',
+              (user_id, guild_id, queue_name))
     c.execute('SELECT * FROM queue_stats WHERE user_id=? AND guild_id=? AND queue_name=?',
               (user_id, guild_id, queue_name))
-    result = c.fetchone()
+    return c.fetchone()
+
+async def get_queue_player_stats(user_id: int, guild_id: int, queue_name: str) -> Dict:
+    """Get player stats for specific queue"""
+    result = await db.fetchone('SELECT * FROM queue_stats WHERE user_id=? AND guild_id=? AND queue_name=?',
+                               (user_id, guild_id, queue_name))
     
     if not result:
-        c.execute('''INSERT INTO queue_stats (user_id, guild_id, queue_name, mmr)
-                     VALUES (?, ?, ?, 1000)''',
-                  (user_id, guild_id, queue_name))
-        conn.commit()
-        c.execute('SELECT * FROM queue_stats WHERE user_id=? AND guild_id=? AND queue_name=?',
-                  (user_id, guild_id, queue_name))
-        result = c.fetchone()
-    
-    conn.close()
+        result = await db.transaction(_create_queue_player_stats, user_id, guild_id, queue_name)
     
     return {
         'user_id': result[0],
@@ -836,73 +2135,296 @@ def get_queue_player_stats(user_id: int, guild_id: int, queue_name: str) -> Dict
         'last_played': result[7] if len(result) > 7 else None
     }
 
-def update_player_stats(user_id: int, guild_id: int, queue_name: str, mmr_change: int, won: bool):
-    """Update player stats after a match"""
-    conn = sqlite3.connect(DB_FILE)
+def _insert_match(conn, guild_id: int, queue_name: str, timestamp: str, team1: List, team2: List,
+                  match_number: int, lobby_details: Optional[str]) -> int:
     c = conn.cursor()
-    
-    # Update queue-specific stats
-    c.execute('SELECT * FROM queue_stats WHERE user_id=? AND guild_id=? AND queue_name=?',
-              (user_id, guild_id, queue_name))
-    stats = c.fetchone()
-    
-    if stats:
-        new_mmr = max(0, stats[3] + mmr_change)
-        new_wins = stats[4] + (1 if won else 0)
-        new_losses = stats[5] + (0 if won else 1)
-        new_games = stats[6] + 1
-        
-        c.execute('''UPDATE queue_stats 
-                     SET mmr=?, wins=?, losses=?, games_played=?, last_played=?
-                     WHERE user_id=? AND guild_id=? AND queue_name=?''',
-                  (new_mmr, new_wins, new_losses, new_games, datetime.now().isoformat(),
-                   user_id, guild_id, queue_name))
-    
-    # Update global stats
-    c.execute('SELECT * FROM players WHERE user_id=?', (user_id,))
-    player = c.fetchone()
-    
-    if player:
-        new_mmr = max(0, player[2] + mmr_change)
-        new_wins = player[3] + (1 if won else 0)
-        new_losses = player[4] + (0 if won else 1)
-        new_total = player[6] + 1
-        new_streak = (player[7] + 1) if won else 0
-        new_highest = max(player[8], new_mmr)
-        
-        c.execute('''UPDATE players 
-                     SET mmr=?, wins=?, losses=?, total_games=?, win_streak=?, 
-                         highest_mmr=?, last_played=?
-                     WHERE user_id=?''',
-                  (new_mmr, new_wins, new_losses, new_total, new_streak, 
-                   new_highest, datetime.now().isoformat(), user_id))
-    
-    conn.commit()
-    conn.close()
-
-def create_balanced_teams(queue: List, guild_id: int, queue_name: str, team_size: int) -> Tuple[List, List]:
-    """Create balanced teams based on MMR"""
-    players_with_mmr = []
-    for player_id in queue:
-        stats = get_queue_player_stats(player_id, guild_id, queue_name)
-        players_with_mmr.append((player_id, stats['mmr']))
-    
-    # Sort by MMR descending
-    players_with_mmr.sort(key=lambda x: x[1], reverse=True)
-    
-    team1, team2 = [], []
-    team1_mmr, team2_mmr = 0, 0
-    
-    # Distribute players to balance MMR
-    for player_id, mmr in players_with_mmr:
-        if team1_mmr <= team2_mmr:
-            team1.append(player_id)
-            team1_mmr += mmr
+    c.execute('''INSERT INTO matches 
+                 (guild_id, queue_name, timestamp, team1, team2, match_number, lobby_details)
+                 VALUES (?, ?, ?, ?, ?, ?, ?)''',
+              (guild_id, queue_name, timestamp, json.dumps(team1), json.dumps(team2), match_number, lobby_details))
+    match_id = c.lastrowid
+    c.executemany('INSERT OR IGNORE INTO match_participants VALUES (?, ?, ?, ?, ?, ?)',
+                  _participant_rows(match_id, guild_id, queue_name, team1, team2))
+    return match_id
+
+async def create_match_record(guild_id: int, queue_name: str, timestamp: str, team1: List, team2: List,
+                              match_number: int, lobby_details: Optional[str] = None) -> int:
+    """Save a new match and its participants, returning the match id"""
+    return await db.transaction(_insert_match, guild_id, queue_name, timestamp, team1, team2,
+                                match_number, lobby_details)
+
+def _update_participant_results(conn, match_id: int, winner: Optional[int]):
+    """Sync match_participants.result with the match winner (None clears it)"""
+    conn.execute('''UPDATE match_participants
+                    SET result = CASE WHEN ? IS NULL THEN NULL WHEN team = ? THEN 'win' ELSE 'loss' END
+                    WHERE match_id=?''',
+                 (winner if winner in (1, 2) else None, winner, match_id))
+
+def _set_match_result(conn, match_id: int, winner: Optional[int], columns: Dict):
+    assignments = ", ".join(f"{col}=?" for col in ('winner', *columns))
+    conn.execute(f'UPDATE matches SET {assignments} WHERE match_id=?',
+                 (winner, *columns.values(), match_id))
+    _update_participant_results(conn, match_id, winner)
+
+def _settle_match(conn, match_id: int, guild_id: int, queue_name: str, winner: int,
+                  winners: List[int], losers: List[int], mmr_change: int, columns: Dict) -> Optional[Dict[int, int]]:
+    """Apply a finished match to every participant in one transaction - runs on the writer thread"""
+    c = conn.cursor()
+    c.execute('SELECT winner, cancelled FROM matches WHERE match_id=?', (match_id,))
+    row = c.fetchone()
+    if row and (row[0] is not None or row[1]):
+        return None  # already settled or cancelled
+    now = datetime.now().isoformat()
+    everyone = winners + losers
+    # Players who never got a queue_stats row still have this match counted
+    c.executemany('INSERT OR IGNORE INTO queue_stats (user_id, guild_id, queue_name, mmr) VALUES (?, ?, ?, 1000)',
+                  [(user_id, guild_id, queue_name) for user_id in everyone])
+    
+    for team, delta, won in ((winners, mmr_change, 1), (losers, -mmr_change, 0)):
+        if not team:
+            continue
+        placeholders = ", ".join("?" * len(team))
+        c.execute(f'''UPDATE queue_stats 
+                      SET mmr=MAX(0, mmr + ?), wins=wins + ?, losses=losses + ?, 
+                          games_played=games_played + 1, last_played=?
+                      WHERE guild_id=? AND queue_name=? AND user_id IN ({placeholders})''',
+                  (delta, won, 1 - won, now, guild_id, queue_name, *team))
+        c.execute(f'''UPDATE players 
+                      SET mmr=MAX(0, mmr + ?), wins=wins + ?, losses=losses + ?, total_games=total_games + 1, 
+                          win_streak=CASE WHEN ? THEN win_streak + 1 ELSE 0 END, 
+                          highest_mmr=MAX(highest_mmr, MAX(0, mmr + ?)), last_played=?
+                      WHERE user_id IN ({placeholders})''',
+                  (delta, won, 1 - won, won, delta, now, *team))
+    
+    _set_match_result(conn, match_id, winner, {**columns, 'mmr_change': mmr_change})
+    
+    placeholders = ", ".join("?" * len(everyone))
+    c.execute(f'SELECT user_id, mmr FROM queue_stats WHERE guild_id=? AND queue_name=? AND user_id IN ({placeholders})',
+              (guild_id, queue_name, *everyone))
+    return dict(c.fetchall())
+
+async def settle_match(match_id: int, guild_id: int, queue_name: str, winner: int, team1: List[int], team2: List[int],
+                       mmr_change: int, **columns) -> Optional[Dict[int, int]]:
+    """Record the winner (and any extra match columns), apply every player's stats and
+    return their new queue MMR by user id, or None if the match is no longer open"""
+    winners, losers = (team1, team2) if winner == 1 else (team2, team1)
+    return await db.transaction(_settle_match, match_id, guild_id, queue_name, winner,
+                                list(winners), list(losers), mmr_change, columns)
+
+class TeamBalancer:
+    """Splits a lobby into two equal-size teams with the smallest possible MMR-sum difference.
+
+    Lobbies up to BALANCE_EXACT_MAX_PLAYERS are solved exactly with a meet-in-the-middle search;
+    bigger ones use balanced Karmarkar-Karp followed by swap-based local search. Both stop at
+    `budget_ms` and return the best split found so far."""
+
+    def __init__(self, exact_max_players: int = BALANCE_EXACT_MAX_PLAYERS, budget_ms: float = BALANCE_TIME_BUDGET_MS):
+        self.exact_max_players = exact_max_players
+        self.budget_ms = budget_ms
+        self._runs = 0
+        self._exact_runs = 0
+        self._heuristic_runs = 0
+        self._budget_hits = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+        self._total_diff = 0
+
+    def split(self, ratings: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+        """ratings: [(player_id, mmr), ...] -> (team1 ids, team2 ids)"""
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000
+        if len(ratings) <= self.exact_max_players:
+            mask, timed_out = self._exact(ratings, deadline)
+            self._exact_runs += 1
         else:
-            team2.append(player_id)
-            team2_mmr += mmr
-    
-    return team1, team2
+            mask, timed_out = self._heuristic(ratings, deadline)
+            self._heuristic_runs += 1
+        team1 = [pid for i, (pid, _) in enumerate(ratings) if mask >> i & 1]
+        team2 = [pid for i, (pid, _) in enumerate(ratings) if not mask >> i & 1]
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self._runs += 1
+        self._budget_hits += timed_out
+        self._total_ms += elapsed
+        self._max_ms = max(self._max_ms, elapsed)
+        total = sum(mmr for _, mmr in ratings)
+        team1_sum = sum(mmr for i, (_, mmr) in enumerate(ratings) if mask >> i & 1)
+        self._total_diff += abs(total - 2 * team1_sum)
+        return team1, team2
+
+    @staticmethod
+    def _subset_sums(values: List[int], offset: int) -> List[Tuple[int, int, int]]:
+        """Every subset of `values` as (size, sum, mask) with bits shifted by `offset`"""
+        subsets = [(0, 0, 0)]
+        for i, value in enumerate(values):
+            bit = 1 << (i + offset)
+            subsets += [(size + 1, total + value, mask | bit) for size, total, mask in subsets]
+        return subsets
+
+    def _exact(self, ratings: List[Tuple[int, int]], deadline: float) -> Tuple[int, bool]:
+        """Meet-in-the-middle: best team1 of size n//2 from left-half x right-half subset pairs"""
+        values = [mmr for _, mmr in ratings]
+        n = len(values)
+        k = n // 2
+        total = sum(values)
+        half = n // 2
+        left = self._subset_sums(values[:half], 0)
+        # Right-half subsets grouped by size and sorted by sum, for bisecting
+        right_by_size = {}
+        for size, subtotal, mask in self._subset_sums(values[half:], half):
+            right_by_size.setdefault(size, []).append((subtotal, mask))
+        for group in right_by_size.values():
+            group.sort()
+        right_sums = {size: [subtotal for subtotal, _ in group] for size, group in right_by_size.items()}
+
+        # With even teams, fixing player 0 on team 1 skips every mirrored split
+        mirrored = n > 1 and n % 2 == 0
+        best_mask, best_diff = None, None
+        for i, (size, subtotal, mask) in enumerate(left):
+            if mirrored and not mask & 1:
+                continue
+            if i % 256 == 0 and best_mask is not None and time.perf_counter() > deadline:
+                return best_mask, True
+            need = k - size
+            if need not in right_by_size:
+                continue
+            group, sums = right_by_size[need], right_sums[need]
+            # Want subtotal + right sum as close to total / 2 as possible
+            pos = bisect.bisect_left(sums, (total - 2 * subtotal) / 2)
+            for j in (pos - 1, pos):
+                if 0 <= j < len(group):
+                    diff = abs(total - 2 * (subtotal + group[j][0]))
+                    if best_diff is None or diff < best_diff:
+                        best_mask, best_diff = mask | group[j][1], diff
+                        if diff <= total % 2:
+                            return best_mask, False
+        return best_mask, False
+
+    def _heuristic(self, ratings: List[Tuple[int, int]], deadline: float) -> Tuple[int, bool]:
+        """Balanced Karmarkar-Karp on sorted pairs, then improving swaps until the deadline"""
+        values = [mmr for _, mmr in ratings]
+        order = sorted(range(len(values)), key=lambda i: values[i], reverse=True)
+        # Pair neighbours so every merge keeps both sides the same size; an odd player rides alone
+        heap = []
+        for p in range(0, len(order), 2):
+            pair = order[p:p + 2]
+            if len(pair) == 2:
+                a, b = pair
+                heapq.heappush(heap, (-(values[a] - values[b]), p, 1 << a, 1 << b))
+            else:
+                heapq.heappush(heap, (-values[pair[0]], p, 1 << pair[0], 0))
+        while len(heap) > 1:
+            diff_a, tie, big_a, small_a = heapq.heappop(heap)
+            diff_b, _, big_b, small_b = heapq.heappop(heap)
+            # Put the two differences on opposite sides
+            heapq.heappush(heap, (diff_a - diff_b, tie, big_a | small_b, small_a | big_b))
+        _, _, mask, _ = heap[0]
+
+        team1 = [i for i in range(len(values)) if mask >> i & 1]
+        team2 = [i for i in range(len(values)) if not mask >> i & 1]
+        diff = sum(values[i] for i in team1) - sum(values[i] for i in team2)
+        improved = True
+        while improved and diff:
+            improved = False
+            if time.perf_counter() > deadline:
+                return self._to_mask(team1), True
+            for a_pos, a in enumerate(team1):
+                for b_pos, b in enumerate(team2):
+                    new_diff = diff - 2 * (values[a] - values[b])
+                    if abs(new_diff) < abs(diff):
+                        team1[a_pos], team2[b_pos] = b, a
+                        diff = new_diff
+                        improved = True
+                        break
+                if improved:
+                    break
+        return self._to_mask(team1), False
+
+    @staticmethod
+    def _to_mask(indices: List[int]) -> int:
+        mask = 0
+        for i in indices:
+            mask |= 1 << i
+        return mask
+
+    def stats(self) -> Dict:
+        runs = self._runs or 1
+        return {
+            'runs': self._runs,
+            'exact': self._exact_runs,
+            'heuristic': self._heuristic_runs,
+            'budget_hits': self._budget_hits,
+            'avg_ms': self._total_ms / runs,
+            'max_ms': self._max_ms,
+            'avg_diff': self._total_diff / runs,
+        }
+
+team_balancer = TeamBalancer()
+
+async def get_queue_mmrs(user_ids: List[int], guild_id: int, queue_name: str) -> Dict[int, int]:
+    """Queue MMR for several players in one query, creating default rows for newcomers"""
+    if not user_ids:
+        return {}
+    placeholders = ", ".join("?" * len(user_ids))
+    rows = await db.fetchall(f'SELECT user_id, mmr FROM queue_stats WHERE guild_id=? AND queue_name=? AND user_id IN ({placeholders})',
+                             (guild_id, queue_name, *user_ids))
+    mmrs = dict(rows)
+    missing = [uid for uid in user_ids if uid not in mmrs]
+    if missing:
+        def _create_missing(conn):
+            return {uid: _create_queue_player_stats(conn, uid, guild_id, queue_name)[3] for uid in missing}
+        mmrs.update(await db.transaction(_create_missing))
+    return mmrs
+
+async def create_balanced_teams(queue: List, guild_id: int, queue_name: str, team_size: int) -> Tuple[List, List]:
+    """Create balanced teams based on MMR"""
+    mmrs = await get_queue_mmrs(queue, guild_id, queue_name)
+    return team_balancer.split([(player_id, mmrs[player_id]) for player_id in queue])
+
+def build_queue_embed(guild: discord.Guild, queue_name: str, queue: List[int], team_size: int,
+                      left_player: Optional[discord.Member] = None) -> discord.Embed:
+    """NeatQueue-style queue embed shared by /startqueue, queue refreshes and sticky reposts"""
+    # Show the actual queue name exactly as it was entered
+    queue_display_name = queue_name if queue_name != "default" else "Queue"
+    
+    embed = discord.Embed(
+        title=queue_display_name,
+        color=0xed4245  # Discord red color for left border
+    )
+    
+    # Build description - shorter box with less padding
+    description_parts = []
+    
+    # If someone just left, show that message at the top
+    if left_player:
+        description_parts.append(f"**Player Left Queue!**")
+        description_parts.append(f"{left_player.mention}")
+        description_parts.append("")  # Empty line for spacing
+    
+    # Add queue count
+    description_parts.append(f"**Queue {len(queue)}/{team_size*2}**")
+    description_parts.append("")  # Empty line for spacing
+    
+    # Show players in queue with mentions
+    if queue:
+        for user_id in queue:
+            member = guild.get_member(user_id)
+            if member:
+                description_parts.append(f"{member.mention}")
+    else:
+        description_parts.append("*No players in queue*")
+    
+    # Add moderate padding to keep box visible but shorter (3-5 lines instead of 10)
+    padding_lines = max(0, 5 - len(queue))
+    for _ in range(padding_lines):
+        description_parts.append("")
+    
+    # Add timestamp at bottom - Discord format automatically adjusts to user's timezone
+    timestamp = f"<t:{int(datetime.now().timestamp())}:t>"  # Shows time in user's local timezone
+    description_parts.append(timestamp)
+    
+    embed.description = "\n".join(description_parts)
+    return embed
 
 def create_random_teams(queue: List, team_size: int) -> Tuple[List, List]:
     """Create random teams"""
@@ -943,16 +2465,12 @@ def format_lobby_details(template: str, queue: List, guild: discord.Guild, queue
     
     return result
 
-def check_role_limits(guild: discord.Guild, queue: List, queue_name: str) -> Tuple[bool, str]:
+async def check_role_limits(guild: discord.Guild, queue: List, queue_name: str) -> Tuple[bool, str]:
     """Check if queue violates role limits"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT role_id, max_count FROM role_limits WHERE guild_id=? AND queue_name=?',
-              (guild.id, queue_name))
-    limits = c.fetchall()
-    conn.close()
+    access = await permission_cache.get(guild.id)
+    limits = access.role_limits.get(queue_name, {})
     
-    for role_id, max_count in limits:
+    for role_id, max_count in limits.items():
         role = guild.get_role(role_id)
         if not role:
             continue
@@ -963,22 +2481,18 @@ def check_role_limits(guild: discord.Guild, queue: List, queue_name: str) -> Tup
     
     return True, ""
 
-def get_maps_for_queue(guild_id: int, queue_name: str) -> List[str]:
+async def get_maps_for_queue(guild_id: int, queue_name: str) -> List[str]:
     """Get all maps for a queue"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT map_name FROM maps WHERE guild_id=? AND queue_name=?',
-              (guild_id, queue_name))
-    maps = [row[0] for row in c.fetchall()]
-    conn.close()
-    return maps
+    rows = await db.fetchall('SELECT map_name FROM maps WHERE guild_id=? AND queue_name=?',
+                             (guild_id, queue_name))
+    return [row[0] for row in rows]
 
 
-def get_match_game_mode(guild_id: int, queue_name: str, match_number: int) -> str:
+async def get_match_game_mode(guild_id: int, queue_name: str, match_number: int) -> str:
     """Get the game mode for a specific match based on queue settings.
     For MIX mode, rotates through HP → SND → Overload based on match number.
     Returns the game mode string (e.g. 'HP', 'SND', 'Overload')."""
-    settings = get_queue_settings(guild_id, queue_name)
+    settings = await get_queue_settings(guild_id, queue_name)
     game_mode = settings.get('game_mode', 'mix')
     
     if game_mode == 'hp':
@@ -996,13 +2510,13 @@ def get_game_mode_emoji(mode: str) -> str:
     return emojis.get(mode, '🎮')
 
 
-def select_bo3_maps(guild_id: int, queue_name: str) -> List[Dict]:
+async def select_bo3_maps(guild_id: int, queue_name: str) -> List[Dict]:
     """Select 3 random maps for a Best of 3 series with game modes assigned.
     Returns list of dicts: [{'map': 'Scar', 'mode': 'HP', 'emoji': '🔥'}, ...]
     """
-    settings = get_queue_settings(guild_id, queue_name)
+    settings = await get_queue_settings(guild_id, queue_name)
     game_mode = settings.get('game_mode', 'mix')
-    available_maps = get_maps_for_queue(guild_id, queue_name)
+    available_maps = await get_maps_for_queue(guild_id, queue_name)
     
     if not available_maps:
         available_maps = ["TBD"]
@@ -1052,32 +2566,657 @@ def format_bo3_maps(bo3_maps: List[Dict], scores: List[int] = None) -> str:
     
     return "\n".join(lines)
 
-def apply_mmr_ranks(guild: discord.Guild, user_id: int, queue_name: str, mmr: int):
-    """Apply rank roles based on MMR"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT rank_name, min_mmr, max_mmr, role_id FROM ranks WHERE guild_id=? AND queue_name=?',
-              (guild.id, queue_name))
-    ranks = c.fetchall()
-    conn.close()
-    
-    member = guild.get_member(user_id)
-    if not member:
-        return
-    
-    for rank_name, min_mmr, max_mmr, role_id in ranks:
-        role = guild.get_role(role_id)
-        if not role:
-            continue
+async def get_rank_table(guild_id: int, queue_name: str) -> List[tuple]:
+    """Rank definitions (rank_name, min_mmr, max_mmr, role_id) for a queue, cached"""
+    key = (guild_id, queue_name)
+    ranks = rank_table_cache.get(key)
+    if ranks is _MISSING:
+        ranks = await db.fetchall('SELECT rank_name, min_mmr, max_mmr, role_id FROM ranks WHERE guild_id=? AND queue_name=?',
+                                  key)
+        rank_table_cache.set(key, ranks)
+    return ranks
+
+
+class RankReconciler:
+    """Keeps members' rank roles in line with their MMR.
+
+    Updates are queued per guild and drained by one worker per guild, which applies each
+    member's full target role set with a single member.edit(roles=...) and waits
+    `edit_interval` seconds between edits. A member queued again before the worker reaches
+    them is merged into the pending entry instead of producing a second edit."""
+
+    def __init__(self, edit_interval: float = RANK_ROLE_EDIT_INTERVAL):
+        self.edit_interval = edit_interval
+        self._pending: Dict[int, OrderedDict] = {}  # guild_id -> {user_id: {queue_name: mmr}}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self.queued = 0
+        self.coalesced = 0
+        self.edits = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    def submit(self, guild: discord.Guild, user_id: int, queue_name: str, mmr: int):
+        pending = self._pending.setdefault(guild.id, OrderedDict())
+        if user_id in pending:
+            self.coalesced += 1
+        pending.setdefault(user_id, {})[queue_name] = mmr
+        self.queued += 1
+        worker = self._workers.get(guild.id)
+        if worker is None or worker.done():
+            self._workers[guild.id] = asyncio.create_task(self._drain(guild))
+
+    async def _drain(self, guild: discord.Guild):
+        pending = self._pending[guild.id]
+        while pending:
+            user_id, queue_mmrs = pending.popitem(last=False)
+            try:
+                edited = await self._reconcile(guild, user_id, queue_mmrs)
+            except discord.HTTPException as e:
+                self.failed += 1
+                logger.error(f"Failed to update rank roles for {user_id} in {guild.id}: {e}")
+                edited = True
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error reconciling rank roles for {user_id} in {guild.id}: {e}", exc_info=True)
+                edited = False
+            if edited and pending:
+                await asyncio.sleep(self.edit_interval)
+        self._pending.pop(guild.id, None)
+        self._workers.pop(guild.id, None)
+
+    async def _reconcile(self, guild: discord.Guild, user_id: int, queue_mmrs: Dict[str, int]) -> bool:
+        """Apply the target role set for one member; returns True if an API call was made"""
+        managed, wanted = set(), set()
+        for queue_name, mmr in queue_mmrs.items():
+            for rank_name, min_mmr, max_mmr, role_id in await get_rank_table(guild.id, queue_name):
+                managed.add(role_id)
+                if min_mmr <= mmr <= max_mmr:
+                    wanted.add(role_id)
+        
+        # Resolve the member after the awaits so the role list is as fresh as possible
+        member = guild.get_member(user_id)
+        if not member or not managed:
+            return False
+        current = {role.id for role in member.roles if not role.is_default()}
+        target = (current - managed) | {role_id for role_id in wanted if guild.get_role(role_id)}
+        if target == current:
+            self.unchanged += 1
+            return False
+        
+        roles = [role for role in (guild.get_role(role_id) for role_id in target) if role]
+        await member.edit(roles=roles, reason="MMR rank update")
+        self.edits += 1
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            'pending': sum(len(pending) for pending in self._pending.values()),
+            'guilds': len(self._workers),
+            'queued': self.queued,
+            'coalesced': self.coalesced,
+            'edits': self.edits,
+            'unchanged': self.unchanged,
+            'failed': self.failed,
+        }
+
+rank_reconciler = RankReconciler()
+
+async def apply_mmr_ranks(guild: discord.Guild, user_id: int, queue_name: str, mmr: int):
+    """Queue a rank role update for a player's new MMR"""
+    rank_reconciler.submit(guild, user_id, queue_name, mmr)
+
+class MatchChannels(NamedTuple):
+    text: discord.TextChannel
+    voice1: discord.VoiceChannel
+    voice2: discord.VoiceChannel
+
+
+class ChannelProvisioner:
+    """Creates and tears down per-match channels.
+
+    Each channel is created with its complete permission overwrites in a single request and
+    the three channels are created concurrently, so provisioning costs about one round trip
+    instead of one call per channel per player. Timings are kept for /perfstats."""
+
+    def __init__(self):
+        self.provisioned = 0
+        self.failed = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    @staticmethod
+    def _overwrites(guild: discord.Guild, members: List[discord.Member], **allow) -> Dict:
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            guild.me: discord.PermissionOverwrite(view_channel=True, **allow),
+        }
+        for member in members:
+            overwrites[member] = discord.PermissionOverwrite(view_channel=True, **allow)
+        return overwrites
+
+    async def provision(self, guild: discord.Guild, category: Optional[discord.CategoryChannel], match_number: int,
+                        queue_name: str, team1: List[int], team2: List[int],
+                        team1_name: str, team2_name: str) -> MatchChannels:
+        """Create the private text channel and both team voice channels for a match"""
+        start = time.perf_counter()
+        team1_members = [m for m in (guild.get_member(uid) for uid in team1) if m]
+        team2_members = [m for m in (guild.get_member(uid) for uid in team2) if m]
+        
+        results = await asyncio.gather(
+            guild.create_text_channel(
+                f"queue-{match_number}-{queue_name}",
+                category=category,
+                topic=f"Match #{match_number} | {team1_name} vs {team2_name}",
+                overwrites=self._overwrites(guild, team1_members + team2_members, send_messages=True)
+            ),
+            guild.create_voice_channel(
+                f"Queue {match_number} | {team1_name}",
+                category=category,
+                overwrites=self._overwrites(guild, team1_members, connect=True)
+            ),
+            guild.create_voice_channel(
+                f"Queue {match_number} | {team2_name}",
+                category=category,
+                overwrites=self._overwrites(guild, team2_members, connect=True)
+            ),
+            return_exceptions=True
+        )
         
-        if min_mmr <= mmr <= max_mmr:
-            # User should have this rank
-            if role not in member.roles:
-                asyncio.create_task(member.add_roles(role))
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            # Don't leave half a match's channels behind
+            self.failed += 1
+            await self.teardown(guild, [r for r in results if not isinstance(r, BaseException)])
+            raise errors[0]
+        
+        elapsed = (time.perf_counter() - start) * 1000
+        self.provisioned += 1
+        self.total_ms += elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        self.last_ms = elapsed
+        logger.info(f"Provisioned Queue #{match_number} channels in {elapsed:.0f}ms")
+        return MatchChannels(*results)
+
+    async def teardown(self, guild: discord.Guild, channels: List):
+        """Delete match channels (objects or ids) concurrently; failures are logged and skipped"""
+        channels = [ch for ch in (guild.get_channel(ch) if isinstance(ch, int) else ch for ch in channels) if ch]
+        results = await asyncio.gather(*(ch.delete() for ch in channels), return_exceptions=True)
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error deleting channel {channel.id}: {result}")
+
+    def stats(self) -> Dict:
+        return {
+            'provisioned': self.provisioned,
+            'failed': self.failed,
+            'avg_ms': self.total_ms / self.provisioned if self.provisioned else 0.0,
+            'max_ms': self.max_ms,
+            'last_ms': self.last_ms,
+        }
+
+channel_provisioner = ChannelProvisioner()
+
+class VoiceMover:
+    """Moves players into team voice channels concurrently.
+
+    At most `concurrency` moves are in flight at once - member moves share one per-guild
+    rate-limit bucket, and discord.py already waits out 429s inside each request. Moves that
+    fail with a server error or timeout are retried with backoff. Returns an outcome per player."""
+
+    TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, concurrency: int = VOICE_MOVE_CONCURRENCY, retries: int = VOICE_MOVE_RETRIES):
+        self.concurrency = concurrency
+        self.retries = retries
+        self.outcomes = {}
+        self.retried = 0
+        self.batches = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    async def move(self, guild: discord.Guild, assignments: Dict[int, discord.VoiceChannel]) -> Dict[int, str]:
+        """assignments: {user_id: channel} -> {user_id: 'moved' | 'already_there' | 'not_in_voice' | 'missing' | 'forbidden' | 'failed'}"""
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        user_ids = list(assignments)
+        results = await asyncio.gather(*(self._move_one(guild, uid, assignments[uid], semaphore) for uid in user_ids))
+        outcomes = dict(zip(user_ids, results))
+        
+        elapsed = (time.perf_counter() - start) * 1000
+        self.batches += 1
+        self.total_ms += elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        for outcome in results:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        return outcomes
+
+    async def _move_one(self, guild: discord.Guild, user_id: int, channel: discord.VoiceChannel,
+                        semaphore: asyncio.Semaphore) -> str:
+        member = guild.get_member(user_id)
+        if not member:
+            return 'missing'
+        for attempt in range(self.retries + 1):
+            if not member.voice or not member.voice.channel:
+                return 'not_in_voice'
+            if member.voice.channel.id == channel.id:
+                return 'already_there'
+            try:
+                async with semaphore:
+                    await member.move_to(channel)
+                return 'moved'
+            except discord.Forbidden:
+                return 'forbidden'
+            except discord.HTTPException as e:
+                if e.status not in self.TRANSIENT_STATUS or attempt == self.retries:
+                    logger.warning(f"Could not move {user_id} to {channel.id}: {e}")
+                    return 'failed'
+            except asyncio.TimeoutError:
+                if attempt == self.retries:
+                    return 'failed'
+            except Exception as e:
+                logger.error(f"Error moving {user_id} to {channel.id}: {e}")
+                return 'failed'
+            self.retried += 1
+            await asyncio.sleep(0.5 * 2 ** attempt)
+        return 'failed'
+
+    @staticmethod
+    def summarize(outcomes: Dict[int, str]) -> str:
+        counts = {}
+        for outcome in outcomes.values():
+            counts[outcome] = counts.get(outcome, 0) + 1
+        return ", ".join(f"{count} {outcome.replace('_', ' ')}" for outcome, count in sorted(counts.items())) or "nobody to move"
+
+    def stats(self) -> Dict:
+        return {
+            'batches': self.batches,
+            'outcomes': dict(self.outcomes),
+            'retried': self.retried,
+            'avg_ms': self.total_ms / self.batches if self.batches else 0.0,
+            'max_ms': self.max_ms,
+        }
+
+voice_mover = VoiceMover()
+
+class RenderScheduler:
+    """Coalesces embed refreshes (queue displays, vote tallies) into as few message edits as possible.
+
+    The first request for an idle target renders straight away. Requests that arrive while
+    a render is running, or within `window` seconds after it, collapse into one trailing
+    render that reads the latest state. One task per target means two edits for the same
+    message are never in flight at once."""
+
+    def __init__(self, window: float = QUEUE_RENDER_DEBOUNCE_SECONDS):
+        self.window = window
+        self._tasks: Dict[object, asyncio.Task] = {}
+        self._latest: Dict[object, Callable] = {}
+        self.requests = 0
+        self.renders = 0
+
+    def request(self, target, render):
+        """Schedule `render()` (a coroutine function) for `target`; newer requests replace older ones"""
+        self.requests += 1
+        self._latest[target] = render
+        task = self._tasks.get(target)
+        if task is None or task.done():
+            self._tasks[target] = asyncio.create_task(self._run(target))
+
+    async def _run(self, target):
+        try:
+            while target in self._latest:
+                render = self._latest.pop(target)
+                self.renders += 1
+                try:
+                    await render()
+                except Exception as e:
+                    logger.error(f"Error rendering display: {e}")
+                await asyncio.sleep(self.window)
+        finally:
+            self._tasks.pop(target, None)
+
+    def stats(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'renders': self.renders,
+            'saved': self.requests - self.renders - len(self._latest),
+            'active': len(self._tasks),
+        }
+
+queue_renderer = RenderScheduler()
+vote_renderer = RenderScheduler(VOTE_RENDER_DEBOUNCE_SECONDS)
+
+class StickyManager:
+    """Keeps sticky queue messages at the bottom of their channel without a repost per message.
+
+    A repost only happens once at least `skip_last_n` other messages have landed below the
+    sticky, and at most once per `min_interval` seconds per channel. Messages arriving inside
+    the interval collapse into one trailing repost. Tracked channels live in
+    sticky_queue_messages."""
+
+    def __init__(self, entries: Dict, min_interval: float = STICKY_MIN_REPOST_SECONDS, skip_last_n: int = STICKY_SKIP_LAST_N):
+        self.entries = entries
+        self.min_interval = min_interval
+        self.skip_last_n = skip_last_n
+        self.reposts = 0
+        self.edits = 0
+        self.skipped = 0
+        self.coalesced = 0
+
+    def register(self, channel_id: int, message: discord.Message, view: discord.ui.View, queue_name: str, guild_id: int):
+        self.unregister(channel_id)
+        self.entries[channel_id] = {
+            'message': message,
+            'view': view,
+            'queue_name': queue_name,
+            'guild_id': guild_id,
+            'since': 0,  # messages posted below the sticky
+            'last_repost': 0.0,
+            'task': None,
+            'reposting': False
+        }
+        self._journal(channel_id)
+    
+    def _journal(self, channel_id: int):
+        entry = self.entries[channel_id]
+        state_journal.put(state_key('sticky', channel_id), {
+            'guild_id': entry['guild_id'],
+            'queue_name': entry['queue_name'],
+            'message_id': entry['message'].id
+        })
+
+    def unregister(self, channel_id: int):
+        entry = self.entries.pop(channel_id, None)
+        if entry is None:
+            return
+        state_journal.delete(state_key('sticky', channel_id))
+        if entry.get('task') and not entry['task'].done():
+            entry['task'].cancel()
+
+    def note_message(self, message: discord.Message):
+        """Count a new channel message and repost the sticky if it has been buried"""
+        entry = self.entries.get(message.channel.id)
+        if not entry or message.id == entry['message'].id:
+            return
+        if entry['reposting'] and message.author.id == bot.user.id:
+            return
+        entry['since'] += 1
+        if entry['since'] < self.skip_last_n:
+            self.skipped += 1
+            return
+        self._schedule(message.channel, entry)
+
+    def _schedule(self, channel, entry: Dict):
+        if entry['task'] and not entry['task'].done():
+            self.coalesced += 1
+            return
+        delay = max(0.0, entry['last_repost'] + self.min_interval - time.monotonic())
+        entry['task'] = asyncio.create_task(self._repost_later(channel, entry, delay))
+
+    async def _repost_later(self, channel, entry: Dict, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        if self.entries.get(channel.id) is entry:
+            await self._repost(channel, entry)
+
+    async def refresh(self, channel, embed: discord.Embed):
+        """Show a new queue state: edit in place while the sticky is still near the bottom"""
+        entry = self.entries.get(channel.id)
+        if not entry:
+            return
+        if entry['since'] < self.skip_last_n:
+            await entry['message'].edit(embed=embed, view=entry['view'])
+            self.edits += 1
         else:
-            # User should not have this rank
-            if role in member.roles:
-                asyncio.create_task(member.remove_roles(role))
+            entry['embed'] = embed
+            self._schedule(channel, entry)
+
+    async def _repost(self, channel, entry: Dict):
+        try:
+            embed = entry.pop('embed', None)
+            if embed is None:
+                queue = get_queue(entry['guild_id'], entry['queue_name'])
+                settings = await get_queue_settings(entry['guild_id'], entry['queue_name'])
+                embed = build_queue_embed(channel.guild, entry['queue_name'], queue, settings['team_size'])
+            
+            entry['reposting'] = True
+            try:
+                new_message = await channel.send(embed=embed, view=entry['view'])
+            finally:
+                entry['reposting'] = False
+            old_message, entry['message'] = entry['message'], new_message
+            entry['view'].message = new_message
+            entry['since'] = 0
+            entry['last_repost'] = time.monotonic()
+            self.reposts += 1
+            if self.entries.get(channel.id) is entry:
+                self._journal(channel.id)
+            
+            try:
+                await old_message.delete()
+            except discord.HTTPException:
+                pass  # Message might already be deleted
+        except Exception as e:
+            logger.error(f"Error reposting sticky queue in {channel.id}: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            'channels': len(self.entries),
+            'reposts': self.reposts,
+            'edits': self.edits,
+            'skipped': self.skipped,
+            'coalesced': self.coalesced,
+        }
+
+sticky_manager = StickyManager(sticky_queue_messages)
+
+class MatchSeries:
+    """Best-of-3 vote state of one match: a cached match_vote_state row plus its ballots"""
+
+    __slots__ = ('match_id', 'guild_id', 'queue_name', 'team1', 'team2', 'team1_name', 'team2_name',
+                 'required_votes', 'bo3_maps', 'current_game', 'series_score', 'game_results',
+                 'ballots', 'players', 'channel_id', 'message_id', 'lock',
+                 'game_labels', 'field_names', '_description', 'settling')
+
+    def __init__(self, match_id: int, guild_id: int, queue_name: str, team1: List[int], team2: List[int],
+                 required_votes: int, team1_name: str = "Team 1", team2_name: str = "Team 2",
+                 bo3_maps: List[Dict] = None):
+        self.match_id = match_id
+        self.guild_id = guild_id
+        self.queue_name = queue_name
+        self.team1 = team1
+        self.team2 = team2
+        self.team1_name = team1_name
+        self.team2_name = team2_name
+        self.required_votes = required_votes
+        self.bo3_maps = bo3_maps or []
+        self.current_game = 1  # 1, 2, or 3
+        self.series_score = [0, 0]  # [team1_wins, team2_wins]
+        self.game_results = []  # winning team per finished game
+        self.ballots: Dict[int, int] = {}  # user_id -> team voted for in the current game
+        self.players = set(team1) | set(team2)
+        self.channel_id = None
+        self.message_id = None
+        self.lock = asyncio.Lock()
+        
+        # Embed fragments that never change during the series
+        self.game_labels = [f"{g.get('emoji', '🎮')} {g.get('mode', '?')} — {g.get('map', '?')}" for g in self.bo3_maps]
+        self.field_names = (f"🔵 {team1_name}", f"🔴 {team2_name}")
+        self._description = None  # (games decided, text)
+        self.settling = False  # finalize_series is recording the result
+
+    def tally(self) -> Tuple[int, int]:
+        team1_votes = sum(1 for team in self.ballots.values() if team == 1)
+        return team1_votes, len(self.ballots) - team1_votes
+
+    def team_name(self, team: int) -> str:
+        return self.team1_name if team == 1 else self.team2_name
+
+    def current_map(self) -> Dict:
+        return self.bo3_maps[self.current_game - 1] if self.current_game <= len(self.bo3_maps) else {}
+
+    def is_over(self) -> bool:
+        return max(self.series_score) >= 2
+
+    def game_label(self, index: int) -> str:
+        return self.game_labels[index] if index < len(self.game_labels) else "🎮 ? — ?"
+
+    def vote_description(self) -> str:
+        """Description of the voting embed; it only changes when a game is decided, so it is
+        built once per game rather than on every vote"""
+        if self._description is None or self._description[0] != len(self.game_results):
+            lines = [f"**Series: {self.team1_name} {self.series_score[0]} - {self.series_score[1]} {self.team2_name}**", ""]
+            for i, result in enumerate(self.game_results):
+                lines.append(f"~~Game {i+1}: {self.game_label(i)}~~ → **{self.team_name(result)}** ✅")
+            if self.current_game <= len(self.game_labels):
+                lines.append(f"▶️ **Game {self.current_game}: {self.game_labels[self.current_game - 1]}**")
+            for i in range(self.current_game, min(3, len(self.game_labels))):
+                lines.append(f"Game {i+1}: {self.game_labels[i]}")
+            lines.append(f"\nVote for who won Game {self.current_game}!")
+            lines.append(f"**{self.required_votes} votes needed**")
+            self._description = (len(self.game_results), "\n".join(lines))
+        return self._description[1]
+
+
+class MatchVoteRegistry:
+    """Open best-of-3 votes by match_id, cached in memory and stored in match_vote_state /
+    match_vote_ballots.
+
+    Vote buttons carry their match_id in the custom_id (see MatchVoteButton), so a click is
+    routed with one dict lookup and no View object is kept alive per match. Every change is
+    queued on the writer thread without waiting; open votes are loaded back on startup."""
+
+    STATE_COLUMNS = ('match_id', 'guild_id', 'queue_name', 'team1', 'team2', 'team1_name', 'team2_name',
+                     'required_votes', 'bo3_maps', 'current_game', 'team1_wins', 'team2_wins', 'game_results',
+                     'channel_id', 'message_id')
+
+    def __init__(self, executor: DatabaseExecutor):
+        self.executor = executor
+        self._series: Dict[int, MatchSeries] = {}
+        self._closed = set()  # match_ids closed this run; their rows may not be deleted yet
+        self.opened = 0
+        self.votes = 0
+        self.games = 0
+        self.closed = 0
+        self.db_lookups = 0
+
+    def __len__(self):
+        return len(self._series)
+
+    def peek(self, match_id: int) -> Optional[MatchSeries]:
+        return self._series.get(match_id)
+
+    async def get(self, match_id: int) -> Optional[MatchSeries]:
+        """Open vote for a match; falls back to the database for votes not in the cache"""
+        series = self._series.get(match_id)
+        if series is None and match_id not in self._closed:
+            self.db_lookups += 1
+            loaded = (await self.executor.snapshot(self._load, match_id)).get(match_id)
+            # Closed while we were reading: the row is only waiting for its queued delete
+            if loaded is not None and match_id not in self._closed:
+                series = self._series.setdefault(match_id, loaded)
+        return series
+
+    async def load_open(self) -> int:
+        """Cache every vote that was still open when the bot stopped"""
+        loaded = await self.executor.snapshot(self._load)
+        for match_id, series in loaded.items():
+            if match_id not in self._closed:
+                self._series.setdefault(match_id, series)
+        return len(loaded)
+
+    def _load(self, conn, match_id: Optional[int] = None) -> Dict[int, MatchSeries]:
+        where, params = ('WHERE match_id = ?', (match_id,)) if match_id is not None else ('', ())
+        loaded = {}
+        for row in conn.execute(f'SELECT {", ".join(self.STATE_COLUMNS)} FROM match_vote_state {where}', params):
+            data = dict(zip(self.STATE_COLUMNS, row))
+            series = MatchSeries(data['match_id'], data['guild_id'], data['queue_name'],
+                                 json.loads(data['team1']), json.loads(data['team2']), data['required_votes'],
+                                 data['team1_name'], data['team2_name'], json.loads(data['bo3_maps'] or '[]'))
+            series.current_game = data['current_game']
+            series.series_score = [data['team1_wins'], data['team2_wins']]
+            series.game_results = json.loads(data['game_results'] or '[]')
+            series.channel_id = data['channel_id']
+            series.message_id = data['message_id']
+            loaded[series.match_id] = series
+        for ballot_match, user_id, team in conn.execute(
+                f'SELECT match_id, user_id, team FROM match_vote_ballots {where}', params):
+            if ballot_match in loaded:
+                loaded[ballot_match].ballots[user_id] = team
+        return loaded
+
+    def open(self, series: MatchSeries):
+        """Start tracking a new series (call before its vote message goes out)"""
+        self._series[series.match_id] = series
+        self._closed.discard(series.match_id)
+        self.opened += 1
+        self.executor.execute_nowait(
+            f'INSERT OR REPLACE INTO match_vote_state ({", ".join(self.STATE_COLUMNS)}, updated_at) '
+            f'VALUES ({", ".join("?" * (len(self.STATE_COLUMNS) + 1))})',
+            (series.match_id, series.guild_id, series.queue_name, json.dumps(series.team1), json.dumps(series.team2),
+             series.team1_name, series.team2_name, series.required_votes, json.dumps(series.bo3_maps),
+             series.current_game, series.series_score[0], series.series_score[1], json.dumps(series.game_results),
+             series.channel_id, series.message_id, datetime.now().isoformat())
+        )
+
+    def bind(self, series: MatchSeries, message: discord.Message):
+        """Remember which message shows this vote"""
+        series.channel_id = message.channel.id
+        series.message_id = message.id
+        self.executor.execute_nowait('UPDATE match_vote_state SET channel_id=?, message_id=? WHERE match_id=?',
+                                     (series.channel_id, series.message_id, series.match_id))
+
+    def record_ballot(self, series: MatchSeries, user_id: int, team: int):
+        """Set (or switch) a player's vote for the current game"""
+        series.ballots[user_id] = team
+        self.votes += 1
+        self.executor.execute_nowait(
+            'INSERT OR REPLACE INTO match_vote_ballots (match_id, user_id, team) VALUES (?, ?, ?)',
+            (series.match_id, user_id, team)
+        )
+
+    def record_game(self, series: MatchSeries, winner: int):
+        """Score a decided game, clear its ballots and move on to the next one unless the series is over"""
+        series.series_score[winner - 1] += 1
+        series.game_results.append(winner)
+        series.ballots.clear()
+        if not series.is_over():
+            series.current_game += 1
+        self.games += 1
+        self.executor.transaction_nowait(self._write_game, series.match_id, series.current_game,
+                                         list(series.series_score), json.dumps(series.game_results))
+
+    @staticmethod
+    def _write_game(conn, match_id: int, current_game: int, score: List[int], game_results: str):
+        conn.execute('''UPDATE match_vote_state SET current_game=?, team1_wins=?, team2_wins=?, game_results=?,
+                        updated_at=? WHERE match_id=?''',
+                     (current_game, score[0], score[1], game_results, datetime.now().isoformat(), match_id))
+        conn.execute('DELETE FROM match_vote_ballots WHERE match_id=?', (match_id,))
+
+    def close(self, match_id: int) -> Optional[MatchSeries]:
+        """Stop accepting votes for a match (series decided, result reported or match cancelled)"""
+        series = self._series.pop(match_id, None)
+        self._closed.add(match_id)
+        self.closed += 1
+        self.executor.transaction_nowait(self._delete, match_id)
+        return series
+
+    @staticmethod
+    def _delete(conn, match_id: int):
+        conn.execute('DELETE FROM match_vote_ballots WHERE match_id=?', (match_id,))
+        conn.execute('DELETE FROM match_vote_state WHERE match_id=?', (match_id,))
+
+    def stats(self) -> Dict:
+        return {
+            'open': len(self._series),
+            'opened': self.opened,
+            'votes': self.votes,
+            'games': self.games,
+            'closed': self.closed,
+            'db_lookups': self.db_lookups,
+        }
+
+match_votes = MatchVoteRegistry(db)
 
 # ============================================================================
 # MUSIC HELPER FUNCTIONS
@@ -1173,7 +3312,7 @@ class QueueView(discord.ui.View):
         """Handle player joining queue WITH AUTO-START"""
         try:
             queue = get_queue(interaction.guild.id, self.queue_name)
-            settings = get_queue_settings(interaction.guild.id, self.queue_name)
+            settings = await get_queue_settings(interaction.guild.id, self.queue_name)
             
             # Check if locked
             if settings['locked']:
@@ -1181,12 +3320,12 @@ class QueueView(discord.ui.View):
                 return
             
             # Check blacklist
-            if is_user_blacklisted(interaction.guild.id, self.queue_name, interaction.user.id):
+            if await is_user_blacklisted(interaction.guild.id, self.queue_name, interaction.user.id):
                 await interaction.response.send_message("❌ You are blacklisted from this queue!", ephemeral=True)
                 return
             
             # Check required roles
-            if not check_required_roles(interaction.guild, interaction.user, self.queue_name):
+            if not await check_required_roles(interaction.guild, interaction.user, self.queue_name):
                 await interaction.response.send_message("❌ You don't have the required role to join this queue!", ephemeral=True)
                 return
             
@@ -1196,9 +3335,11 @@ class QueueView(discord.ui.View):
                 return
             
             # Add to queue
-            queue.append(interaction.user.id)
-            get_or_create_player(interaction.user.id, interaction.user.name)
-            get_queue_player_stats(interaction.user.id, interaction.guild.id, self.queue_name)
+            if not await queue.add(interaction.user.id):
+                await interaction.response.send_message("❌ You're already in the queue!", ephemeral=True)
+                return
+            await get_or_create_player(interaction.user.id, interaction.user.name)
+            await get_queue_player_stats(interaction.user.id, interaction.guild.id, self.queue_name)
             
             # Log activity
             log_activity(interaction.guild.id, self.queue_name, interaction.user.id, "joined")
@@ -1227,12 +3368,11 @@ class QueueView(discord.ui.View):
         try:
             queue = get_queue(interaction.guild.id, self.queue_name)
             
-            if interaction.user.id not in queue:
+            if not await queue.remove(interaction.user.id):
                 await interaction.response.send_message("❌ You're not in the queue!", ephemeral=True)
                 return
             
-            queue.remove(interaction.user.id)
-            settings = get_queue_settings(interaction.guild.id, self.queue_name)
+            settings = await get_queue_settings(interaction.guild.id, self.queue_name)
             
             # Log activity
             log_activity(interaction.guild.id, self.queue_name, interaction.user.id, "left")
@@ -1251,45 +3391,44 @@ class QueueView(discord.ui.View):
     
     async def handle_start(self, interaction: discord.Interaction):
         """Handle starting a match"""
+        queue = get_queue(interaction.guild.id, self.queue_name)
+        players = None
         try:
             await interaction.response.defer()
             
-            queue = get_queue(interaction.guild.id, self.queue_name)
-            settings = get_queue_settings(interaction.guild.id, self.queue_name)
+            settings = await get_queue_settings(interaction.guild.id, self.queue_name)
             required_players = settings['team_size'] * 2
             
-            if len(queue) < required_players:
-                await interaction.followup.send(
-                    f"❌ Need {required_players} players! Currently: {len(queue)}"
-                )
+            # Take the players out of the queue - only one start can win this
+            players = await queue.claim_start(required_players)
+            if players is None:
+                if queue.state == QueueEngine.STARTING:
+                    await interaction.followup.send("❌ A match is already starting for this queue!")
+                else:
+                    await interaction.followup.send(
+                        f"❌ Need {required_players} players! Currently: {len(queue)}"
+                    )
                 return
             
             # Get next match number
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT MAX(match_number) FROM matches WHERE guild_id=? AND queue_name=?',
-                      (interaction.guild.id, self.queue_name))
-            result = c.fetchone()[0]
+            row = await db.fetchone('SELECT MAX(match_number) FROM matches WHERE guild_id=? AND queue_name=?',
+                                    (interaction.guild.id, self.queue_name))
+            result = row[0]
             match_number = (result + 1) if result else 1
-            conn.close()
-            
-            players = queue[:required_players]
             
             # Create teams based on mode
             if settings['team_selection_mode'] == 'balanced':
-                team1, team2 = create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
+                team1, team2 = await create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
             elif settings['team_selection_mode'] == 'random':
                 team1, team2 = create_random_teams(players, settings['team_size'])
             elif settings['team_selection_mode'] == 'captains':
-                # Start captain draft
+                # Captain draft doesn't create a match yet (start_captain_draft only posts a
+                # notice), so hand the claimed players straight back to the queue
+                await queue.abort_start(players)
                 await self.start_captain_draft(interaction, players, settings)
                 return
             else:
-                team1, team2 = create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
-            
-            # Remove players from queue
-            for player_id in players:
-                queue.remove(player_id)
+                team1, team2 = await create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
             
             # Generate lobby details if configured
             lobby_details = None
@@ -1303,7 +3442,7 @@ class QueueView(discord.ui.View):
                 )
             
             # Create match embed
-            bo3_maps = select_bo3_maps(interaction.guild.id, self.queue_name)
+            bo3_maps = await select_bo3_maps(interaction.guild.id, self.queue_name)
             bo3_display = format_bo3_maps(bo3_maps)
             
             embed = discord.Embed(
@@ -1338,8 +3477,9 @@ class QueueView(discord.ui.View):
                         team2_names.append(name)
             
             # Calculate average MMR
-            team1_mmr = sum(get_queue_player_stats(uid, interaction.guild.id, self.queue_name)['mmr'] for uid in team1) // len(team1)
-            team2_mmr = sum(get_queue_player_stats(uid, interaction.guild.id, self.queue_name)['mmr'] for uid in team2) // len(team2)
+            mmrs = await get_queue_mmrs(team1 + team2, interaction.guild.id, self.queue_name)
+            team1_mmr = sum(mmrs[uid] for uid in team1) // len(team1)
+            team2_mmr = sum(mmrs[uid] for uid in team2) // len(team2)
             
             embed.add_field(
                 name=f"Team 1 (Avg MMR: {team1_mmr})",
@@ -1371,22 +3511,16 @@ class QueueView(discord.ui.View):
             }
             
             # Save to database
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('''INSERT INTO matches 
-                         (guild_id, queue_name, timestamp, team1, team2, match_number, lobby_details)
-                         VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                      (interaction.guild.id, self.queue_name, match_data['timestamp'],
-                       json.dumps(team1), json.dumps(team2), match_number, lobby_details))
-            match_id = c.lastrowid
-            conn.commit()
-            conn.close()
+            match_id = await create_match_record(interaction.guild.id, self.queue_name, match_data['timestamp'],
+                                                 team1, team2, match_number, lobby_details)
+            await queue.finish_start()
             
             match_data['match_id'] = match_id
             
             if interaction.guild.id not in active_matches:
                 active_matches[interaction.guild.id] = {}
             active_matches[interaction.guild.id][self.queue_name] = match_data
+            state_journal.put(state_key('match', interaction.guild.id, self.queue_name), match_data)
             
             # Send to results channel if configured
             if settings['results_channel']:
@@ -1401,17 +3535,19 @@ class QueueView(discord.ui.View):
             # Calculate required votes - minimum 5 or majority of players
             required_votes = max(5, (len(team1) + len(team2)) // 2 + 1)
             
-            # Create voting view
-            vote_view = MatchVoteView(
-                match_id, team1, team2, self.queue_name,
-                required_votes, team1_name, team2_name, bo3_maps
-            )
+            # Open the vote, then send its buttons
+            series = MatchSeries(match_id, interaction.guild.id, self.queue_name, team1, team2,
+                                 required_votes, team1_name, team2_name, bo3_maps)
+            match_votes.open(series)
             
-            await interaction.followup.send(embed=embed, view=vote_view)
+            vote_message = await interaction.followup.send(embed=embed, view=MatchVoteView(series))
+            match_votes.bind(series, vote_message)
             await self.update_queue_display(interaction)
             
         except Exception as e:
             logger.error(f"Error starting match: {e}", exc_info=True)
+            if players and queue.state == QueueEngine.STARTING:
+                await queue.abort_start(players)
             try:
                 await interaction.followup.send(f"❌ Error starting match: {str(e)}")
             except:
@@ -1421,7 +3557,7 @@ class QueueView(discord.ui.View):
         """Start captain draft mode"""
         # This would implement captain selection and draft
         # For now, fall back to balanced
-        team1, team2 = create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
+        team1, team2 = await create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
         await interaction.followup.send("⚠️ Captain mode not fully implemented yet, using balanced teams")
     
     async def auto_move_players(self, guild: discord.Guild, team1: List, team2: List, settings: Dict, match_number: int):
@@ -1436,34 +3572,39 @@ class QueueView(discord.ui.View):
                 return
             
             # Create team channels
-            team1_channel = await guild.create_voice_channel(
-                f"Match #{match_number} - Team 1",
-                category=category
-            )
-            team2_channel = await guild.create_voice_channel(
-                f"Match #{match_number} - Team 2",
-                category=category
+            results = await asyncio.gather(
+                guild.create_voice_channel(f"Match #{match_number} - Team 1", category=category),
+                guild.create_voice_channel(f"Match #{match_number} - Team 2", category=category),
+                return_exceptions=True
             )
+            created = [r for r in results if not isinstance(r, BaseException)]
+            if len(created) < len(results):
+                await channel_provisioner.teardown(guild, created)
+                raise next(r for r in results if isinstance(r, BaseException))
+            team1_channel, team2_channel = results
             
             # Move players
-            for user_id in team1:
-                member = guild.get_member(user_id)
-                if member and member.voice:
-                    await member.move_to(team1_channel)
-            
-            for user_id in team2:
-                member = guild.get_member(user_id)
-                if member and member.voice:
-                    await member.move_to(team2_channel)
+            assignments = {user_id: team1_channel for user_id in team1}
+            assignments.update({user_id: team2_channel for user_id in team2})
+            try:
+                outcomes = await voice_mover.move(guild, assignments)
+            except Exception:
+                await channel_provisioner.teardown(guild, [team1_channel, team2_channel])
+                raise
+            logger.info(f"Auto-move Match #{match_number}: {voice_mover.summarize(outcomes)}")
             
         except Exception as e:
             logger.error(f"Error auto-moving players: {e}")
     
     async def update_queue_display(self, interaction: discord.Interaction):
+        """Schedule a refresh of the queue display; bursts of changes share one edit"""
+        queue_renderer.request(self, lambda: self._render_queue_display(interaction))
+    
+    async def _render_queue_display(self, interaction: discord.Interaction):
         """Update the queue display message - NeatQueue style"""
         try:
             queue = get_queue(interaction.guild.id, self.queue_name)
-            settings = get_queue_settings(interaction.guild.id, self.queue_name)
+            settings = await get_queue_settings(interaction.guild.id, self.queue_name)
             guild = interaction.guild
             
             # Check if someone just left (compare current queue with previous state if available)
@@ -1477,74 +3618,15 @@ class QueueView(discord.ui.View):
                         break
             
             # Store current queue for next comparison
-            self._previous_queue = queue.copy()
-            
-            # Create embed with dark theme and red left border (like NeatQueue)
-            # Show the actual queue name exactly as it was entered
-            queue_display_name = self.queue_name if self.queue_name != "default" else "Queue"
-            
-            embed = discord.Embed(
-                title=queue_display_name,
-                color=0xed4245  # Discord red color for left border
-            )
+            self._previous_queue = queue.snapshot()
             
-            # Build description - shorter box with less padding
-            description_parts = []
-            
-            # If someone just left, show that message at the top
-            if left_player:
-                description_parts.append(f"**Player Left Queue!**")
-                description_parts.append(f"{left_player.mention}")
-                description_parts.append("")  # Empty line for spacing
-            
-            # Add queue count
-            description_parts.append(f"**Queue {len(queue)}/{settings['team_size']*2}**")
-            description_parts.append("")  # Empty line for spacing
-            
-            # Show players in queue with mentions
-            if queue:
-                for user_id in queue:
-                    member = guild.get_member(user_id)
-                    if member:
-                        description_parts.append(f"{member.mention}")
-            else:
-                description_parts.append("*No players in queue*")
-            
-            # Add moderate padding to keep box visible but shorter (3-5 lines instead of 10)
-            padding_lines = max(0, 5 - len(queue))
-            for _ in range(padding_lines):
-                description_parts.append("")
-            
-            # Add timestamp at bottom - Discord format automatically adjusts to user's timezone
-            timestamp = f"<t:{int(datetime.now().timestamp())}:t>"  # Shows time in user's local timezone
-            description_parts.append(timestamp)
-            
-            embed.description = "\n".join(description_parts)
+            embed = build_queue_embed(guild, self.queue_name, queue, settings['team_size'], left_player)
             
-            # Sticky message: Delete and repost to keep at bottom
+            # Sticky message: keep it at the bottom (reposts are throttled by the sticky manager)
             if settings.get('sticky_message', 0):
-                try:
-                    # Get the message to delete - use self.message which is set when queue is started
-                    message_to_delete = self.message
-                    
-                    if message_to_delete:
-                        # Send new message at bottom first
-                        new_message = await interaction.channel.send(embed=embed, view=self)
-                        
-                        # Then delete the old message
-                        await message_to_delete.delete()
-                        
-                        # Update the view's message reference
-                        self.message = new_message
-                        
-                        # Update sticky tracking
-                        if interaction.channel.id in sticky_queue_messages:
-                            sticky_queue_messages[interaction.channel.id]['message'] = new_message
-                except Exception as e:
-                    logger.error(f"Error with sticky message: {e}")
-                    # Fall back to regular edit if sticky fails
-                    if self.message:
-                        await self.message.edit(embed=embed, view=self)
+                if interaction.channel.id not in sticky_queue_messages and self.message:
+                    sticky_manager.register(interaction.channel.id, self.message, self, self.queue_name, guild.id)
+                await sticky_manager.refresh(interaction.channel, embed)
             else:
                 # Regular update - edit the queue message directly
                 if self.message:
@@ -1555,61 +3637,48 @@ class QueueView(discord.ui.View):
     
     async def auto_start_match(self, interaction: discord.Interaction):
         """Automatically start a match with custom team names and sequential numbering"""
+        queue = get_queue(interaction.guild.id, self.queue_name)
+        players = None
+        channels = None
+        match_id = None
+        started = False
         try:
-            queue = get_queue(interaction.guild.id, self.queue_name)
-            settings = get_queue_settings(interaction.guild.id, self.queue_name)
+            settings = await get_queue_settings(interaction.guild.id, self.queue_name)
             required_players = settings['team_size'] * 2
             
-            if len(queue) < required_players:
+            # Take the players out of the queue - concurrent joins that also saw a full
+            # queue get None here, so a fill only ever starts one match
+            players = await queue.claim_start(required_players)
+            if players is None:
                 return
             
             # Get next match number (sequential)
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT MAX(match_number) FROM matches WHERE guild_id=? AND queue_name=?',
-                      (interaction.guild.id, self.queue_name))
-            result = c.fetchone()[0]
+            row = await db.fetchone('SELECT MAX(match_number) FROM matches WHERE guild_id=? AND queue_name=?',
+                                    (interaction.guild.id, self.queue_name))
+            result = row[0]
             match_number = (result + 1) if result else 1
-            conn.close()
             
             # Get custom team names
             team1_name = settings.get('team1_name', 'Team 1')
             team2_name = settings.get('team2_name', 'Team 2')
             
-            players = queue[:required_players]
-            
             # Create teams
             if settings['team_selection_mode'] == 'balanced':
-                team1, team2 = create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
+                team1, team2 = await create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
             elif settings['team_selection_mode'] == 'random':
                 team1, team2 = create_random_teams(players, settings['team_size'])
             else:
-                team1, team2 = create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
-            
-            # Remove players from queue
-            for player_id in players:
-                queue.remove(player_id)
+                team1, team2 = await create_balanced_teams(players, interaction.guild.id, self.queue_name, settings['team_size'])
             
             # Create match channels
             category_id = settings.get('channel_category')
             category = interaction.guild.get_channel(category_id) if category_id else None
             
-            # Create text channel
-            match_text_channel = await interaction.guild.create_text_channel(
-                f"queue-{match_number}-{self.queue_name}",
-                category=category,
-                topic=f"Match #{match_number} | {team1_name} vs {team2_name}"
-            )
-            
-            # Create voice channels with custom team names
-            team1_voice = await interaction.guild.create_voice_channel(
-                f"Queue {match_number} | {team1_name}",
-                category=category
-            )
-            team2_voice = await interaction.guild.create_voice_channel(
-                f"Queue {match_number} | {team2_name}",
-                category=category
+            # Create text + team voice channels, visible only to match players
+            channels = await channel_provisioner.provision(
+                interaction.guild, category, match_number, self.queue_name, team1, team2, team1_name, team2_name
             )
+            match_text_channel, team1_voice, team2_voice = channels
             
             # Store channel IDs for cleanup
             if interaction.guild.id not in active_match_channels:
@@ -1621,47 +3690,20 @@ class QueueView(discord.ui.View):
                 'voice2': team2_voice.id,
                 'match_number': match_number
             }
-            
-            # Set permissions - only match players can see
-            await match_text_channel.set_permissions(interaction.guild.default_role, view_channel=False)
-            await team1_voice.set_permissions(interaction.guild.default_role, view_channel=False)
-            await team2_voice.set_permissions(interaction.guild.default_role, view_channel=False)
-            
-            # Team 1 permissions
-            for user_id in team1:
-                member = interaction.guild.get_member(user_id)
-                if member:
-                    await match_text_channel.set_permissions(member, view_channel=True, send_messages=True)
-                    await team1_voice.set_permissions(member, view_channel=True, connect=True)
-            
-            # Team 2 permissions
-            for user_id in team2:
-                member = interaction.guild.get_member(user_id)
-                if member:
-                    await match_text_channel.set_permissions(member, view_channel=True, send_messages=True)
-                    await team2_voice.set_permissions(member, view_channel=True, connect=True)
+            state_journal.put(state_key('channels', interaction.guild.id, self.queue_name),
+                              active_match_channels[interaction.guild.id][self.queue_name])
             
             # Auto-move players
             if settings.get('auto_move'):
-                for user_id in team1:
-                    member = interaction.guild.get_member(user_id)
-                    if member and member.voice:
-                        try:
-                            await member.move_to(team1_voice)
-                        except:
-                            pass
-                
-                for user_id in team2:
-                    member = interaction.guild.get_member(user_id)
-                    if member and member.voice:
-                        try:
-                            await member.move_to(team2_voice)
-                        except:
-                            pass
+                assignments = {user_id: team1_voice for user_id in team1}
+                assignments.update({user_id: team2_voice for user_id in team2})
+                outcomes = await voice_mover.move(interaction.guild, assignments)
+                logger.info(f"Auto-move Queue #{match_number}: {voice_mover.summarize(outcomes)}")
             
             # Calculate MMR
-            team1_mmr = sum(get_queue_player_stats(uid, interaction.guild.id, self.queue_name)['mmr'] for uid in team1) // len(team1)
-            team2_mmr = sum(get_queue_player_stats(uid, interaction.guild.id, self.queue_name)['mmr'] for uid in team2) // len(team2)
+            mmrs = await get_queue_mmrs(team1 + team2, interaction.guild.id, self.queue_name)
+            team1_mmr = sum(mmrs[uid] for uid in team1) // len(team1)
+            team2_mmr = sum(mmrs[uid] for uid in team2) // len(team2)
             
             # Get player names
             name_type = settings['name_type']
@@ -1681,7 +3723,7 @@ class QueueView(discord.ui.View):
                     team2_names.append(member.mention if settings['ping_players'] else name)
             
             # Create announcement embed
-            bo3_maps = select_bo3_maps(interaction.guild.id, self.queue_name)
+            bo3_maps = await select_bo3_maps(interaction.guild.id, self.queue_name)
             bo3_display = format_bo3_maps(bo3_maps)
             
             embed = discord.Embed(
@@ -1712,16 +3754,9 @@ class QueueView(discord.ui.View):
             )
             
             # Save match to database
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('''INSERT INTO matches 
-                         (guild_id, queue_name, timestamp, team1, team2, match_number)
-                         VALUES (?, ?, ?, ?, ?, ?)''',
-                      (interaction.guild.id, self.queue_name, datetime.now().isoformat(),
-                       json.dumps(team1), json.dumps(team2), match_number))
-            match_id = c.lastrowid
-            conn.commit()
-            conn.close()
+            match_id = await create_match_record(interaction.guild.id, self.queue_name, datetime.now().isoformat(),
+                                                 team1, team2, match_number)
+            await queue.finish_start()
             
             # Send announcement in original channel
             await interaction.channel.send(embed=embed)
@@ -1761,11 +3796,12 @@ class QueueView(discord.ui.View):
             required_votes = max(5, (len(team1) + len(team2)) // 2 + 1)
             
             # Send voting message
-            vote_view = MatchVoteView(
-                match_id, team1, team2, self.queue_name, 
-                required_votes, team1_name, team2_name, bo3_maps
-            )
-            await match_text_channel.send(embed=match_embed, view=vote_view)
+            series = MatchSeries(match_id, interaction.guild.id, self.queue_name, team1, team2,
+                                 required_votes, team1_name, team2_name, bo3_maps)
+            match_votes.open(series)
+            vote_message = await match_text_channel.send(embed=match_embed, view=MatchVoteView(series))
+            match_votes.bind(series, vote_message)
+            started = True  # players can vote from here on; later failures leave the match running
             
             # Send to results channel
             if settings['results_channel']:
@@ -1778,350 +3814,290 @@ class QueueView(discord.ui.View):
             
             logger.info(f"Queue #{match_number} auto-started: {team1_name} vs {team2_name}")
             
+            # Players who joined while this match was starting may already fill the next one
+            if len(queue) >= required_players:
+                asyncio.create_task(self.auto_start_match(interaction))
+            
         except Exception as e:
             logger.error(f"Error auto-starting match: {e}", exc_info=True)
+            if channels is not None and not started:
+                await self._discard_failed_start(interaction.guild, channels, match_id)
+            if players and queue.state == QueueEngine.STARTING:
+                await queue.abort_start(players)
+    
+    async def _discard_failed_start(self, guild: discord.Guild, channels: MatchChannels, match_id: Optional[int]):
+        """Undo a match start that failed after its channels were created"""
+        try:
+            await channel_provisioner.teardown(guild, list(channels))
+            if active_match_channels.get(guild.id, {}).pop(self.queue_name, None) is not None:
+                state_journal.delete(state_key('channels', guild.id, self.queue_name))
+            if match_id is not None:
+                await db.execute('UPDATE matches SET cancelled=1 WHERE match_id=?', (match_id,))
+                match_votes.close(match_id)
+                get_queue(guild.id, self.queue_name).end_match()
+        except Exception as e:
+            logger.error(f"Error cleaning up failed match start: {e}")
+
+class MatchVoteButton(discord.ui.DynamicItem[discord.ui.Button], template=r'match_vote:(?P<match_id>\d+):(?P<team>[12])'):
+    """"Team N Won" button of one match; the custom_id carries the match, so clicks route
+    without a per-match View and keep working after a restart"""
+
+    def __init__(self, match_id: int, team: int, label: str = None, disabled: bool = False):
+        super().__init__(discord.ui.Button(
+            label=label or f"Team {team} Won",
+            style=discord.ButtonStyle.primary if team == 1 else discord.ButtonStyle.danger,
+            custom_id=f"match_vote:{match_id}:{team}",
+            disabled=disabled
+        ))
+        self.match_id = match_id
+        self.team = team
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(int(match['match_id']), int(match['team']))
+
+    async def callback(self, interaction: discord.Interaction):
+        await handle_match_vote(interaction, self.match_id, self.team)
 
 class MatchVoteView(discord.ui.View):
-    """Best of 3 voting - players vote per game, first team to 2 wins takes the series"""
+    """Best of 3 voting - players vote per game, first team to 2 wins takes the series.
+
+    Only used to send/edit the vote message; the buttons are MatchVoteButtons and the
+    state lives in match_votes, so the instance can be dropped once the message is out."""
     
-    def __init__(self, match_id: int, team1: List, team2: List, queue_name: str, 
-                 required_votes: int, team1_name: str = "Team 1", team2_name: str = "Team 2",
-                 bo3_maps: List[Dict] = None):
+    def __init__(self, series: MatchSeries, disabled: bool = False):
         super().__init__(timeout=None)
-        self.match_id = match_id
-        self.team1 = team1
-        self.team2 = team2
-        self.queue_name = queue_name
-        self.required_votes = required_votes
-        self.team1_name = team1_name
-        self.team2_name = team2_name
-        self.bo3_maps = bo3_maps or []
-        
-        # BO3 series state
-        self.current_game = 1  # 1, 2, or 3
-        self.series_score = [0, 0]  # [team1_wins, team2_wins]
-        self.game_results = []  # list of winning team per game
-        
-        # Update button labels
-        self._update_button_labels()
-        
-        # Initialize votes
-        if match_id not in match_votes:
-            match_votes[match_id] = {
-                'team1': set(),
-                'team2': set(),
-                'all_players': set(team1 + team2)
-            }
-    
-    def _update_button_labels(self):
-        """Update buttons to show current game info"""
-        game_info = ""
-        if self.bo3_maps and self.current_game <= len(self.bo3_maps):
-            game = self.bo3_maps[self.current_game - 1]
-            game_info = f" (Game {self.current_game}: {game['mode']} - {game['map']})"
+        game = series.current_map()
+        game_info = f" (Game {series.current_game}: {game['mode']} - {game['map']})" if game else ""
+        for team in (1, 2):
+            self.add_item(MatchVoteButton(series.match_id, team, f"{series.team_name(team)} Won{game_info}", disabled))
+
+async def handle_match_vote(interaction: discord.Interaction, match_id: int, team: int):
+    """Handle a vote for a team"""
+    try:
+        series = await match_votes.get(match_id)
+        if series is None:
+            await interaction.response.send_message("❌ Voting for this match is closed!", ephemeral=True)
+            return
         
-        self.children[0].label = f"{self.team1_name} Won{game_info}"
-        self.children[1].label = f"{self.team2_name} Won{game_info}"
-    
-    @discord.ui.button(label="Team 1 Won", style=discord.ButtonStyle.primary, custom_id="vote_team1")
-    async def vote_team1_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_vote(interaction, 1)
-    
-    @discord.ui.button(label="Team 2 Won", style=discord.ButtonStyle.danger, custom_id="vote_team2")
-    async def vote_team2_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_vote(interaction, 2)
-    
-    async def handle_vote(self, interaction: discord.Interaction, team: int):
-        """Handle a vote for a team"""
-        try:
-            user_id = interaction.user.id
-            votes = match_votes[self.match_id]
-            
-            # Check if user is in the match
-            if user_id not in votes['all_players']:
-                await interaction.response.send_message(
-                    "❌ Only players from this match can vote!",
-                    ephemeral=True
-                )
-                return
-            
-            # Remove from other team if they voted before
-            if team == 1:
-                votes['team2'].discard(user_id)
-                votes['team1'].add(user_id)
-                voted_for = self.team1_name
-            else:
-                votes['team1'].discard(user_id)
-                votes['team2'].add(user_id)
-                voted_for = self.team2_name
-            
-            team1_votes = len(votes['team1'])
-            team2_votes = len(votes['team2'])
-            
-            game_info = ""
-            if self.bo3_maps and self.current_game <= len(self.bo3_maps):
-                game = self.bo3_maps[self.current_game - 1]
-                game_info = f"\n**Current Game:** {game['emoji']} {game['mode']} on **{game['map']}**"
-            
+        # Check if user is in the match
+        if interaction.user.id not in series.players:
             await interaction.response.send_message(
-                f"✅ Vote recorded for **{voted_for}**!{game_info}\n"
-                f"**Current Votes:** {self.team1_name}: {team1_votes} | {self.team2_name}: {team2_votes}\n"
-                f"**Needed:** {self.required_votes} votes\n"
-                f"**Series:** {self.team1_name} {self.series_score[0]} - {self.series_score[1]} {self.team2_name}",
+                "❌ Only players from this match can vote!",
                 ephemeral=True
             )
+            return
+        
+        # Count the vote and decide the game atomically, so a burst of votes finalizes it once
+        async with series.lock:
+            if match_votes.peek(match_id) is not series or series.settling:
+                await interaction.response.send_message("❌ Voting for this match is closed!", ephemeral=True)
+                return
             
-            # Check if we have enough votes for this game
-            if team1_votes >= self.required_votes:
-                await self.finalize_game(interaction, 1)
-            elif team2_votes >= self.required_votes:
-                await self.finalize_game(interaction, 2)
+            # Decided earlier, but recording the result failed - this click retries it
+            retry = series.is_over()
+            winner = None
+            if retry:
+                series.settling = True
             else:
-                await self.update_vote_display(interaction)
+                game = series.current_map()
+                score = list(series.series_score)
+                match_votes.record_ballot(series, interaction.user.id, team)
+                team1_votes, team2_votes = series.tally()
                 
-        except Exception as e:
-            logger.error(f"Error handling vote: {e}", exc_info=True)
-            try:
-                await interaction.response.send_message(f"❌ Error: {str(e)}", ephemeral=True)
-            except:
-                pass
-    
-    async def update_vote_display(self, interaction: discord.Interaction):
-        """Update the vote count display for current game"""
-        try:
-            votes = match_votes[self.match_id]
-            team1_votes = len(votes['team1'])
-            team2_votes = len(votes['team2'])
-            
-            # Build series status
-            series_status = f"**Series: {self.team1_name} {self.series_score[0]} - {self.series_score[1]} {self.team2_name}**"
-            
-            # Build game results history
-            results_lines = []
-            for i, result in enumerate(self.game_results):
-                game = self.bo3_maps[i] if i < len(self.bo3_maps) else {}
-                winner_name = self.team1_name if result == 1 else self.team2_name
-                results_lines.append(f"~~Game {i+1}: {game.get('emoji', '🎮')} {game.get('mode', '?')} — {game.get('map', '?')}~~ → **{winner_name}** ✅")
-            
-            # Current game info
-            current_game_info = ""
-            if self.bo3_maps and self.current_game <= len(self.bo3_maps):
-                game = self.bo3_maps[self.current_game - 1]
-                current_game_info = f"▶️ **Game {self.current_game}: {game['emoji']} {game['mode']} — {game['map']}**"
-            
-            # Future games
-            future_lines = []
-            for i in range(self.current_game, min(3, len(self.bo3_maps))):
-                game = self.bo3_maps[i]
-                future_lines.append(f"Game {i+1}: {game['emoji']} {game['mode']} — {game['map']}")
-            
-            description_parts = [series_status, ""]
-            if results_lines:
-                description_parts.extend(results_lines)
-            if current_game_info:
-                description_parts.append(current_game_info)
-            if future_lines:
-                description_parts.extend(future_lines)
-            
-            description_parts.append(f"\nVote for who won Game {self.current_game}!")
-            description_parts.append(f"**{self.required_votes} votes needed**")
-            
-            embed = discord.Embed(
-                title=f"🗳️ Best of 3 — Game {self.current_game} Voting",
-                description="\n".join(description_parts),
-                color=discord.Color.gold()
-            )
-            
-            embed.add_field(
-                name=f"🔵 {self.team1_name}",
-                value=f"**{team1_votes}** votes",
-                inline=True
-            )
-            embed.add_field(
-                name=f"🔴 {self.team2_name}",
-                value=f"**{team2_votes}** votes",
-                inline=True
-            )
+                if team1_votes >= series.required_votes:
+                    winner = 1
+                elif team2_votes >= series.required_votes:
+                    winner = 2
+                if winner:
+                    match_votes.record_game(series, winner)
+                    # The series stays registered until finalize_series has recorded the result
+                    series.settling = series.is_over()
+        
+        if retry:
+            await interaction.response.send_message("🔁 Recording the series result...", ephemeral=True)
+            await finalize_series(interaction, series)
+            return
+        
+        game_info = f"\n**Current Game:** {game['emoji']} {game['mode']} on **{game['map']}**" if game else ""
+        await interaction.response.send_message(
+            f"✅ Vote recorded for **{series.team_name(team)}**!{game_info}\n"
+            f"**Current Votes:** {series.team1_name}: {team1_votes} | {series.team2_name}: {team2_votes}\n"
+            f"**Needed:** {series.required_votes} votes\n"
+            f"**Series:** {series.team1_name} {score[0]} - {score[1]} {series.team2_name}",
+            ephemeral=True
+        )
+        
+        if winner is None:
+            await update_vote_display(interaction, series)
+        elif series.is_over():
+            await finalize_series(interaction, series)
+        else:
+            await show_next_game(interaction, series, winner)
             
-            if interaction.message:
-                await interaction.message.edit(embed=embed, view=self)
-        except Exception as e:
-            logger.error(f"Error updating vote display: {e}")
-    
-    async def finalize_game(self, interaction: discord.Interaction, winning_team: int):
-        """Finalize a single game in the BO3 series"""
+    except Exception as e:
+        logger.error(f"Error handling vote: {e}", exc_info=True)
         try:
-            # Record game result
-            self.series_score[winning_team - 1] += 1
-            self.game_results.append(winning_team)
-            
-            winner_name = self.team1_name if winning_team == 1 else self.team2_name
-            game = self.bo3_maps[self.current_game - 1] if self.current_game <= len(self.bo3_maps) else {}
-            
-            # Check if series is over (first to 2)
-            if self.series_score[0] >= 2 or self.series_score[1] >= 2:
-                await self.finalize_series(interaction)
-                return
-            
-            # Series continues — move to next game
-            self.current_game += 1
-            
-            # Reset votes for next game
-            match_votes[self.match_id]['team1'] = set()
-            match_votes[self.match_id]['team2'] = set()
-            
-            # Update button labels for next game
-            self._update_button_labels()
-            
-            # Show game result and next game info
-            next_game = self.bo3_maps[self.current_game - 1] if self.current_game <= len(self.bo3_maps) else {}
-            
-            # Build series status
-            results_lines = []
-            for i, result in enumerate(self.game_results):
-                g = self.bo3_maps[i] if i < len(self.bo3_maps) else {}
-                w = self.team1_name if result == 1 else self.team2_name
-                results_lines.append(f"Game {i+1}: {g.get('emoji', '🎮')} {g.get('mode', '?')} — {g.get('map', '?')} → **{w}** ✅")
-            
-            embed = discord.Embed(
-                title=f"🗳️ Best of 3 — Game {self.current_game} Voting",
-                description=(
-                    f"**{winner_name}** won Game {self.current_game - 1}!\n\n"
-                    f"**Series: {self.team1_name} {self.series_score[0]} - {self.series_score[1]} {self.team2_name}**\n\n"
-                    + "\n".join(results_lines) + "\n"
-                    f"▶️ **Game {self.current_game}: {next_game.get('emoji', '🎮')} {next_game.get('mode', '?')} — {next_game.get('map', '?')}**\n\n"
-                    f"Vote for who won Game {self.current_game}!\n"
-                    f"**{self.required_votes} votes needed**"
-                ),
-                color=discord.Color.gold()
-            )
-            
-            embed.add_field(name=f"🔵 {self.team1_name}", value="**0** votes", inline=True)
-            embed.add_field(name=f"🔴 {self.team2_name}", value="**0** votes", inline=True)
-            
-            if interaction.message:
-                await interaction.message.edit(embed=embed, view=self)
-            
-        except Exception as e:
-            logger.error(f"Error finalizing game: {e}", exc_info=True)
+            await interaction.response.send_message(f"❌ Error: {str(e)}", ephemeral=True)
+        except:
+            pass
+
+async def update_vote_display(interaction: discord.Interaction, series: MatchSeries):
+    """Schedule a refresh of the public vote tally; a burst of votes shares one edit"""
+    message = interaction.message
+    if message:
+        vote_renderer.request(series.match_id, lambda: _render_vote_tally(message, series))
+
+async def _render_vote_tally(message: discord.Message, series: MatchSeries):
+    """Update the vote count display for current game"""
+    if match_votes.peek(series.match_id) is not series:
+        return  # decided in the meantime - the final result replaces this message
+    
+    team1_votes, team2_votes = series.tally()
+    embed = discord.Embed(
+        title=f"🗳️ Best of 3 — Game {series.current_game} Voting",
+        description=series.vote_description(),
+        color=discord.Color.gold()
+    )
+    embed.add_field(name=series.field_names[0], value=f"**{team1_votes}** votes", inline=True)
+    embed.add_field(name=series.field_names[1], value=f"**{team2_votes}** votes", inline=True)
     
-    async def finalize_series(self, interaction: discord.Interaction):
-        """Finalize the entire BO3 series"""
+    await message.edit(embed=embed, view=MatchVoteView(series))
+
+async def show_next_game(interaction: discord.Interaction, series: MatchSeries, winning_team: int):
+    """Announce a finished game of the BO3 series and open voting for the next one"""
+    try:
+        next_game = series.current_map()
+        
+        # Build series status
+        results_lines = [f"Game {i+1}: {series.game_label(i)} → **{series.team_name(result)}** ✅"
+                         for i, result in enumerate(series.game_results)]
+        
+        embed = discord.Embed(
+            title=f"🗳️ Best of 3 — Game {series.current_game} Voting",
+            description=(
+                f"**{series.team_name(winning_team)}** won Game {series.current_game - 1}!\n\n"
+                f"**Series: {series.team1_name} {series.series_score[0]} - {series.series_score[1]} {series.team2_name}**\n\n"
+                + "\n".join(results_lines) + "\n"
+                f"▶️ **Game {series.current_game}: {next_game.get('emoji', '🎮')} {next_game.get('mode', '?')} — {next_game.get('map', '?')}**\n\n"
+                f"Vote for who won Game {series.current_game}!\n"
+                f"**{series.required_votes} votes needed**"
+            ),
+            color=discord.Color.gold()
+        )
+        
+        embed.add_field(name=series.field_names[0], value="**0** votes", inline=True)
+        embed.add_field(name=series.field_names[1], value="**0** votes", inline=True)
+        
+        # Same render queue as the tallies, so an older tally can't land on top of this
+        message = interaction.message
+        if message:
+            vote_renderer.request(series.match_id, lambda: message.edit(embed=embed, view=MatchVoteView(series)))
+        
+    except Exception as e:
+        logger.error(f"Error finalizing game: {e}", exc_info=True)
+
+async def finalize_series(interaction: discord.Interaction, series: MatchSeries):
+    """Finalize the entire BO3 series"""
+    try:
+        guild = interaction.guild
+        series_winner = 1 if series.series_score[0] >= 2 else 2
+        winning_team_name = series.team_name(series_winner)
+        
+        # Record the result and award MMR in one transaction; the vote is only closed once
+        # that has succeeded, so a failed attempt can be retried with the next click
+        mmr_change = 25
+        series.settling = True
         try:
-            # Disable all buttons
-            for item in self.children:
-                item.disabled = True
-            
-            series_winner = 1 if self.series_score[0] >= 2 else 2
-            winning_team_name = self.team1_name if series_winner == 1 else self.team2_name
-            
-            # Update match in database
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('UPDATE matches SET winner=?, team1_score=?, team2_score=? WHERE match_id=?',
-                      (series_winner, self.series_score[0], self.series_score[1], self.match_id))
-            conn.commit()
-            conn.close()
-            
-            # Award MMR
-            winners = self.team1 if series_winner == 1 else self.team2
-            losers = self.team2 if series_winner == 1 else self.team1
-            mmr_change = 25
-            
-            for user_id in winners:
-                update_player_stats(user_id, interaction.guild.id, self.queue_name, mmr_change, won=True)
-                stats = get_queue_player_stats(user_id, interaction.guild.id, self.queue_name)
-                apply_mmr_ranks(interaction.guild, user_id, self.queue_name, stats['mmr'])
-            
-            for user_id in losers:
-                update_player_stats(user_id, interaction.guild.id, self.queue_name, -mmr_change, won=False)
-                stats = get_queue_player_stats(user_id, interaction.guild.id, self.queue_name)
-                apply_mmr_ranks(interaction.guild, user_id, self.queue_name, stats['mmr'])
-            
-            # Build game-by-game results
-            results_lines = []
-            for i, result in enumerate(self.game_results):
-                game = self.bo3_maps[i] if i < len(self.bo3_maps) else {}
-                w = self.team1_name if result == 1 else self.team2_name
-                results_lines.append(f"Game {i+1}: {game.get('emoji', '🎮')} {game.get('mode', '?')} — {game.get('map', '?')} → **{w}** ✅")
-            
-            embed = discord.Embed(
-                title=f"🏆 {winning_team_name} Wins the Series!",
-                description=(
-                    f"**Final Score: {self.team1_name} {self.series_score[0]} - {self.series_score[1]} {self.team2_name}**\n\n"
-                    + "\n".join(results_lines)
-                ),
-                color=discord.Color.green(),
-                timestamp=datetime.now()
-            )
-            
-            embed.add_field(
-                name="MMR Changes",
-                value=f"✅ **{winning_team_name}:** +{mmr_change} MMR\n"
-                      f"❌ **Losing Team:** -{mmr_change} MMR",
-                inline=False
-            )
-            
-            embed.set_footer(text="Channels will be deleted in 30 seconds...")
-            
-            # Update message
-            if interaction.message:
-                await interaction.message.edit(embed=embed, view=self)
-            
-            # Send to results channel
-            settings = get_queue_settings(interaction.guild.id, self.queue_name)
-            if settings['results_channel']:
-                channel = interaction.guild.get_channel(settings['results_channel'])
-                if channel:
-                    await channel.send(embed=embed)
-            
-            # Delete channels after 30 seconds
-            if interaction.guild.id in active_match_channels:
-                if self.queue_name in active_match_channels[interaction.guild.id]:
-                    await asyncio.sleep(30)
-                    await self.cleanup_channels(interaction.guild)
-            
-            # Clean up votes
-            if self.match_id in match_votes:
-                del match_votes[self.match_id]
-            
-            # Clean up active match tracking
-            if interaction.guild.id in active_matches:
-                if self.queue_name in active_matches[interaction.guild.id]:
-                    del active_matches[interaction.guild.id][self.queue_name]
-                
+            new_mmrs = await settle_match(series.match_id, guild.id, series.queue_name, series_winner,
+                                          series.team1, series.team2, mmr_change,
+                                          team1_score=series.series_score[0], team2_score=series.series_score[1])
         except Exception as e:
-            logger.error(f"Error finalizing series: {e}", exc_info=True)
-    
-    async def cleanup_channels(self, guild: discord.Guild):
-        """Delete match text and voice channels"""
-        try:
-            channels_data = active_match_channels[guild.id].get(self.queue_name, {})
-            
-            # Delete text channel
-            if 'text' in channels_data:
-                text_channel = guild.get_channel(channels_data['text'])
-                if text_channel:
-                    await text_channel.delete()
-            
-            # Delete voice channels
-            if 'voice1' in channels_data:
-                voice1 = guild.get_channel(channels_data['voice1'])
-                if voice1:
-                    await voice1.delete()
-            
-            if 'voice2' in channels_data:
-                voice2 = guild.get_channel(channels_data['voice2'])
-                if voice2:
-                    await voice2.delete()
-            
-            # Clean up tracking
-            del active_match_channels[guild.id][self.queue_name]
-            
-            logger.info(f"Cleaned up Queue #{channels_data.get('match_number', '?')} channels")
+            series.settling = False
+            logger.error(f"Could not record the result of match {series.match_id}: {e}", exc_info=True)
+            try:
+                await interaction.followup.send("❌ Couldn't record the series result - click a vote button again to retry.",
+                                                ephemeral=True)
+            except discord.HTTPException:
+                pass
+            return
+        match_votes.close(series.match_id)
+        if new_mmrs is None:
+            logger.warning(f"Match {series.match_id} was already settled or cancelled; not finalizing its series again")
+            return
+        get_queue(guild.id, series.queue_name).end_match()
+        state_journal.delete(state_key('match', guild.id, series.queue_name))
+        
+        for user_id, mmr in new_mmrs.items():
+            await apply_mmr_ranks(guild, user_id, series.queue_name, mmr)
+        
+        # Build game-by-game results
+        results_lines = [f"Game {i+1}: {series.game_label(i)} → **{series.team_name(result)}** ✅"
+                         for i, result in enumerate(series.game_results)]
+        
+        embed = discord.Embed(
+            title=f"🏆 {winning_team_name} Wins the Series!",
+            description=(
+                f"**Final Score: {series.team1_name} {series.series_score[0]} - {series.series_score[1]} {series.team2_name}**\n\n"
+                + "\n".join(results_lines)
+            ),
+            color=discord.Color.green(),
+            timestamp=datetime.now()
+        )
+        
+        embed.add_field(
+            name="MMR Changes",
+            value=f"✅ **{winning_team_name}:** +{mmr_change} MMR\n"
+                  f"❌ **Losing Team:** -{mmr_change} MMR",
+            inline=False
+        )
+        
+        embed.set_footer(text="Channels will be deleted in 30 seconds...")
+        
+        # Update message with the buttons disabled (queued behind any pending tally edit)
+        message = interaction.message
+        if message:
+            vote_renderer.request(series.match_id,
+                                  lambda: message.edit(embed=embed, view=MatchVoteView(series, disabled=True)))
+        
+        # Send to results channel
+        settings = await get_queue_settings(guild.id, series.queue_name)
+        if settings['results_channel']:
+            channel = guild.get_channel(settings['results_channel'])
+            if channel:
+                await channel.send(embed=embed)
+        
+        # Delete channels after 30 seconds
+        if series.queue_name in active_match_channels.get(guild.id, {}):
+            await asyncio.sleep(30)
+            await cleanup_match_channels(guild, series.queue_name)
+        
+        # Clean up active match tracking
+        if guild.id in active_matches:
+            if series.queue_name in active_matches[guild.id]:
+                del active_matches[guild.id][series.queue_name]
             
-        except Exception as e:
-            logger.error(f"Error cleaning up channels: {e}")
+    except Exception as e:
+        logger.error(f"Error finalizing series: {e}", exc_info=True)
+
+async def cleanup_match_channels(guild: discord.Guild, queue_name: str):
+    """Delete match text and voice channels"""
+    try:
+        channels_data = active_match_channels[guild.id].get(queue_name, {})
+        
+        # Delete text and voice channels
+        await channel_provisioner.teardown(
+            guild, [channels_data[key] for key in ('text', 'voice1', 'voice2') if key in channels_data]
+        )
+        
+        # Clean up tracking
+        del active_match_channels[guild.id][queue_name]
+        state_journal.delete(state_key('channels', guild.id, queue_name))
+        
+        logger.info(f"Cleaned up Queue #{channels_data.get('match_number', '?')} channels")
+        
+    except Exception as e:
+        logger.error(f"Error cleaning up channels: {e}")
 
 class MapVoteView(discord.ui.View):
     """Map voting buttons"""
@@ -2156,6 +4132,53 @@ class MapVoteView(discord.ui.View):
         return max(vote_counts, key=vote_counts.get)
 
 
+# ============================================================================
+# STATE RECOVERY
+# ============================================================================
+
+async def restore_runtime_state():
+    """Rebuild queues, active matches, open votes and queue messages after a restart"""
+    state = await state_journal.load()
+    restored = {}
+    sticky_queues = set()
+    # Sticky entries first so a plain queue message in the same channel doesn't get a second view
+    for key, data in sorted(state.items(), key=lambda item: not item[0].startswith('sticky:')):
+        kind, _, rest = key.partition(':')
+        try:
+            if kind == 'queue':
+                guild_id, queue_name = rest.split(':', 1)
+                get_queue(int(guild_id), queue_name).restore(data)
+            elif kind == 'match':
+                guild_id, queue_name = rest.split(':', 1)
+                active_matches.setdefault(int(guild_id), {})[queue_name] = data
+            elif kind == 'channels':
+                guild_id, queue_name = rest.split(':', 1)
+                active_match_channels.setdefault(int(guild_id), {})[queue_name] = data
+            elif kind in ('sticky', 'queue_message'):
+                channel_id, _, queue_name = rest.partition(':')
+                queue_name = queue_name or data['queue_name']
+                channel = bot.get_channel(int(channel_id))
+                if channel is None:
+                    state_journal.delete(key)
+                    continue
+                if kind == 'queue_message' and (channel.id, queue_name) in sticky_queues:
+                    continue
+                view = QueueView(queue_name)
+                view.message = channel.get_partial_message(data['message_id'])
+                bot.add_view(view, message_id=data['message_id'])
+                if kind == 'sticky':
+                    sticky_manager.register(channel.id, view.message, view, queue_name, data['guild_id'])
+                    sticky_queues.add((channel.id, queue_name))
+            else:
+                continue
+            restored[kind] = restored.get(kind, 0) + 1
+        except Exception as e:
+            logger.error(f"Could not restore {key}: {e}")
+    
+    restored['vote'] = await match_votes.load_open()
+    if any(restored.values()):
+        logger.info("Restored runtime state: " + ", ".join(f"{count} {kind}" for kind, count in sorted(restored.items())))
+
 # ============================================================================
 # BOT EVENTS
 # ============================================================================
@@ -2166,18 +4189,14 @@ async def on_ready():
     logger.info(f'Logged in as {bot.user} (ID: {bot.user.id})')
     logger.info(f'Connected to {len(bot.guilds)} guilds')
     
-    init_db()
+    await db.write(init_db)
     
     # Register persistent reaction role views (button-based panels)
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('SELECT panel_id, message_id FROM reaction_role_panels')
-        panels = c.fetchall()
-        conn.close()
+        panels = await db.fetchall('SELECT panel_id, message_id FROM reaction_role_panels')
         
         for panel_id, message_id in panels:
-            view = ReactionRoleView(panel_id)
+            view = await ReactionRoleView.load(panel_id)
             bot.add_view(view, message_id=message_id)
         
         if panels:
@@ -2185,15 +4204,22 @@ async def on_ready():
     except Exception as e:
         logger.error(f'Failed to load button reaction role panels: {e}')
     
+    # Vote buttons of every match (the custom_id carries the match_id)
+    bot.add_dynamic_items(MatchVoteButton)
+    
+    # Bring back queues, matches and votes from before the restart (once per process)
+    if not state_journal.restored:
+        state_journal.restored = True
+        try:
+            await restore_runtime_state()
+        except Exception as e:
+            logger.error(f'Failed to restore queue/match state: {e}', exc_info=True)
+    
     # Reload emoji reaction roles (Carl-bot style)
     try:
         logger.info("Reloading emoji reaction role messages...")
         
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        
-        c.execute('SELECT message_id, channel_id, guild_id FROM emoji_reaction_messages')
-        messages = c.fetchall()
+        messages = await db.fetchall('SELECT message_id, channel_id, guild_id FROM emoji_reaction_messages')
         
         reload_count = 0
         for msg_id, channel_id, guild_id in messages:
@@ -2209,8 +4235,8 @@ async def on_ready():
                 message = await channel.fetch_message(msg_id)
                 
                 # Get all emojis for this message
-                c.execute('SELECT emoji FROM emoji_reaction_pairs WHERE message_id = ?', (msg_id,))
-                emojis = [row[0] for row in c.fetchall()]
+                emojis = [row[0] for row in await db.fetchall(
+                    'SELECT emoji FROM emoji_reaction_pairs WHERE message_id = ?', (msg_id,))]
                 
                 # Add reactions that are missing
                 for emoji in emojis:
@@ -2225,19 +4251,24 @@ async def on_ready():
             except Exception as e:
                 logger.error(f"Error reloading reactions for message {msg_id}: {e}")
         
-        conn.close()
         if reload_count > 0:
             logger.info(f"Emoji reaction role reload complete! Reloaded {reload_count} messages")
     except Exception as e:
         logger.error(f'Failed to reload emoji reaction roles: {e}')
     
     # Start scheduled tasks
-    check_scheduled_tasks.start()
+    task_scheduler.start()
+    
+    if not flush_audit_logs.is_running():
+        flush_audit_logs.start()
+    
+    if not flush_state_journal.is_running():
+        flush_state_journal.start()
     
     # Start stream notification checker
     if not check_streamers_task.is_running():
         check_streamers_task.start()
-        logger.info("Stream notification checker started (every 2 minutes)")
+        logger.info(f"Stream notification checker started (every {STREAM_CHECK_MINUTES} minutes)")
     
     try:
         synced = await bot.tree.sync()
@@ -2250,71 +4281,13 @@ async def on_ready():
 @bot.event
 async def on_message(message):
     """Handle sticky queue messages - repost queue to bottom when new messages arrive"""
+    # Repost the sticky queue if this message buried it (other bots' messages count too)
+    sticky_manager.note_message(message)
+    
     # Ignore bot messages
     if message.author.bot:
         return
     
-    # Check if this channel has a sticky queue
-    if message.channel.id in sticky_queue_messages:
-        try:
-            sticky_data = sticky_queue_messages[message.channel.id]
-            old_message = sticky_data['message']
-            view = sticky_data['view']
-            queue_name = sticky_data['queue_name']
-            guild_id = sticky_data['guild_id']
-            
-            # Get current queue data
-            queue = get_queue(guild_id, queue_name)
-            settings = get_queue_settings(guild_id, queue_name)
-            
-            # Recreate the embed
-            queue_display_name = queue_name if queue_name != "default" else "Queue"
-            
-            embed = discord.Embed(
-                title=queue_display_name,
-                color=0xed4245
-            )
-            
-            description_parts = []
-            description_parts.append(f"**Queue {len(queue)}/{settings['team_size']*2}**")
-            description_parts.append("")
-            
-            # Show players in queue with mentions
-            if queue:
-                guild = message.guild
-                for user_id in queue:
-                    member = guild.get_member(user_id)
-                    if member:
-                        description_parts.append(f"{member.mention}")
-            else:
-                description_parts.append("*No players in queue*")
-            
-            # Add moderate padding to keep box visible but shorter (3-5 lines instead of 10)
-            padding_lines = max(0, 5 - len(queue))
-            for _ in range(padding_lines):
-                description_parts.append("")
-            
-            timestamp = f"<t:{int(datetime.now().timestamp())}:t>"  # Shows time in user's local timezone
-            description_parts.append(timestamp)
-            
-            embed.description = "\n".join(description_parts)
-            
-            # Send new message at bottom
-            new_message = await message.channel.send(embed=embed, view=view)
-            
-            # Delete old message
-            try:
-                await old_message.delete()
-            except:
-                pass  # Message might already be deleted
-            
-            # Update references
-            view.message = new_message
-            sticky_queue_messages[message.channel.id]['message'] = new_message
-            
-        except Exception as e:
-            logger.error(f"Error in sticky message handler: {e}")
-    
     # Process commands
     await bot.process_commands(message)
 
@@ -2322,36 +4295,170 @@ async def on_message(message):
 # SCHEDULED TASKS
 # ============================================================================
 
-@tasks.loop(minutes=5)
-async def check_scheduled_tasks():
-    """Check and execute scheduled commands"""
+def parse_schedule_times(schedule_times: Optional[str]) -> List[datetime]:
+    """Sorted run times from a scheduled_tasks.schedule_times JSON list (local, naive)"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('SELECT * FROM scheduled_tasks')
-        tasks = c.fetchall()
-        conn.close()
+        values = json.loads(schedule_times) if schedule_times else []
+    except (TypeError, ValueError):
+        return []
+    times = []
+    for value in values:
+        try:
+            run_at = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            continue
+        if run_at.tzinfo is not None:
+            run_at = run_at.astimezone().replace(tzinfo=None)
+        times.append(run_at)
+    return sorted(times)
+
+def next_schedule_time(schedule_times: Optional[str], after: datetime) -> Optional[datetime]:
+    """First run time strictly after `after`, or None when the schedule is used up"""
+    times = parse_schedule_times(schedule_times)
+    index = bisect.bisect_right(times, after)
+    return times[index] if index < len(times) else None
+
+def _backfill_next_run(c) -> int:
+    """Fill next_run_at for tasks stored without one - created before the column existed or
+    inserted by hand (past times are not replayed)"""
+    c.execute('SELECT task_id, schedule_times, last_fired_at FROM scheduled_tasks WHERE next_run_at IS NULL')
+    now = datetime.now()
+    updates = []
+    for task_id, schedule_times, last_fired_at in c.fetchall():
+        after = max(now, datetime.fromisoformat(last_fired_at)) if last_fired_at else now
+        run_at = next_schedule_time(schedule_times, after)
+        if run_at:
+            updates.append((run_at.isoformat(timespec='seconds'), task_id))
+    c.executemany('UPDATE scheduled_tasks SET next_run_at=? WHERE task_id=?', updates)
+    return len(updates)
+
+class TaskScheduler:
+    """Runs scheduled_tasks at their schedule times.
+
+    Tasks due within SCHEDULER_LOOKAHEAD_HOURS are loaded with one indexed query on
+    next_run_at into a min-heap of (run_at, task_id), and a single background task sleeps
+    until the heap's head is due or the next refill. Each refill first fills next_run_at for
+    rows stored without one and forgets tasks whose rows were deleted. Each run advances
+    last_fired_at/next_run_at in one UPDATE, so a task fires once per schedule time across
+    restarts; runs missed while the bot was down fire once on startup. Superseded heap
+    entries are skipped lazily instead of being removed."""
+
+    COLUMNS = 'task_id, guild_id, channel_id, command_name, command_args, schedule_times, next_run_at'
+
+    def __init__(self, executor: DatabaseExecutor, lookahead_hours: float = SCHEDULER_LOOKAHEAD_HOURS):
+        self.executor = executor
+        self.lookahead = timedelta(hours=lookahead_hours)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._tasks: Dict[int, Dict] = {}  # task_id -> row of every task currently in the heap
+        self._horizon = None  # everything due before this is loaded
+        self._runner = None
+        self.loads = 0
+        self.fired = 0
+        self.failed = 0
+        self.late_ms = 0.0  # total delay between run_at and actually firing
+
+    def start(self):
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+    def _push(self, row: Dict):
+        run_at = datetime.fromisoformat(row['next_run_at'])
+        if self._horizon is not None and run_at >= self._horizon:
+            return  # picked up by a later refill
+        self._tasks[row['task_id']] = row
+        heapq.heappush(self._heap, (run_at, row['task_id']))
+
+    async def _refill(self, now: datetime):
+        horizon = now + self.lookahead
+        await self.executor.transaction(lambda conn: _backfill_next_run(conn.cursor()))
+        rows = await self.executor.fetchall(
+            f'SELECT {self.COLUMNS} FROM scheduled_tasks WHERE next_run_at < ? ORDER BY next_run_at',
+            (horizon.isoformat(timespec='seconds'),)
+        )
+        self._horizon = horizon
+        self.loads += 1
+        rows = [dict(zip(self.COLUMNS.split(', '), row)) for row in rows]
+        loaded = {row['task_id'] for row in rows}
+        for task_id in [task_id for task_id in self._tasks if task_id not in loaded]:
+            del self._tasks[task_id]  # deleted or moved past the horizon since it was queued
+        for row in rows:
+            current = self._tasks.get(row['task_id'])
+            if current is None or current['next_run_at'] != row['next_run_at']:
+                self._push(row)
+
+    async def _run(self):
+        while True:
+            try:
+                now = datetime.now()
+                if self._horizon is None or now >= self._horizon - self.lookahead / 2:
+                    await self._refill(now)
+                while self._heap and self._heap[0][0] <= now:
+                    run_at, task_id = heapq.heappop(self._heap)
+                    row = self._tasks.get(task_id)
+                    if row is None or datetime.fromisoformat(row['next_run_at']) != run_at:
+                        continue  # removed or rescheduled since it was pushed
+                    del self._tasks[task_id]
+                    await self._fire(row, run_at, now)
+                
+                wake_at = self._horizon - self.lookahead / 2
+                if self._heap:
+                    wake_at = min(wake_at, self._heap[0][0])
+                await asyncio.sleep(max(0.0, (wake_at - datetime.now()).total_seconds()))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in scheduled tasks: {e}", exc_info=True)
+                await asyncio.sleep(60)
+
+    async def _fire(self, row: Dict, run_at: datetime, now: datetime):
+        # Advance the cursor first; a row deleted or rescheduled since it was loaded matches
+        # nothing and doesn't fire. Missed runs are not replayed one by one.
+        next_run = next_schedule_time(row['schedule_times'], max(run_at, now))
+        scheduled_at = row['next_run_at']
+        row['next_run_at'] = next_run.isoformat(timespec='seconds') if next_run else None
+        result = await self.executor.execute(
+            'UPDATE scheduled_tasks SET last_fired_at=?, next_run_at=? WHERE task_id=? AND next_run_at=?',
+            (run_at.isoformat(timespec='seconds'), row['next_run_at'], row['task_id'], scheduled_at)
+        )
+        if not result.rowcount:
+            return
         
-        current_time = datetime.now()
+        try:
+            guild = bot.get_guild(row['guild_id'])
+            if guild:
+                logger.info(f"Executing scheduled task: {row['command_name']}")
+                # Would execute the command here
+            self.fired += 1
+            self.late_ms += (now - run_at).total_seconds() * 1000
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Scheduled task {row['task_id']} failed: {e}")
         
-        for task in tasks:
-            task_id, guild_id, channel_id, command_name, command_args, schedule_times, created_by, created_at = task
-            times = json.loads(schedule_times) if schedule_times else []
-            
-            for time_str in times:
-                # Parse time
-                try:
-                    scheduled_time = datetime.fromisoformat(time_str)
-                    if abs((current_time - scheduled_time).total_seconds()) < 300:  # Within 5 minutes
-                        # Execute command
-                        guild = bot.get_guild(guild_id)
-                        if guild:
-                            logger.info(f"Executing scheduled task: {command_name}")
-                            # Would execute the command here
-                except:
-                    pass
-    except Exception as e:
-        logger.error(f"Error in scheduled tasks: {e}")
+        if next_run:
+            self._push(row)
+
+    def stats(self) -> Dict:
+        return {
+            'queued': len(self._tasks),
+            'next_run': min((row['next_run_at'] for row in self._tasks.values()), default=None),
+            'loads': self.loads,
+            'fired': self.fired,
+            'failed': self.failed,
+            'avg_late_ms': self.late_ms / self.fired if self.fired else 0.0,
+        }
+
+
+task_scheduler = TaskScheduler(db)
+
+@tasks.loop(seconds=AUDIT_LOG_FLUSH_SECONDS)
+async def flush_audit_logs():
+    """Write out buffered command/activity logs that have aged past the flush interval"""
+    audit_log.flush_if_due()
+
+@tasks.loop(seconds=STATE_JOURNAL_FLUSH_SECONDS)
+async def flush_state_journal():
+    """Write out queue/match state changes that have waited past the flush interval"""
+    state_journal.flush_if_due()
 
 # ============================================================================
 # INTERACTIVE SETUP VIEWS & MODALS
@@ -2497,7 +4604,7 @@ class TeamSizeModal(discord.ui.Modal, title="Team Size"):
                 'game_mode': 'mix'
             }
             
-            save_queue_settings(settings)
+            await save_queue_settings(settings)
             log_command(interaction.guild.id, interaction.user.id, "setup", True)
             
             logger.info(f"Queue '{self.queue_name}' created in guild {interaction.guild.id}")
@@ -2844,55 +4951,21 @@ async def startqueue(interaction: discord.Interaction, queue_name: str = "defaul
     try:
         await interaction.response.defer()
         
-        settings = get_queue_settings(interaction.guild.id, queue_name)
+        settings = await get_queue_settings(interaction.guild.id, queue_name)
         queue = get_queue(interaction.guild.id, queue_name)
         
         # NeatQueue style embed
-        # Show the actual queue name exactly as it was entered
-        queue_display_name = queue_name if queue_name != "default" else "Queue"
-        
-        embed = discord.Embed(
-            title=queue_display_name,
-            color=0xed4245  # Discord red color for left border
-        )
-        
-        # Build description - shorter box with less padding
-        description_parts = []
-        description_parts.append(f"**Queue {len(queue)}/{settings['team_size']*2}**")
-        description_parts.append("")  # Empty line for spacing
-        
-        # Show players in queue with mentions
-        if queue:
-            for user_id in queue:
-                member = interaction.guild.get_member(user_id)
-                if member:
-                    description_parts.append(f"{member.mention}")
-        else:
-            description_parts.append("*No players in queue*")
-        
-        # Add moderate padding to keep box visible but shorter (3-5 lines instead of 10)
-        padding_lines = max(0, 5 - len(queue))
-        for _ in range(padding_lines):
-            description_parts.append("")
-        
-        # Add timestamp - Discord format automatically adjusts to user's timezone
-        timestamp = f"<t:{int(datetime.now().timestamp())}:t>"  # Shows time in user's local timezone
-        description_parts.append(timestamp)
-        
-        embed.description = "\n".join(description_parts)
+        embed = build_queue_embed(interaction.guild, queue_name, queue, settings['team_size'])
         
         view = QueueView(queue_name)
         message = await interaction.followup.send(embed=embed, view=view)
         view.message = message  # Store message reference for sticky updates
+        state_journal.put(state_key('queue_message', interaction.channel.id, queue_name),
+                          {'guild_id': interaction.guild.id, 'message_id': message.id})
         
         # If sticky message is enabled, track this message
         if settings.get('sticky_message', 0):
-            sticky_queue_messages[interaction.channel.id] = {
-                'message': message,
-                'view': view,
-                'queue_name': queue_name,
-                'guild_id': interaction.guild.id
-            }
+            sticky_manager.register(interaction.channel.id, message, view, queue_name, interaction.guild.id)
             logger.info(f"Sticky queue registered for channel {interaction.channel.id}")
         
         log_command(interaction.guild.id, interaction.user.id, "startqueue", True)
@@ -2907,13 +4980,11 @@ async def startqueue(interaction: discord.Interaction, queue_name: str = "defaul
 @app_commands.describe(queue_name="Name of the queue")
 async def clearqueue(interaction: discord.Interaction, queue_name: str = "default"):
     """Clear all players from queue"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    queue = get_queue(interaction.guild.id, queue_name)
-    count = len(queue)
-    queue.clear()
+    count = await get_queue(interaction.guild.id, queue_name).clear()
     
     await interaction.response.send_message(f"✅ Cleared {count} player(s) from queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "clearqueue", True)
@@ -2923,13 +4994,13 @@ async def clearqueue(interaction: discord.Interaction, queue_name: str = "defaul
 @app_commands.describe(queue_name="Name of the queue")
 async def lockqueue(interaction: discord.Interaction, queue_name: str = "default"):
     """Lock queue to prevent new joins"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['locked'] = 1
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     await interaction.response.send_message(f"🔒 Queue **{queue_name}** locked!")
     log_command(interaction.guild.id, interaction.user.id, "lockqueue", True)
@@ -2939,13 +5010,13 @@ async def lockqueue(interaction: discord.Interaction, queue_name: str = "default
 @app_commands.describe(queue_name="Name of the queue")
 async def unlockqueue(interaction: discord.Interaction, queue_name: str = "default"):
     """Unlock queue to allow new joins"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['locked'] = 0
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     await interaction.response.send_message(f"🔓 Queue **{queue_name}** unlocked!")
     log_command(interaction.guild.id, interaction.user.id, "unlockqueue", True)
@@ -2955,7 +5026,7 @@ async def unlockqueue(interaction: discord.Interaction, queue_name: str = "defau
 @app_commands.describe(limit="Number of messages to check (max 100)")
 async def purge(interaction: discord.Interaction, limit: int = 50):
     """Purge channel messages except queue interface"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
@@ -2984,17 +5055,14 @@ async def purge(interaction: discord.Interaction, limit: int = 50):
 @app_commands.describe(user="User to remove", queue_name="Queue name")
 async def removeuser(interaction: discord.Interaction, user: discord.Member, queue_name: str = "default"):
     """Remove specific user from queue"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    queue = get_queue(interaction.guild.id, queue_name)
-    
-    if user.id not in queue:
+    if not await get_queue(interaction.guild.id, queue_name).remove(user.id):
         await interaction.response.send_message(f"❌ {user.mention} is not in the queue!", ephemeral=True)
         return
     
-    queue.remove(user.id)
     await interaction.response.send_message(f"✅ Removed {user.mention} from queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "removeuser", True)
 
@@ -3003,12 +5071,12 @@ async def removeuser(interaction: discord.Interaction, user: discord.Member, que
 @app_commands.describe(user="User to add", queue_name="Queue name")
 async def adduser(interaction: discord.Interaction, user: discord.Member, queue_name: str = "default"):
     """Add specific user to queue"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
     queue = get_queue(interaction.guild.id, queue_name)
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     
     if user.id in queue:
         await interaction.response.send_message(f"❌ {user.mention} is already in the queue!", ephemeral=True)
@@ -3018,8 +5086,8 @@ async def adduser(interaction: discord.Interaction, user: discord.Member, queue_
         await interaction.response.send_message(f"❌ Queue is full!", ephemeral=True)
         return
     
-    queue.append(user.id)
-    get_or_create_player(user.id, user.name)
+    await queue.add(user.id)
+    await get_or_create_player(user.id, user.name)
     
     await interaction.response.send_message(f"✅ Added {user.mention} to queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "adduser", True)
@@ -3033,7 +5101,7 @@ async def adduser(interaction: discord.Interaction, user: discord.Member, queue_
 @app_commands.describe(size="Players per team (1-20)", queue_name="Queue name")
 async def setteamsize(interaction: discord.Interaction, size: int, queue_name: str = "default"):
     """Set number of players per team"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
@@ -3041,9 +5109,9 @@ async def setteamsize(interaction: discord.Interaction, size: int, queue_name: s
         await interaction.response.send_message("❌ Team size must be between 1 and 20!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['team_size'] = size
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     await interaction.response.send_message(f"✅ Set team size to {size} for queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "setteamsize", True)
@@ -3062,13 +5130,13 @@ async def setteamsize(interaction: discord.Interaction, size: int, queue_name: s
 ])
 async def setteammode(interaction: discord.Interaction, mode: str, queue_name: str = "default"):
     """Set team selection mode"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['team_selection_mode'] = mode
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     await interaction.response.send_message(f"✅ Set team mode to **{mode}** for queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "setteammode", True)
@@ -3083,13 +5151,13 @@ async def setteammode(interaction: discord.Interaction, mode: str, queue_name: s
 ])
 async def setcaptainmode(interaction: discord.Interaction, mode: str, queue_name: str = "default"):
     """Set how captains are chosen"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['captain_mode'] = mode
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     await interaction.response.send_message(f"✅ Set captain mode to **{mode}** for queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "setcaptainmode", True)
@@ -3108,12 +5176,12 @@ async def setteamnames(
     queue_name: str = "default"
 ):
     """Set custom team names for a queue"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
     try:
-        settings = get_queue_settings(interaction.guild.id, queue_name)
+        settings = await get_queue_settings(interaction.guild.id, queue_name)
         
         # Check if queue exists
         if settings['guild_id'] == 0:  # Default settings means queue doesn't exist
@@ -3126,7 +5194,7 @@ async def setteamnames(
         # Update team names
         settings['team1_name'] = team1_name
         settings['team2_name'] = team2_name
-        save_queue_settings(settings)
+        await save_queue_settings(settings)
         
         embed = discord.Embed(
             title="✅ Team Names Updated!",
@@ -3161,13 +5229,13 @@ async def setteamnames(
 @app_commands.describe(enabled="Enable or disable", queue_name="Queue name")
 async def setmapvoting(interaction: discord.Interaction, enabled: bool, queue_name: str = "default"):
     """Toggle map voting"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['map_voting'] = 1 if enabled else 0
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     status = "enabled" if enabled else "disabled"
     await interaction.response.send_message(f"✅ Map voting {status} for queue **{queue_name}**!")
@@ -3192,22 +5260,15 @@ GAME_MODE_ORDER = ["HP", "SND", "Overload"]
 ])
 async def addmap(interaction: discord.Interaction, map_name: str, queue_name: str = "default"):
     """Add map to voting pool"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        
         if map_name == "all":
-            added = []
-            for m in DEFAULT_MAPS:
-                c.execute('INSERT OR IGNORE INTO maps (guild_id, queue_name, map_name, game_mode) VALUES (?, ?, ?, ?)',
-                          (interaction.guild.id, queue_name, m, 'all'))
-                added.append(m)
-            conn.commit()
-            conn.close()
+            added = list(DEFAULT_MAPS)
+            await db.executemany('INSERT OR IGNORE INTO maps (guild_id, queue_name, map_name, game_mode) VALUES (?, ?, ?, ?)',
+                                 [(interaction.guild.id, queue_name, m, 'all') for m in added])
             
             map_list = ", ".join(f"**{m}**" for m in added)
             await interaction.response.send_message(
@@ -3215,10 +5276,8 @@ async def addmap(interaction: discord.Interaction, map_name: str, queue_name: st
                 f"Maps: {map_list}"
             )
         else:
-            c.execute('INSERT OR IGNORE INTO maps (guild_id, queue_name, map_name, game_mode) VALUES (?, ?, ?, ?)',
-                      (interaction.guild.id, queue_name, map_name, 'all'))
-            conn.commit()
-            conn.close()
+            await db.execute('INSERT OR IGNORE INTO maps (guild_id, queue_name, map_name, game_mode) VALUES (?, ?, ?, ?)',
+                             (interaction.guild.id, queue_name, map_name, 'all'))
             
             await interaction.response.send_message(f"✅ Added map **{map_name}** to queue **{queue_name}**!")
         
@@ -3232,17 +5291,13 @@ async def addmap(interaction: discord.Interaction, map_name: str, queue_name: st
 @app_commands.describe(map_name="Name of the map", queue_name="Queue name")
 async def removemap(interaction: discord.Interaction, map_name: str, queue_name: str = "default"):
     """Remove map from voting pool"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('DELETE FROM maps WHERE guild_id=? AND queue_name=? AND map_name=?',
-                  (interaction.guild.id, queue_name, map_name))
-        conn.commit()
-        conn.close()
+        await db.execute('DELETE FROM maps WHERE guild_id=? AND queue_name=? AND map_name=?',
+                         (interaction.guild.id, queue_name, map_name))
         
         await interaction.response.send_message(f"✅ Removed map **{map_name}** from queue **{queue_name}**!")
         log_command(interaction.guild.id, interaction.user.id, "removemap", True)
@@ -3261,13 +5316,13 @@ async def removemap(interaction: discord.Interaction, map_name: str, queue_name:
 ])
 async def setgamemode(interaction: discord.Interaction, mode: str, queue_name: str = "default"):
     """Set the game mode for a queue"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['game_mode'] = mode
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     mode_descriptions = {
         'hp': '🔥 **HP Only** — All matches will be Hardpoint',
@@ -3299,25 +5354,21 @@ async def setgamemode(interaction: discord.Interaction, mode: str, queue_name: s
 ])
 async def requiredrole(interaction: discord.Interaction, action: str, role: discord.Role, queue_name: str = "default"):
     """Manage required roles"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if action == "add":
-        c.execute('INSERT OR IGNORE INTO required_roles VALUES (?, ?, ?)',
-                  (interaction.guild.id, queue_name, role.id))
+        await db.execute('INSERT OR IGNORE INTO required_roles VALUES (?, ?, ?)',
+                         (interaction.guild.id, queue_name, role.id))
+        permission_cache.add_required_role(interaction.guild.id, queue_name, role.id)
         msg = f"✅ Added required role {role.mention} to queue **{queue_name}**!"
     else:
-        c.execute('DELETE FROM required_roles WHERE guild_id=? AND queue_name=? AND role_id=?',
-                  (interaction.guild.id, queue_name, role.id))
+        await db.execute('DELETE FROM required_roles WHERE guild_id=? AND queue_name=? AND role_id=?',
+                         (interaction.guild.id, queue_name, role.id))
+        permission_cache.remove_required_role(interaction.guild.id, queue_name, role.id)
         msg = f"✅ Removed required role {role.mention} from queue **{queue_name}**!"
     
-    conn.commit()
-    conn.close()
-    
     await interaction.response.send_message(msg)
     log_command(interaction.guild.id, interaction.user.id, "requiredrole", True)
 
@@ -3335,31 +5386,25 @@ async def requiredrole(interaction: discord.Interaction, action: str, role: disc
 ])
 async def blacklist(interaction: discord.Interaction, action: str, user: discord.Member, queue_name: str = "default", reason: str = "No reason provided"):
     """Blacklist/unblacklist users"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if action == "add":
-        c.execute('INSERT OR REPLACE INTO blacklist VALUES (?, ?, ?, ?, ?, ?)',
-                  (interaction.guild.id, queue_name, user.id, reason, 
-                   datetime.now().isoformat(), interaction.user.id))
+        await db.execute('INSERT OR REPLACE INTO blacklist VALUES (?, ?, ?, ?, ?, ?)',
+                         (interaction.guild.id, queue_name, user.id, reason, 
+                          datetime.now().isoformat(), interaction.user.id))
+        permission_cache.blacklist_user(interaction.guild.id, queue_name, user.id)
         msg = f"✅ Blacklisted {user.mention} from queue **{queue_name}**!\nReason: {reason}"
         
         # Remove from queue if currently in it
-        queue = get_queue(interaction.guild.id, queue_name)
-        if user.id in queue:
-            queue.remove(user.id)
+        await get_queue(interaction.guild.id, queue_name).remove(user.id)
     else:
-        c.execute('DELETE FROM blacklist WHERE guild_id=? AND queue_name=? AND user_id=?',
-                  (interaction.guild.id, queue_name, user.id))
+        await db.execute('DELETE FROM blacklist WHERE guild_id=? AND queue_name=? AND user_id=?',
+                         (interaction.guild.id, queue_name, user.id))
+        permission_cache.unblacklist_user(interaction.guild.id, queue_name, user.id)
         msg = f"✅ Removed {user.mention} from blacklist for queue **{queue_name}**!"
     
-    conn.commit()
-    conn.close()
-    
     await interaction.response.send_message(msg)
     log_command(interaction.guild.id, interaction.user.id, "blacklist", True)
 
@@ -3376,21 +5421,17 @@ async def staffroles(interaction: discord.Interaction, action: str, role: discor
         await interaction.response.send_message("❌ Only admins can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if action == "add":
-        c.execute('INSERT OR IGNORE INTO staff_roles VALUES (?, ?)',
-                  (interaction.guild.id, role.id))
+        await db.execute('INSERT OR IGNORE INTO staff_roles VALUES (?, ?)',
+                         (interaction.guild.id, role.id))
+        permission_cache.add_staff_role(interaction.guild.id, role.id)
         msg = f"✅ Added {role.mention} as staff role!"
     else:
-        c.execute('DELETE FROM staff_roles WHERE guild_id=? AND role_id=?',
-                  (interaction.guild.id, role.id))
+        await db.execute('DELETE FROM staff_roles WHERE guild_id=? AND role_id=?',
+                         (interaction.guild.id, role.id))
+        permission_cache.remove_staff_role(interaction.guild.id, role.id)
         msg = f"✅ Removed {role.mention} from staff roles!"
     
-    conn.commit()
-    conn.close()
-    
     await interaction.response.send_message(msg)
     log_command(interaction.guild.id, interaction.user.id, "staffroles", True)
 
@@ -3411,11 +5452,11 @@ async def staffroles(interaction: discord.Interaction, action: str, role: discor
 ])
 async def resultschannel(interaction: discord.Interaction, action: str, channel: Optional[discord.TextChannel] = None, queue_name: str = "default"):
     """Set results announcement channel"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     
     if action == "set":
         if not channel:
@@ -3427,7 +5468,7 @@ async def resultschannel(interaction: discord.Interaction, action: str, channel:
         settings['results_channel'] = None
         msg = f"✅ Removed results channel for queue **{queue_name}**!"
     
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     await interaction.response.send_message(msg)
     log_command(interaction.guild.id, interaction.user.id, "resultschannel", True)
 
@@ -3436,13 +5477,13 @@ async def resultschannel(interaction: discord.Interaction, action: str, channel:
 @app_commands.describe(enabled="Enable or disable", queue_name="Queue name")
 async def automove(interaction: discord.Interaction, enabled: bool, queue_name: str = "default"):
     """Auto-move players to team voice channels"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['auto_move'] = 1 if enabled else 0
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     status = "enabled" if enabled else "disabled"
     await interaction.response.send_message(f"✅ Auto-move {status} for queue **{queue_name}**!")
@@ -3453,13 +5494,13 @@ async def automove(interaction: discord.Interaction, enabled: bool, queue_name:
 @app_commands.describe(enabled="Enable or disable", queue_name="Queue name")
 async def createchannels(interaction: discord.Interaction, enabled: bool, queue_name: str = "default"):
     """Toggle auto-creation of team channels"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['create_channels'] = 1 if enabled else 0
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     status = "enabled" if enabled else "disabled"
     await interaction.response.send_message(f"✅ Auto-create channels {status} for queue **{queue_name}**!")
@@ -3470,13 +5511,13 @@ async def createchannels(interaction: discord.Interaction, enabled: bool, queue_
 @app_commands.describe(category="Category for voice channels", queue_name="Queue name")
 async def channelcategory(interaction: discord.Interaction, category: discord.CategoryChannel, queue_name: str = "default"):
     """Set category for auto-created channels"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['channel_category'] = category.id
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     await interaction.response.send_message(f"✅ Team channels will be created in **{category.name}** for queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "channelcategory", True)
@@ -3486,13 +5527,13 @@ async def channelcategory(interaction: discord.Interaction, category: discord.Ca
 @app_commands.describe(enabled="Enable or disable", queue_name="Queue name")
 async def pingplayers(interaction: discord.Interaction, enabled: bool, queue_name: str = "default"):
     """Toggle pinging players when match starts"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['ping_players'] = 1 if enabled else 0
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     status = "enabled" if enabled else "disabled"
     await interaction.response.send_message(f"✅ Player pings {status} for queue **{queue_name}**!")
@@ -3507,13 +5548,13 @@ async def pingplayers(interaction: discord.Interaction, enabled: bool, queue_nam
 ])
 async def nametype(interaction: discord.Interaction, name_type: str, queue_name: str = "default"):
     """Set how names are displayed"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['name_type'] = name_type
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     display = "Discord names" if name_type == "discord" else "server nicknames"
     await interaction.response.send_message(f"✅ Will use {display} for queue **{queue_name}**!")
@@ -3524,13 +5565,13 @@ async def nametype(interaction: discord.Interaction, name_type: str, queue_name:
 @app_commands.describe(enabled="Enable or disable", queue_name="Queue name")
 async def stickymessage(interaction: discord.Interaction, enabled: bool, queue_name: str = "default"):
     """Toggle sticky message - queue stays at bottom of channel"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['sticky_message'] = 1 if enabled else 0
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     if enabled:
         # Try to find the existing queue message in this channel and register sticky tracking
@@ -3543,12 +5584,7 @@ async def stickymessage(interaction: discord.Interaction, enabled: bool, queue_n
                     # Found the queue message — register sticky tracking
                     view = QueueView(queue_name)
                     view.message = msg
-                    sticky_queue_messages[interaction.channel.id] = {
-                        'message': msg,
-                        'view': view,
-                        'queue_name': queue_name,
-                        'guild_id': interaction.guild.id
-                    }
+                    sticky_manager.register(interaction.channel.id, msg, view, queue_name, interaction.guild.id)
                     found = True
                     break
         
@@ -3564,8 +5600,7 @@ async def stickymessage(interaction: discord.Interaction, enabled: bool, queue_n
             )
     else:
         # Remove from sticky tracking
-        if interaction.channel.id in sticky_queue_messages:
-            del sticky_queue_messages[interaction.channel.id]
+        sticky_manager.unregister(interaction.channel.id)
         
         await interaction.response.send_message(
             f"✅ Sticky message disabled for queue **{queue_name}**!\n"
@@ -3601,7 +5636,7 @@ async def reportwin(interaction: discord.Interaction, team: int, queue_name: str
         team2 = match_data['team2']
         
         # Check permissions - must be staff or in the match
-        is_staff = is_user_staff(interaction.guild, interaction.user)
+        is_staff = await is_user_staff(interaction.guild, interaction.user)
         is_participant = interaction.user.id in team1 or interaction.user.id in team2
         
         if not (is_staff or is_participant):
@@ -3615,26 +5650,16 @@ async def reportwin(interaction: discord.Interaction, team: int, queue_name: str
         # Simple MMR: +25 for win, -25 for loss
         mmr_change = 25
         
-        # Update player stats
-        for user_id in winner_team:
-            update_player_stats(user_id, interaction.guild.id, queue_name, mmr_change, True)
-            # Apply rank roles
-            stats = get_queue_player_stats(user_id, interaction.guild.id, queue_name)
-            apply_mmr_ranks(interaction.guild, user_id, queue_name, stats['mmr'])
-        
-        for user_id in loser_team:
-            update_player_stats(user_id, interaction.guild.id, queue_name, -mmr_change, False)
-            # Apply rank roles
-            stats = get_queue_player_stats(user_id, interaction.guild.id, queue_name)
-            apply_mmr_ranks(interaction.guild, user_id, queue_name, stats['mmr'])
-        
-        # Update match in database
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('UPDATE matches SET winner=?, mmr_change=? WHERE match_id=?',
-                  (team, mmr_change, match_id))
-        conn.commit()
-        conn.close()
+        # Record the result and update every player's stats in one transaction
+        new_mmrs = await settle_match(match_id, interaction.guild.id, queue_name, team, team1, team2,
+                                      mmr_change)
+        if new_mmrs is None:
+            await interaction.followup.send("❌ This match has already been reported or cancelled!")
+            return
+        
+        # Apply rank roles
+        for user_id, mmr in new_mmrs.items():
+            await apply_mmr_ranks(interaction.guild, user_id, queue_name, mmr)
         
         # Create result embed
         embed = discord.Embed(
@@ -3644,8 +5669,8 @@ async def reportwin(interaction: discord.Interaction, team: int, queue_name: str
             timestamp=datetime.now()
         )
         
-        winner_names = [interaction.guild.get_member(uid).mention for uid in winner_team if interaction.guild.get_member(uid)]
-        loser_names = [interaction.guild.get_member(uid).mention for uid in loser_team if interaction.guild.get_member(uid)]
+        winner_names = [f"{interaction.guild.get_member(uid).mention} ({new_mmrs.get(uid, '?')})" for uid in winner_team if interaction.guild.get_member(uid)]
+        loser_names = [f"{interaction.guild.get_member(uid).mention} ({new_mmrs.get(uid, '?')})" for uid in loser_team if interaction.guild.get_member(uid)]
         
         embed.add_field(
             name=f"🥇 Winners - Team {team}",
@@ -3664,7 +5689,7 @@ async def reportwin(interaction: discord.Interaction, team: int, queue_name: str
         )
         
         # Send to results channel
-        settings = get_queue_settings(interaction.guild.id, queue_name)
+        settings = await get_queue_settings(interaction.guild.id, queue_name)
         if settings['results_channel']:
             channel = interaction.guild.get_channel(settings['results_channel'])
             if channel:
@@ -3674,6 +5699,9 @@ async def reportwin(interaction: discord.Interaction, team: int, queue_name: str
         
         # Clear active match
         del active_matches[interaction.guild.id][queue_name]
+        state_journal.delete(state_key('match', interaction.guild.id, queue_name))
+        match_votes.close(match_id)
+        get_queue(interaction.guild.id, queue_name).end_match()
         
         log_command(interaction.guild.id, interaction.user.id, "reportwin", True)
         
@@ -3687,7 +5715,7 @@ async def reportwin(interaction: discord.Interaction, team: int, queue_name: str
 @app_commands.describe(queue_name="Queue name")
 async def cancelmatch(interaction: discord.Interaction, queue_name: str = "default"):
     """Cancel match without MMR changes"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
@@ -3699,14 +5727,13 @@ async def cancelmatch(interaction: discord.Interaction, queue_name: str = "defau
     match_id = match_data['match_id']
     
     # Mark as cancelled in database
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('UPDATE matches SET cancelled=1 WHERE match_id=?', (match_id,))
-    conn.commit()
-    conn.close()
+    await db.execute('UPDATE matches SET cancelled=1 WHERE match_id=?', (match_id,))
     
     # Clear active match
     del active_matches[interaction.guild.id][queue_name]
+    state_journal.delete(state_key('match', interaction.guild.id, queue_name))
+    match_votes.close(match_id)
+    get_queue(interaction.guild.id, queue_name).end_match()
     
     await interaction.response.send_message(f"✅ Match cancelled for queue **{queue_name}**! No MMR changes.")
     log_command(interaction.guild.id, interaction.user.id, "cancelmatch", True)
@@ -3718,15 +5745,11 @@ async def matchhistory(interaction: discord.Interaction, limit: int = 10, queue_
     """View match history"""
     await interaction.response.defer()
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''SELECT match_id, timestamp, team1, team2, winner, mmr_change, match_number 
-                 FROM matches 
-                 WHERE guild_id=? AND queue_name=? AND cancelled=0 
-                 ORDER BY match_id DESC LIMIT ?''',
-              (interaction.guild.id, queue_name, min(limit, 25)))
-    matches = c.fetchall()
-    conn.close()
+    matches = await db.fetchall('''SELECT match_id, timestamp, team1, team2, winner, mmr_change, match_number 
+                                   FROM matches 
+                                   WHERE guild_id=? AND queue_name=? AND cancelled=0 
+                                   ORDER BY match_id DESC LIMIT ?''',
+                                (interaction.guild.id, queue_name, min(limit, 25)))
     
     if not matches:
         await interaction.followup.send(f"❌ No match history for queue **{queue_name}**!")
@@ -3764,7 +5787,7 @@ async def stats(interaction: discord.Interaction, user: Optional[discord.Member]
     
     if queue_name:
         # Queue-specific stats
-        stats = get_queue_player_stats(target_user.id, interaction.guild.id, queue_name)
+        stats = await get_queue_player_stats(target_user.id, interaction.guild.id, queue_name)
         winrate = (stats['wins'] / stats['games_played'] * 100) if stats['games_played'] > 0 else 0
         
         embed = discord.Embed(
@@ -3780,7 +5803,7 @@ async def stats(interaction: discord.Interaction, user: Optional[discord.Member]
         embed.add_field(name="Win Rate", value=f"{winrate:.1f}%", inline=True)
     else:
         # Global stats
-        player = get_or_create_player(target_user.id, target_user.name)
+        player = await get_or_create_player(target_user.id, target_user.name)
         winrate = (player['wins'] / player['total_games'] * 100) if player['total_games'] > 0 else 0
         
         embed = discord.Embed(
@@ -3809,26 +5832,20 @@ async def leaderboard(interaction: discord.Interaction, limit: int = 10, queue_n
     """Display leaderboard"""
     await interaction.response.defer()
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if queue_name:
         # Queue-specific leaderboard
-        c.execute('''SELECT user_id, mmr, wins, losses, games_played 
-                     FROM queue_stats 
-                     WHERE guild_id=? AND queue_name=? 
-                     ORDER BY mmr DESC LIMIT ?''',
-                  (interaction.guild.id, queue_name, min(limit, 25)))
+        results = await db.fetchall('''SELECT user_id, mmr, wins, losses, games_played 
+                                       FROM queue_stats 
+                                       WHERE guild_id=? AND queue_name=? 
+                                       ORDER BY mmr DESC LIMIT ?''',
+                                    (interaction.guild.id, queue_name, min(limit, 25)))
         title = f"🏆 Leaderboard - {queue_name}"
     else:
         # Global leaderboard
-        c.execute('SELECT user_id, username, mmr, wins, losses FROM players ORDER BY mmr DESC LIMIT ?',
-                  (min(limit, 25),))
+        results = await db.fetchall('SELECT user_id, username, mmr, wins, losses FROM players ORDER BY mmr DESC LIMIT ?',
+                                    (min(limit, 25),))
         title = "🏆 Global Leaderboard"
     
-    results = c.fetchall()
-    conn.close()
-    
     if not results:
         await interaction.followup.send("❌ No players found!")
         return
@@ -3862,40 +5879,31 @@ async def rank(interaction: discord.Interaction, user: Optional[discord.Member]
     """Show player's rank position"""
     target_user = user or interaction.user
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if queue_name:
-        c.execute('''SELECT COUNT(*) + 1 FROM queue_stats 
-                     WHERE guild_id=? AND queue_name=? AND mmr > (
-                         SELECT mmr FROM queue_stats 
-                         WHERE guild_id=? AND queue_name=? AND user_id=?
-                     )''',
-                  (interaction.guild.id, queue_name, interaction.guild.id, queue_name, target_user.id))
-        rank_pos = c.fetchone()[0]
-        
-        c.execute('SELECT COUNT(*) FROM queue_stats WHERE guild_id=? AND queue_name=?',
-                  (interaction.guild.id, queue_name))
-        total = c.fetchone()[0]
+        rank_pos = (await db.fetchone('''SELECT COUNT(*) + 1 FROM queue_stats 
+                                         WHERE guild_id=? AND queue_name=? AND mmr > (
+                                             SELECT mmr FROM queue_stats 
+                                             WHERE guild_id=? AND queue_name=? AND user_id=?
+                                         )''',
+                                      (interaction.guild.id, queue_name, interaction.guild.id, queue_name, target_user.id)))[0]
         
-        stats = get_queue_player_stats(target_user.id, interaction.guild.id, queue_name)
+        total = (await db.fetchone('SELECT COUNT(*) FROM queue_stats WHERE guild_id=? AND queue_name=?',
+                                   (interaction.guild.id, queue_name)))[0]
+        
+        stats = await get_queue_player_stats(target_user.id, interaction.guild.id, queue_name)
         mmr = stats['mmr']
         title = f"Rank in {queue_name}"
     else:
-        c.execute('''SELECT COUNT(*) + 1 FROM players WHERE mmr > (
-                         SELECT mmr FROM players WHERE user_id=?
-                     )''', (target_user.id,))
-        rank_pos = c.fetchone()[0]
+        rank_pos = (await db.fetchone('''SELECT COUNT(*) + 1 FROM players WHERE mmr > (
+                                             SELECT mmr FROM players WHERE user_id=?
+                                         )''', (target_user.id,)))[0]
         
-        c.execute('SELECT COUNT(*) FROM players')
-        total = c.fetchone()[0]
+        total = (await db.fetchone('SELECT COUNT(*) FROM players'))[0]
         
-        player = get_or_create_player(target_user.id, target_user.name)
+        player = await get_or_create_player(target_user.id, target_user.name)
         mmr = player['mmr']
         title = "Global Rank"
     
-    conn.close()
-    
     percentile = (1 - (rank_pos / total)) * 100 if total > 0 else 0
     
     embed = discord.Embed(
@@ -3917,8 +5925,8 @@ async def rank(interaction: discord.Interaction, user: Optional[discord.Member]
 async def compare(interaction: discord.Interaction, user1: discord.Member, user2: discord.Member, queue_name: Optional[str] = None):
     """Compare stats between two players"""
     if queue_name:
-        stats1 = get_queue_player_stats(user1.id, interaction.guild.id, queue_name)
-        stats2 = get_queue_player_stats(user2.id, interaction.guild.id, queue_name)
+        stats1 = await get_queue_player_stats(user1.id, interaction.guild.id, queue_name)
+        stats2 = await get_queue_player_stats(user2.id, interaction.guild.id, queue_name)
         
         embed = discord.Embed(
             title=f"⚔️ Player Comparison - {queue_name}",
@@ -3933,8 +5941,8 @@ async def compare(interaction: discord.Interaction, user1: discord.Member, user2
         better = user1.name if stats1['mmr'] > stats2['mmr'] else user2.name
         embed.add_field(name="MMR Difference", value=f"{mmr_diff} ({better} higher)", inline=False)
     else:
-        player1 = get_or_create_player(user1.id, user1.name)
-        player2 = get_or_create_player(user2.id, user2.name)
+        player1 = await get_or_create_player(user1.id, user1.name)
+        player2 = await get_or_create_player(user2.id, user2.name)
         
         embed = discord.Embed(
             title="⚔️ Global Player Comparison",
@@ -3968,7 +5976,7 @@ async def compare(interaction: discord.Interaction, user1: discord.Member, user2
 @app_commands.describe(user="Target player", mmr="New MMR value", queue_name="Specific queue (optional)")
 async def setmmr(interaction: discord.Interaction, user: discord.Member, mmr: int, queue_name: Optional[str] = None):
     """Manually set player MMR"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
@@ -3976,23 +5984,17 @@ async def setmmr(interaction: discord.Interaction, user: discord.Member, mmr: in
         await interaction.response.send_message("❌ MMR cannot be negative!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if queue_name:
-        c.execute('UPDATE queue_stats SET mmr=? WHERE user_id=? AND guild_id=? AND queue_name=?',
-                  (mmr, user.id, interaction.guild.id, queue_name))
+        await db.execute('UPDATE queue_stats SET mmr=? WHERE user_id=? AND guild_id=? AND queue_name=?',
+                         (mmr, user.id, interaction.guild.id, queue_name))
         msg = f"✅ Set {user.mention}'s MMR to {mmr} in queue **{queue_name}**!"
     else:
-        c.execute('UPDATE players SET mmr=? WHERE user_id=?', (mmr, user.id))
+        await db.execute('UPDATE players SET mmr=? WHERE user_id=?', (mmr, user.id))
         msg = f"✅ Set {user.mention}'s global MMR to {mmr}!"
     
-    conn.commit()
-    conn.close()
-    
     # Apply rank roles if queue specified
     if queue_name:
-        apply_mmr_ranks(interaction.guild, user.id, queue_name, mmr)
+        await apply_mmr_ranks(interaction.guild, user.id, queue_name, mmr)
     
     await interaction.response.send_message(msg)
     log_command(interaction.guild.id, interaction.user.id, "setmmr", True)
@@ -4002,30 +6004,24 @@ async def setmmr(interaction: discord.Interaction, user: discord.Member, mmr: in
 @app_commands.describe(user="Target player", amount="Amount to add/subtract", queue_name="Specific queue (optional)")
 async def adjustmmr(interaction: discord.Interaction, user: discord.Member, amount: int, queue_name: Optional[str] = None):
     """Add or subtract MMR"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if queue_name:
-        stats = get_queue_player_stats(user.id, interaction.guild.id, queue_name)
+        stats = await get_queue_player_stats(user.id, interaction.guild.id, queue_name)
         new_mmr = max(0, stats['mmr'] + amount)
-        c.execute('UPDATE queue_stats SET mmr=? WHERE user_id=? AND guild_id=? AND queue_name=?',
-                  (new_mmr, user.id, interaction.guild.id, queue_name))
+        await db.execute('UPDATE queue_stats SET mmr=? WHERE user_id=? AND guild_id=? AND queue_name=?',
+                         (new_mmr, user.id, interaction.guild.id, queue_name))
         msg = f"✅ Adjusted {user.mention}'s MMR by {amount:+d} to {new_mmr} in queue **{queue_name}**!"
         
-        apply_mmr_ranks(interaction.guild, user.id, queue_name, new_mmr)
+        await apply_mmr_ranks(interaction.guild, user.id, queue_name, new_mmr)
     else:
-        player = get_or_create_player(user.id, user.name)
+        player = await get_or_create_player(user.id, user.name)
         new_mmr = max(0, player['mmr'] + amount)
-        c.execute('UPDATE players SET mmr=? WHERE user_id=?', (new_mmr, user.id))
+        await db.execute('UPDATE players SET mmr=? WHERE user_id=?', (new_mmr, user.id))
         msg = f"✅ Adjusted {user.mention}'s global MMR by {amount:+d} to {new_mmr}!"
     
-    conn.commit()
-    conn.close()
-    
     await interaction.response.send_message(msg)
     log_command(interaction.guild.id, interaction.user.id, "adjustmmr", True)
 
@@ -4054,14 +6050,16 @@ async def confirmreset(interaction: discord.Interaction, queue_name: str):
         await interaction.response.send_message("❌ Only admins can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM queue_stats WHERE guild_id=? AND queue_name=?',
-              (interaction.guild.id, queue_name))
-    c.execute('DELETE FROM matches WHERE guild_id=? AND queue_name=?',
-              (interaction.guild.id, queue_name))
-    conn.commit()
-    conn.close()
+    def _reset_queue(conn):
+        c = conn.cursor()
+        c.execute('DELETE FROM queue_stats WHERE guild_id=? AND queue_name=?',
+                  (interaction.guild.id, queue_name))
+        c.execute('DELETE FROM matches WHERE guild_id=? AND queue_name=?',
+                  (interaction.guild.id, queue_name))
+        c.execute('DELETE FROM match_participants WHERE guild_id=? AND queue_name=?',
+                  (interaction.guild.id, queue_name))
+    
+    await db.transaction(_reset_queue)
     
     await interaction.response.send_message(f"✅ Reset all stats for queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "resetstats", True)
@@ -4071,25 +6069,19 @@ async def confirmreset(interaction: discord.Interaction, queue_name: str):
 @app_commands.describe(user="User to reset", queue_name="Specific queue (optional)")
 async def resetuser(interaction: discord.Interaction, user: discord.Member, queue_name: Optional[str] = None):
     """Reset user's stats"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if queue_name:
-        c.execute('UPDATE queue_stats SET mmr=1000, wins=0, losses=0, games_played=0 WHERE user_id=? AND guild_id=? AND queue_name=?',
-                  (user.id, interaction.guild.id, queue_name))
+        await db.execute('UPDATE queue_stats SET mmr=1000, wins=0, losses=0, games_played=0 WHERE user_id=? AND guild_id=? AND queue_name=?',
+                         (user.id, interaction.guild.id, queue_name))
         msg = f"✅ Reset {user.mention}'s stats for queue **{queue_name}**!"
     else:
-        c.execute('UPDATE players SET mmr=1000, wins=0, losses=0, total_games=0, win_streak=0, highest_mmr=1000 WHERE user_id=?',
-                  (user.id,))
+        await db.execute('UPDATE players SET mmr=1000, wins=0, losses=0, total_games=0, win_streak=0, highest_mmr=1000 WHERE user_id=?',
+                         (user.id,))
         msg = f"✅ Reset {user.mention}'s global stats!"
     
-    conn.commit()
-    conn.close()
-    
     await interaction.response.send_message(msg)
     log_command(interaction.guild.id, interaction.user.id, "resetuser", True)
 
@@ -4110,17 +6102,12 @@ async def resetuser(interaction: discord.Interaction, user: discord.Member, queu
 ])
 async def ranks(interaction: discord.Interaction, action: str, queue_name: str = "default"):
     """Manage auto-role ranks"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
     if action == "list":
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('SELECT rank_name, min_mmr, max_mmr, role_id FROM ranks WHERE guild_id=? AND queue_name=?',
-                  (interaction.guild.id, queue_name))
-        ranks = c.fetchall()
-        conn.close()
+        ranks = await get_rank_table(interaction.guild.id, queue_name)
         
         if not ranks:
             await interaction.response.send_message(f"No ranks configured for queue **{queue_name}**!", ephemeral=True)
@@ -4158,16 +6145,13 @@ async def ranks(interaction: discord.Interaction, action: str, queue_name: str =
 )
 async def rankadd(interaction: discord.Interaction, rank_name: str, min_mmr: int, max_mmr: int, role: discord.Role, queue_name: str = "default"):
     """Add MMR rank with auto-role"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT OR REPLACE INTO ranks VALUES (?, ?, ?, ?, ?, ?)',
-              (interaction.guild.id, queue_name, rank_name, min_mmr, max_mmr, role.id))
-    conn.commit()
-    conn.close()
+    await db.execute('INSERT OR REPLACE INTO ranks VALUES (?, ?, ?, ?, ?, ?)',
+                     (interaction.guild.id, queue_name, rank_name, min_mmr, max_mmr, role.id))
+    rank_table_cache.invalidate((interaction.guild.id, queue_name))
     
     await interaction.response.send_message(
         f"✅ Added rank **{rank_name}** ({min_mmr}-{max_mmr} MMR) → {role.mention} for queue **{queue_name}**!"
@@ -4179,16 +6163,13 @@ async def rankadd(interaction: discord.Interaction, rank_name: str, min_mmr: int
 @app_commands.describe(rank_name="Name of the rank", queue_name="Queue name")
 async def rankremove(interaction: discord.Interaction, rank_name: str, queue_name: str = "default"):
     """Remove MMR rank"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM ranks WHERE guild_id=? AND queue_name=? AND rank_name=?',
-              (interaction.guild.id, queue_name, rank_name))
-    conn.commit()
-    conn.close()
+    await db.execute('DELETE FROM ranks WHERE guild_id=? AND queue_name=? AND rank_name=?',
+                     (interaction.guild.id, queue_name, rank_name))
+    rank_table_cache.invalidate((interaction.guild.id, queue_name))
     
     await interaction.response.send_message(f"✅ Removed rank **{rank_name}** from queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "rankremove", True)
@@ -4203,19 +6184,15 @@ async def rankremove(interaction: discord.Interaction, rank_name: str, queue_nam
 @app_commands.describe(team_name="Name of your team")
 async def teamcreate(interaction: discord.Interaction, team_name: str):
     """Create a new team"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     # Check if user already owns a team
-    c.execute('SELECT team_id FROM teams WHERE guild_id=? AND owner_id=?',
-              (interaction.guild.id, interaction.user.id))
-    if c.fetchone():
-        conn.close()
+    if await db.fetchone('SELECT team_id FROM teams WHERE guild_id=? AND owner_id=?',
+                         (interaction.guild.id, interaction.user.id)):
         await interaction.response.send_message("❌ You already own a team! Disband it first to create a new one.", ephemeral=True)
         return
     
     # Create team
-    try:
+    def _create_team(conn):
+        c = conn.cursor()
         c.execute('INSERT INTO teams (guild_id, team_name, owner_id, created_at) VALUES (?, ?, ?, ?)',
                   (interaction.guild.id, team_name, interaction.user.id, datetime.now().isoformat()))
         team_id = c.lastrowid
@@ -4223,14 +6200,13 @@ async def teamcreate(interaction: discord.Interaction, team_name: str):
         # Add owner as member
         c.execute('INSERT INTO team_members VALUES (?, ?, ?)',
                   (team_id, interaction.user.id, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+    
+    try:
+        await db.transaction(_create_team)
         
         await interaction.response.send_message(f"✅ Created team **{team_name}**! You are the owner.")
         log_command(interaction.guild.id, interaction.user.id, "teamcreate", True)
     except sqlite3.IntegrityError:
-        conn.close()
         await interaction.response.send_message("❌ A team with that name already exists!", ephemeral=True)
 
 @bot.tree.command(name="teaminvite", description="🛡️ TEAMS — Invite a player to your team")
@@ -4238,30 +6214,21 @@ async def teamcreate(interaction: discord.Interaction, team_name: str):
 @app_commands.describe(user="User to invite")
 async def teaminvite(interaction: discord.Interaction, user: discord.Member):
     """Invite user to team"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     # Check if user owns a team
-    c.execute('SELECT team_id, team_name FROM teams WHERE guild_id=? AND owner_id=?',
-              (interaction.guild.id, interaction.user.id))
-    team = c.fetchone()
+    team = await db.fetchone('SELECT team_id, team_name FROM teams WHERE guild_id=? AND owner_id=?',
+                             (interaction.guild.id, interaction.user.id))
     
     if not team:
-        conn.close()
         await interaction.response.send_message("❌ You don't own a team!", ephemeral=True)
         return
     
     team_id, team_name = team
     
     # Check if user already in a team
-    c.execute('SELECT team_id FROM team_members WHERE user_id=?', (user.id,))
-    if c.fetchone():
-        conn.close()
+    if await db.fetchone('SELECT team_id FROM team_members WHERE user_id=?', (user.id,)):
         await interaction.response.send_message(f"❌ {user.mention} is already in a team!", ephemeral=True)
         return
     
-    conn.close()
-    
     await interaction.response.send_message(
         f"📨 {user.mention}, you've been invited to join team **{team_name}**!\n"
         f"Use `/teamjoin {team_name}` to accept."
@@ -4272,33 +6239,24 @@ async def teaminvite(interaction: discord.Interaction, user: discord.Member):
 @app_commands.describe(team_name="Name of the team")
 async def teamjoin(interaction: discord.Interaction, team_name: str):
     """Join a team"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     # Check if user already in a team
-    c.execute('SELECT team_id FROM team_members WHERE user_id=?', (interaction.user.id,))
-    if c.fetchone():
-        conn.close()
+    if await db.fetchone('SELECT team_id FROM team_members WHERE user_id=?', (interaction.user.id,)):
         await interaction.response.send_message("❌ You're already in a team! Leave it first.", ephemeral=True)
         return
     
     # Find team
-    c.execute('SELECT team_id FROM teams WHERE guild_id=? AND team_name=?',
-              (interaction.guild.id, team_name))
-    result = c.fetchone()
+    result = await db.fetchone('SELECT team_id FROM teams WHERE guild_id=? AND team_name=?',
+                               (interaction.guild.id, team_name))
     
     if not result:
-        conn.close()
         await interaction.response.send_message(f"❌ Team **{team_name}** doesn't exist!", ephemeral=True)
         return
     
     team_id = result[0]
     
     # Add to team
-    c.execute('INSERT INTO team_members VALUES (?, ?, ?)',
-              (team_id, interaction.user.id, datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
+    await db.execute('INSERT INTO team_members VALUES (?, ?, ?)',
+                     (team_id, interaction.user.id, datetime.now().isoformat()))
     
     await interaction.response.send_message(f"✅ Joined team **{team_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "teamjoin", True)
@@ -4307,21 +6265,14 @@ async def teamjoin(interaction: discord.Interaction, team_name: str):
 @app_commands.default_permissions(manage_guild=True)
 async def teamleave(interaction: discord.Interaction):
     """Leave team"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     # Check if owner
-    c.execute('SELECT team_id FROM teams WHERE owner_id=?', (interaction.user.id,))
-    if c.fetchone():
-        conn.close()
+    if await db.fetchone('SELECT team_id FROM teams WHERE owner_id=?', (interaction.user.id,)):
         await interaction.response.send_message("❌ You're the team owner! Use `/teamdisband` instead.", ephemeral=True)
         return
     
     # Remove from team
-    c.execute('DELETE FROM team_members WHERE user_id=?', (interaction.user.id,))
-    rows = c.rowcount
-    conn.commit()
-    conn.close()
+    result = await db.execute('DELETE FROM team_members WHERE user_id=?', (interaction.user.id,))
+    rows = result.rowcount
     
     if rows > 0:
         await interaction.response.send_message("✅ Left your team!")
@@ -4332,24 +6283,17 @@ async def teamleave(interaction: discord.Interaction):
 @app_commands.default_permissions(manage_guild=True)
 async def teamdisband(interaction: discord.Interaction):
     """Disband team"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     # Check if owner
-    c.execute('SELECT team_id, team_name FROM teams WHERE owner_id=?', (interaction.user.id,))
-    result = c.fetchone()
+    result = await db.fetchone('SELECT team_id, team_name FROM teams WHERE owner_id=?', (interaction.user.id,))
     
     if not result:
-        conn.close()
         await interaction.response.send_message("❌ You don't own a team!", ephemeral=True)
         return
     
     team_id, team_name = result
     
     # Delete team (cascade deletes members)
-    c.execute('DELETE FROM teams WHERE team_id=?', (team_id,))
-    conn.commit()
-    conn.close()
+    await db.execute('DELETE FROM teams WHERE team_id=?', (team_id,))
     
     await interaction.response.send_message(f"✅ Disbanded team **{team_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "teamdisband", True)
@@ -4359,31 +6303,23 @@ async def teamdisband(interaction: discord.Interaction):
 @app_commands.describe(team_name="Name of the team (optional)")
 async def teamstats(interaction: discord.Interaction, team_name: Optional[str] = None):
     """View team stats"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if team_name:
-        c.execute('SELECT * FROM teams WHERE guild_id=? AND team_name=?',
-                  (interaction.guild.id, team_name))
+        result = await db.fetchone('SELECT * FROM teams WHERE guild_id=? AND team_name=?',
+                                   (interaction.guild.id, team_name))
     else:
         # Find user's team
-        c.execute('''SELECT teams.* FROM teams 
-                     JOIN team_members ON teams.team_id = team_members.team_id 
-                     WHERE team_members.user_id=?''', (interaction.user.id,))
-    
-    result = c.fetchone()
+        result = await db.fetchone('''SELECT teams.* FROM teams 
+                                      JOIN team_members ON teams.team_id = team_members.team_id 
+                                      WHERE team_members.user_id=?''', (interaction.user.id,))
     
     if not result:
-        conn.close()
         await interaction.response.send_message("❌ Team not found!", ephemeral=True)
         return
     
     team_id, guild_id, team_name, owner_id, created_at, wins, losses = result
     
     # Get members
-    c.execute('SELECT user_id FROM team_members WHERE team_id=?', (team_id,))
-    member_ids = [row[0] for row in c.fetchall()]
-    conn.close()
+    member_ids = [row[0] for row in await db.fetchall('SELECT user_id FROM team_members WHERE team_id=?', (team_id,))]
     
     members = [interaction.guild.get_member(uid) for uid in member_ids]
     member_names = [m.mention for m in members if m]
@@ -4419,15 +6355,15 @@ async def teamstats(interaction: discord.Interaction, team_name: Optional[str] =
 ])
 async def lobbydetails(interaction: discord.Interaction, action: str, queue_name: str = "default"):
     """Manage lobby details"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     
     if action == "remove":
         settings['lobby_details_template'] = None
-        save_queue_settings(settings)
+        await save_queue_settings(settings)
         await interaction.response.send_message(f"✅ Removed lobby details for queue **{queue_name}**!")
     elif action == "preview":
         if not settings['lobby_details_template']:
@@ -4460,13 +6396,13 @@ async def lobbydetails(interaction: discord.Interaction, action: str, queue_name
 @app_commands.describe(template="Template with variables", queue_name="Queue name")
 async def lobbydetailsset(interaction: discord.Interaction, template: str, queue_name: str = "default"):
     """Set lobby details template"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    settings = get_queue_settings(interaction.guild.id, queue_name)
+    settings = await get_queue_settings(interaction.guild.id, queue_name)
     settings['lobby_details_template'] = template
-    save_queue_settings(settings)
+    await save_queue_settings(settings)
     
     await interaction.response.send_message(f"✅ Set lobby details template for queue **{queue_name}**!")
     log_command(interaction.guild.id, interaction.user.id, "lobbydetailsset", True)
@@ -4480,19 +6416,16 @@ async def lobbydetailsset(interaction: discord.Interaction, template: str, queue
 @app_commands.describe(limit="Number of commands to show")
 async def commandlog(interaction: discord.Interaction, limit: int = 10):
     """View command logs"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''SELECT user_id, command_name, timestamp, success 
-                 FROM command_logs 
-                 WHERE guild_id=? 
-                 ORDER BY log_id DESC LIMIT ?''',
-              (interaction.guild.id, min(limit, 25)))
-    logs = c.fetchall()
-    conn.close()
+    await audit_log.flush()
+    logs = await db.fetchall('''SELECT user_id, command_name, timestamp, success 
+                                FROM command_logs 
+                                WHERE guild_id=? 
+                                ORDER BY log_id DESC LIMIT ?''',
+                             (interaction.guild.id, min(limit, 25)))
     
     if not logs:
         await interaction.response.send_message("❌ No command logs found!", ephemeral=True)
@@ -4521,19 +6454,16 @@ async def commandlog(interaction: discord.Interaction, limit: int = 10):
 @app_commands.describe(limit="Number of activities to show", queue_name="Queue name")
 async def activitylog(interaction: discord.Interaction, limit: int = 10, queue_name: str = "default"):
     """View activity logs"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''SELECT user_id, action, timestamp 
-                 FROM activity_logs 
-                 WHERE guild_id=? AND queue_name=? 
-                 ORDER BY log_id DESC LIMIT ?''',
-              (interaction.guild.id, queue_name, min(limit, 25)))
-    logs = c.fetchall()
-    conn.close()
+    await audit_log.flush()
+    logs = await db.fetchall('''SELECT user_id, action, timestamp 
+                                FROM activity_logs 
+                                WHERE guild_id=? AND queue_name=? 
+                                ORDER BY log_id DESC LIMIT ?''',
+                             (interaction.guild.id, queue_name, min(limit, 25)))
     
     if not logs:
         await interaction.response.send_message("❌ No activity logs found!", ephemeral=True)
@@ -4565,14 +6495,10 @@ async def activitylog(interaction: discord.Interaction, limit: int = 10, queue_n
 @app_commands.describe(match_id="Match ID to view")
 async def viewmatch(interaction: discord.Interaction, match_id: int):
     """View detailed match information"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''SELECT match_id, queue_name, timestamp, team1, team2, winner, mmr_change, 
-                        team1_score, team2_score, map_played, lobby_details
-                 FROM matches WHERE match_id=? AND guild_id=?''',
-              (match_id, interaction.guild.id))
-    match = c.fetchone()
-    conn.close()
+    match = await db.fetchone('''SELECT match_id, queue_name, timestamp, team1, team2, winner, mmr_change, 
+                                        team1_score, team2_score, map_played, lobby_details
+                                 FROM matches WHERE match_id=? AND guild_id=?''',
+                              (match_id, interaction.guild.id))
     
     if not match:
         await interaction.response.send_message(f"❌ Match #{match_id} not found!", ephemeral=True)
@@ -4632,24 +6558,18 @@ async def recentmatches(interaction: discord.Interaction, user: Optional[discord
     target = user or interaction.user
     limit = min(limit, 10)
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if queue_name:
-        c.execute('''SELECT match_id, timestamp, team1, team2, winner, queue_name 
-                     FROM matches 
-                     WHERE guild_id=? AND queue_name=? AND (team1 LIKE ? OR team2 LIKE ?)
-                     ORDER BY match_id DESC LIMIT ?''',
-                  (interaction.guild.id, queue_name, f'%{target.id}%', f'%{target.id}%', limit))
+        matches = await db.fetchall('''SELECT p.match_id, m.timestamp, p.result, p.queue_name 
+                                       FROM match_participants p JOIN matches m ON m.match_id = p.match_id
+                                       WHERE p.guild_id=? AND p.queue_name=? AND p.user_id=?
+                                       ORDER BY p.match_id DESC LIMIT ?''',
+                                    (interaction.guild.id, queue_name, target.id, limit))
     else:
-        c.execute('''SELECT match_id, timestamp, team1, team2, winner, queue_name 
-                     FROM matches 
-                     WHERE guild_id=? AND (team1 LIKE ? OR team2 LIKE ?)
-                     ORDER BY match_id DESC LIMIT ?''',
-                  (interaction.guild.id, f'%{target.id}%', f'%{target.id}%', limit))
-    
-    matches = c.fetchall()
-    conn.close()
+        matches = await db.fetchall('''SELECT p.match_id, m.timestamp, p.result, p.queue_name 
+                                       FROM match_participants p JOIN matches m ON m.match_id = p.match_id
+                                       WHERE p.guild_id=? AND p.user_id=?
+                                       ORDER BY p.match_id DESC LIMIT ?''',
+                                    (interaction.guild.id, target.id, limit))
     
     if not matches:
         await interaction.response.send_message(f"❌ No recent matches found for {target.mention}!", ephemeral=True)
@@ -4660,13 +6580,8 @@ async def recentmatches(interaction: discord.Interaction, user: Optional[discord
         color=discord.Color.blue()
     )
     
-    for match_id, timestamp, team1_json, team2_json, winner, q_name in matches:
-        team1 = json.loads(team1_json)
-        team2 = json.loads(team2_json)
-        
-        # Determine if player won
-        player_team = 1 if target.id in team1 else 2
-        result = "✅ Win" if winner == player_team else "❌ Loss" if winner else "⚪ No result"
+    for match_id, timestamp, outcome, q_name in matches:
+        result = "✅ Win" if outcome == 'win' else "❌ Loss" if outcome == 'loss' else "⚪ No result"
         
         time_str = datetime.fromisoformat(timestamp).strftime("%m/%d %H:%M")
         embed.add_field(
@@ -4684,39 +6599,29 @@ async def winstreak(interaction: discord.Interaction, user: Optional[discord.Mem
     """View current and longest win streak"""
     target = user or interaction.user
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     # Get matches
     if queue_name:
-        c.execute('''SELECT match_id, team1, team2, winner 
-                     FROM matches 
-                     WHERE guild_id=? AND queue_name=? AND (team1 LIKE ? OR team2 LIKE ?) AND winner IS NOT NULL
-                     ORDER BY match_id DESC LIMIT 50''',
-                  (interaction.guild.id, queue_name, f'%{target.id}%', f'%{target.id}%'))
-        stats = get_queue_player_stats(target.id, interaction.guild.id, queue_name)
+        matches = await db.fetchall('''SELECT p.match_id, p.result 
+                                       FROM match_participants p JOIN matches m ON m.match_id = p.match_id
+                                       WHERE p.guild_id=? AND p.queue_name=? AND p.user_id=? AND p.result IS NOT NULL
+                                       ORDER BY p.match_id DESC LIMIT 50''',
+                                    (interaction.guild.id, queue_name, target.id))
+        stats = await get_queue_player_stats(target.id, interaction.guild.id, queue_name)
     else:
-        c.execute('''SELECT match_id, team1, team2, winner 
-                     FROM matches 
-                     WHERE guild_id=? AND (team1 LIKE ? OR team2 LIKE ?) AND winner IS NOT NULL
-                     ORDER BY match_id DESC LIMIT 50''',
-                  (interaction.guild.id, f'%{target.id}%', f'%{target.id}%'))
-        stats = get_or_create_player(target.id, target.name)
-    
-    matches = c.fetchall()
-    conn.close()
+        matches = await db.fetchall('''SELECT p.match_id, p.result 
+                                       FROM match_participants p JOIN matches m ON m.match_id = p.match_id
+                                       WHERE p.guild_id=? AND p.user_id=? AND p.result IS NOT NULL
+                                       ORDER BY p.match_id DESC LIMIT 50''',
+                                    (interaction.guild.id, target.id))
+        stats = await get_or_create_player(target.id, target.name)
     
     # Calculate current streak
     current_streak = 0
     longest_streak = 0
     temp_streak = 0
     
-    for match_id, team1_json, team2_json, winner in matches:
-        team1 = json.loads(team1_json)
-        team2 = json.loads(team2_json)
-        player_team = 1 if target.id in team1 else 2
-        
-        if winner == player_team:
+    for match_id, result in matches:
+        if result == 'win':
             temp_streak += 1
             longest_streak = max(longest_streak, temp_streak)
             if current_streak == 0:  # First match
@@ -4754,46 +6659,44 @@ async def modifyresult(interaction: discord.Interaction, match_id: int, winning_
         await interaction.response.send_message("❌ Winning team must be 0 (draw), 1, or 2!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     # Get match
-    c.execute('SELECT team1, team2, winner, queue_name FROM matches WHERE match_id=? AND guild_id=?',
-              (match_id, interaction.guild.id))
-    match = c.fetchone()
+    match = await db.fetchone('SELECT team1, team2, winner, queue_name FROM matches WHERE match_id=? AND guild_id=?',
+                              (match_id, interaction.guild.id))
     
     if not match:
         await interaction.response.send_message(f"❌ Match #{match_id} not found!", ephemeral=True)
-        conn.close()
         return
     
     team1_json, team2_json, old_winner, queue_name = match
     team1 = json.loads(team1_json)
     team2 = json.loads(team2_json)
     
-    # Reverse old MMR changes
-    if old_winner:
-        for player_id in (team1 if old_winner == 1 else team2):
-            c.execute('UPDATE queue_stats SET mmr = mmr - 25, wins = wins - 1 WHERE user_id=? AND guild_id=? AND queue_name=?',
-                      (player_id, interaction.guild.id, queue_name))
-        for player_id in (team2 if old_winner == 1 else team1):
-            c.execute('UPDATE queue_stats SET mmr = mmr + 25, losses = losses - 1 WHERE user_id=? AND guild_id=? AND queue_name=?',
-                      (player_id, interaction.guild.id, queue_name))
-    
-    # Apply new MMR changes
-    if winning_team:
-        for player_id in (team1 if winning_team == 1 else team2):
-            c.execute('UPDATE queue_stats SET mmr = mmr + 25, wins = wins + 1 WHERE user_id=? AND guild_id=? AND queue_name=?',
-                      (player_id, interaction.guild.id, queue_name))
-        for player_id in (team2 if winning_team == 1 else team1):
-            c.execute('UPDATE queue_stats SET mmr = mmr - 25, losses = losses + 1 WHERE user_id=? AND guild_id=? AND queue_name=?',
-                      (player_id, interaction.guild.id, queue_name))
-    
-    # Update match
-    c.execute('UPDATE matches SET winner=? WHERE match_id=?', (winning_team if winning_team else None, match_id))
-    
-    conn.commit()
-    conn.close()
+    def _rewrite_result(conn):
+        c = conn.cursor()
+        
+        # Reverse old MMR changes
+        if old_winner:
+            for player_id in (team1 if old_winner == 1 else team2):
+                c.execute('UPDATE queue_stats SET mmr = mmr - 25, wins = wins - 1 WHERE user_id=? AND guild_id=? AND queue_name=?',
+                          (player_id, interaction.guild.id, queue_name))
+            for player_id in (team2 if old_winner == 1 else team1):
+                c.execute('UPDATE queue_stats SET mmr = mmr + 25, losses = losses - 1 WHERE user_id=? AND guild_id=? AND queue_name=?',
+                          (player_id, interaction.guild.id, queue_name))
+        
+        # Apply new MMR changes
+        if winning_team:
+            for player_id in (team1 if winning_team == 1 else team2):
+                c.execute('UPDATE queue_stats SET mmr = mmr + 25, wins = wins + 1 WHERE user_id=? AND guild_id=? AND queue_name=?',
+                          (player_id, interaction.guild.id, queue_name))
+            for player_id in (team2 if winning_team == 1 else team1):
+                c.execute('UPDATE queue_stats SET mmr = mmr - 25, losses = losses + 1 WHERE user_id=? AND guild_id=? AND queue_name=?',
+                          (player_id, interaction.guild.id, queue_name))
+        
+        # Update match
+        c.execute('UPDATE matches SET winner=? WHERE match_id=?', (winning_team if winning_team else None, match_id))
+        _update_participant_results(conn, match_id, winning_team)
+    
+    await db.transaction(_rewrite_result)
     
     result_text = "draw" if winning_team == 0 else f"Team {winning_team} win"
     await interaction.response.send_message(f"✅ Modified match #{match_id} result to: **{result_text}**")
@@ -4813,35 +6716,30 @@ async def modifyresult(interaction: discord.Interaction, match_id: int, winning_
 ])
 async def rolelimit(interaction: discord.Interaction, action: str, role: discord.Role, limit: Optional[int] = None, queue_name: str = "default"):
     """Manage role limits for matches"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     if action == "add":
         if limit is None or limit < 1:
             await interaction.response.send_message("❌ Please specify a valid limit!", ephemeral=True)
-            conn.close()
             return
         
-        c.execute('INSERT OR REPLACE INTO role_limits VALUES (?, ?, ?, ?)',
-                  (interaction.guild.id, queue_name, role.id, limit))
-        conn.commit()
+        await db.execute('INSERT OR REPLACE INTO role_limits VALUES (?, ?, ?, ?)',
+                         (interaction.guild.id, queue_name, role.id, limit))
+        permission_cache.set_role_limit(interaction.guild.id, queue_name, role.id, limit)
         await interaction.response.send_message(
             f"✅ Set role limit: Max {limit} {role.mention} per match in queue **{queue_name}**"
         )
     
     elif action == "remove":
-        c.execute('DELETE FROM role_limits WHERE guild_id=? AND queue_name=? AND role_id=?',
-                  (interaction.guild.id, queue_name, role.id))
-        conn.commit()
+        await db.execute('DELETE FROM role_limits WHERE guild_id=? AND queue_name=? AND role_id=?',
+                         (interaction.guild.id, queue_name, role.id))
+        permission_cache.remove_role_limit(interaction.guild.id, queue_name, role.id)
         await interaction.response.send_message(
             f"✅ Removed role limit for {role.mention} in queue **{queue_name}**"
         )
     
-    conn.close()
     log_command(interaction.guild.id, interaction.user.id, "rolelimit", True)
 
 @bot.tree.command(name="mmrdecay", description="📊 STATS — Enable/disable MMR decay")
@@ -4849,16 +6747,13 @@ async def rolelimit(interaction: discord.Interaction, action: str, role: discord
 @app_commands.describe(enabled="Enable or disable", queue_name="Queue name")
 async def mmrdecay(interaction: discord.Interaction, enabled: bool, queue_name: str = "default"):
     """Toggle MMR decay"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('UPDATE queue_settings SET mmr_decay_enabled=? WHERE guild_id=? AND queue_name=?',
-              (1 if enabled else 0, interaction.guild.id, queue_name))
-    conn.commit()
-    conn.close()
+    await db.execute('UPDATE queue_settings SET mmr_decay_enabled=? WHERE guild_id=? AND queue_name=?',
+                     (1 if enabled else 0, interaction.guild.id, queue_name))
+    invalidate_queue_settings(interaction.guild.id, queue_name)
     
     status = "enabled" if enabled else "disabled"
     await interaction.response.send_message(f"✅ MMR decay **{status}** for queue **{queue_name}**!")
@@ -4869,7 +6764,7 @@ async def mmrdecay(interaction: discord.Interaction, enabled: bool, queue_name:
 @app_commands.describe(user="User to grant grace period", days="Number of days")
 async def graceperiod(interaction: discord.Interaction, user: discord.Member, days: int):
     """Grant MMR decay grace period"""
-    if not is_user_staff(interaction.guild, interaction.user):
+    if not await is_user_staff(interaction.guild, interaction.user):
         await interaction.response.send_message("❌ Only staff can use this command!", ephemeral=True)
         return
     
@@ -4879,17 +6774,16 @@ async def graceperiod(interaction: discord.Interaction, user: discord.Member, da
     
     grace_until = (datetime.now() + timedelta(days=days)).isoformat()
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('UPDATE players SET grace_period_until=? WHERE user_id=?', (grace_until, user.id))
-    
-    if c.rowcount == 0:
-        # Create player if doesn't exist
-        c.execute('INSERT INTO players (user_id, username, grace_period_until) VALUES (?, ?, ?)',
-                  (user.id, user.name, grace_until))
+    def _grant_grace(conn):
+        c = conn.cursor()
+        c.execute('UPDATE players SET grace_period_until=? WHERE user_id=?', (grace_until, user.id))
+        
+        if c.rowcount == 0:
+            # Create player if doesn't exist
+            c.execute('INSERT INTO players (user_id, username, grace_period_until) VALUES (?, ?, ?)',
+                      (user.id, user.name, grace_until))
     
-    conn.commit()
-    conn.close()
+    await db.transaction(_grant_grace)
     
     await interaction.response.send_message(
         f"✅ Granted {user.mention} a {days}-day grace period from MMR decay!"
@@ -5107,31 +7001,29 @@ async def loop(interaction: discord.Interaction):
 class ReactionRoleView(discord.ui.View):
     """Persistent button view for reaction roles - survives bot restarts"""
     
-    def __init__(self, panel_id: int):
+    def __init__(self, panel_id: int, roles: list = ()):
         super().__init__(timeout=None)
         self.panel_id = panel_id
-        self._load_buttons()
+        
+        for role_id_db, role_id, emoji, label in roles:
+            button = ReactionRoleButton(
+                role_id=role_id,
+                emoji=emoji,
+                label=label,
+                custom_id=f"rr:{self.panel_id}:{role_id}"
+            )
+            self.add_item(button)
     
-    def _load_buttons(self):
-        """Load buttons from database"""
+    @classmethod
+    async def load(cls, panel_id: int) -> 'ReactionRoleView':
+        """Build the view with buttons loaded from database"""
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT id, role_id, emoji, label FROM reaction_roles WHERE panel_id=?', 
-                      (self.panel_id,))
-            roles = c.fetchall()
-            conn.close()
-            
-            for role_id_db, role_id, emoji, label in roles:
-                button = ReactionRoleButton(
-                    role_id=role_id,
-                    emoji=emoji,
-                    label=label,
-                    custom_id=f"rr:{self.panel_id}:{role_id}"
-                )
-                self.add_item(button)
+            roles = await db.fetchall('SELECT id, role_id, emoji, label FROM reaction_roles WHERE panel_id=?',
+                                      (panel_id,))
         except Exception as e:
             logger.error(f"Failed to load reaction role buttons: {e}")
+            roles = []
+        return cls(panel_id, roles)
 
 
 class ReactionRoleButton(discord.ui.Button):
@@ -5175,37 +7067,24 @@ class ReactionRoleButton(discord.ui.Button):
                 )
 
 
-def _save_panel_and_send(guild_id, channel_id, title, description, created_by):
+async def _save_panel_and_send(guild_id, channel_id, title, description, created_by):
     """Helper to create a panel in the database and return its ID"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''INSERT INTO reaction_role_panels 
-                 (guild_id, channel_id, message_id, title, description, created_by, created_at)
-                 VALUES (?, ?, ?, ?, ?, ?, ?)''',
-              (guild_id, channel_id, 0, title, description, created_by, datetime.now().isoformat()))
-    panel_id = c.lastrowid
-    conn.commit()
-    conn.close()
-    return panel_id
+    result = await db.execute('''INSERT INTO reaction_role_panels 
+                                 (guild_id, channel_id, message_id, title, description, created_by, created_at)
+                                 VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                              (guild_id, channel_id, 0, title, description, created_by, datetime.now().isoformat()))
+    return result.lastrowid
 
 
-def _add_role_to_panel(panel_id, guild_id, role_id, emoji, label):
+async def _add_role_to_panel(panel_id, guild_id, role_id, emoji, label):
     """Helper to add a role to a panel"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''INSERT OR IGNORE INTO reaction_roles (panel_id, guild_id, role_id, emoji, label)
-                 VALUES (?, ?, ?, ?, ?)''', (panel_id, guild_id, role_id, emoji, label))
-    conn.commit()
-    conn.close()
+    await db.execute('''INSERT OR IGNORE INTO reaction_roles (panel_id, guild_id, role_id, emoji, label)
+                        VALUES (?, ?, ?, ?, ?)''', (panel_id, guild_id, role_id, emoji, label))
 
 
-def _build_panel_embed(panel_id, title, description):
+async def _build_panel_embed(panel_id, title, description):
     """Build the embed for a reaction role panel"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT role_id, emoji, label FROM reaction_roles WHERE panel_id=?', (panel_id,))
-    roles = c.fetchall()
-    conn.close()
+    roles = await db.fetchall('SELECT role_id, emoji, label FROM reaction_roles WHERE panel_id=?', (panel_id,))
     
     embed = discord.Embed(title=title, description=description, color=discord.Color.blurple())
     
@@ -5222,11 +7101,7 @@ def _build_panel_embed(panel_id, title, description):
 
 async def _update_panel_message(guild, panel_id):
     """Update an existing panel message after changes"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT channel_id, message_id, title, description FROM reaction_role_panels WHERE panel_id=?', (panel_id,))
-    panel = c.fetchone()
-    conn.close()
+    panel = await db.fetchone('SELECT channel_id, message_id, title, description FROM reaction_role_panels WHERE panel_id=?', (panel_id,))
     
     if not panel:
         return
@@ -5236,8 +7111,8 @@ async def _update_panel_message(guild, panel_id):
         channel = guild.get_channel(channel_id)
         if channel:
             msg = await channel.fetch_message(message_id)
-            new_view = ReactionRoleView(panel_id)
-            new_embed = _build_panel_embed(panel_id, title, description)
+            new_view = await ReactionRoleView.load(panel_id)
+            new_embed = await _build_panel_embed(panel_id, title, description)
             await msg.edit(embed=new_embed, view=new_view)
             bot.add_view(new_view, message_id=message_id)
     except Exception as e:
@@ -5262,7 +7137,7 @@ async def verify_setup(interaction: discord.Interaction, role: discord.Role):
         return
     
     # Create panel
-    panel_id = _save_panel_and_send(
+    panel_id = await _save_panel_and_send(
         interaction.guild.id, interaction.channel.id,
         "✅ Server Verification",
         "Click the button below to verify yourself and unlock the server!",
@@ -5270,22 +7145,18 @@ async def verify_setup(interaction: discord.Interaction, role: discord.Role):
     )
     
     # Add the role
-    _add_role_to_panel(panel_id, interaction.guild.id, role.id, "✅", "Click to Verify")
+    await _add_role_to_panel(panel_id, interaction.guild.id, role.id, "✅", "Click to Verify")
     
     # Build and send
-    embed = _build_panel_embed(panel_id, "✅ Server Verification",
-                                "Click the button below to verify yourself and unlock the server!")
-    view = ReactionRoleView(panel_id)
+    embed = await _build_panel_embed(panel_id, "✅ Server Verification",
+                                      "Click the button below to verify yourself and unlock the server!")
+    view = await ReactionRoleView.load(panel_id)
     
     await interaction.response.send_message(embed=embed, view=view)
     msg = await interaction.original_response()
     
     # Save message ID
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('UPDATE reaction_role_panels SET message_id=? WHERE panel_id=?', (msg.id, panel_id))
-    conn.commit()
-    conn.close()
+    await db.execute('UPDATE reaction_role_panels SET message_id=? WHERE panel_id=?', (msg.id, panel_id))
     bot.add_view(view, message_id=msg.id)
     
     log_command(interaction.guild.id, interaction.user.id, 'verify_setup')
@@ -5328,7 +7199,7 @@ async def rolepanel(
     panel_title = title or "🎭 Role Selection"
     
     # Create panel
-    panel_id = _save_panel_and_send(
+    panel_id = await _save_panel_and_send(
         interaction.guild.id, interaction.channel.id,
         panel_title,
         "Click a button below to get or remove a role!",
@@ -5337,22 +7208,18 @@ async def rolepanel(
     
     # Add all roles
     for role in roles:
-        _add_role_to_panel(panel_id, interaction.guild.id, role.id, None, role.name)
+        await _add_role_to_panel(panel_id, interaction.guild.id, role.id, None, role.name)
     
     # Build and send
-    embed = _build_panel_embed(panel_id, panel_title,
-                                "Click a button below to get or remove a role!")
-    view = ReactionRoleView(panel_id)
+    embed = await _build_panel_embed(panel_id, panel_title,
+                                      "Click a button below to get or remove a role!")
+    view = await ReactionRoleView.load(panel_id)
     
     await interaction.response.send_message(embed=embed, view=view)
     msg = await interaction.original_response()
     
     # Save message ID
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('UPDATE reaction_role_panels SET message_id=? WHERE panel_id=?', (msg.id, panel_id))
-    conn.commit()
-    conn.close()
+    await db.execute('UPDATE reaction_role_panels SET message_id=? WHERE panel_id=?', (msg.id, panel_id))
     bot.add_view(view, message_id=msg.id)
     
     role_names = ", ".join([f"**{r.name}**" for r in roles])
@@ -5381,31 +7248,22 @@ async def rolepaneladd(
         return
     
     # Check panel exists
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT panel_id FROM reaction_role_panels WHERE panel_id=? AND guild_id=?',
-              (panel_id, interaction.guild.id))
-    if not c.fetchone():
-        conn.close()
+    if not await db.fetchone('SELECT panel_id FROM reaction_role_panels WHERE panel_id=? AND guild_id=?',
+                             (panel_id, interaction.guild.id)):
         await interaction.response.send_message("❌ Panel not found! Use `/rolepanellist` to see your panels.", ephemeral=True)
         return
     
     # Check not already added
-    c.execute('SELECT id FROM reaction_roles WHERE panel_id=? AND role_id=?', (panel_id, role.id))
-    if c.fetchone():
-        conn.close()
+    if await db.fetchone('SELECT id FROM reaction_roles WHERE panel_id=? AND role_id=?', (panel_id, role.id)):
         await interaction.response.send_message(f"❌ **{role.name}** is already on that panel!", ephemeral=True)
         return
     
     # Check max 25
-    c.execute('SELECT COUNT(*) FROM reaction_roles WHERE panel_id=?', (panel_id,))
-    if c.fetchone()[0] >= 25:
-        conn.close()
+    if (await db.fetchone('SELECT COUNT(*) FROM reaction_roles WHERE panel_id=?', (panel_id,)))[0] >= 25:
         await interaction.response.send_message("❌ Max 25 roles per panel!", ephemeral=True)
         return
-    conn.close()
     
-    _add_role_to_panel(panel_id, interaction.guild.id, role.id, emoji, label or role.name)
+    await _add_role_to_panel(panel_id, interaction.guild.id, role.id, emoji, label or role.name)
     await _update_panel_message(interaction.guild, panel_id)
     
     await interaction.response.send_message(f"✅ Added **{role.name}** to panel #{panel_id}!", ephemeral=True)
@@ -5428,22 +7286,15 @@ async def rolepanelremove(
         await interaction.response.send_message("❌ Only admins can use this!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT panel_id FROM reaction_role_panels WHERE panel_id=? AND guild_id=?',
-              (panel_id, interaction.guild.id))
-    if not c.fetchone():
-        conn.close()
+    if not await db.fetchone('SELECT panel_id FROM reaction_role_panels WHERE panel_id=? AND guild_id=?',
+                             (panel_id, interaction.guild.id)):
         await interaction.response.send_message("❌ Panel not found!", ephemeral=True)
         return
     
-    c.execute('DELETE FROM reaction_roles WHERE panel_id=? AND role_id=?', (panel_id, role.id))
-    if c.rowcount == 0:
-        conn.close()
+    result = await db.execute('DELETE FROM reaction_roles WHERE panel_id=? AND role_id=?', (panel_id, role.id))
+    if result.rowcount == 0:
         await interaction.response.send_message(f"❌ **{role.name}** is not on that panel!", ephemeral=True)
         return
-    conn.commit()
-    conn.close()
     
     await _update_panel_message(interaction.guild, panel_id)
     await interaction.response.send_message(f"✅ Removed **{role.name}** from panel #{panel_id}!", ephemeral=True)
@@ -5459,22 +7310,19 @@ async def rolepaneldelete(interaction: discord.Interaction, panel_id: int):
         await interaction.response.send_message("❌ Only admins can use this!", ephemeral=True)
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT channel_id, message_id FROM reaction_role_panels WHERE panel_id=? AND guild_id=?',
-              (panel_id, interaction.guild.id))
-    panel = c.fetchone()
+    panel = await db.fetchone('SELECT channel_id, message_id FROM reaction_role_panels WHERE panel_id=? AND guild_id=?',
+                              (panel_id, interaction.guild.id))
     
     if not panel:
-        conn.close()
         await interaction.response.send_message("❌ Panel not found!", ephemeral=True)
         return
     
     channel_id, message_id = panel
-    c.execute('DELETE FROM reaction_roles WHERE panel_id=?', (panel_id,))
-    c.execute('DELETE FROM reaction_role_panels WHERE panel_id=?', (panel_id,))
-    conn.commit()
-    conn.close()
+    def _delete_panel(conn):
+        conn.execute('DELETE FROM reaction_roles WHERE panel_id=?', (panel_id,))
+        conn.execute('DELETE FROM reaction_role_panels WHERE panel_id=?', (panel_id,))
+    
+    await db.transaction(_delete_panel)
     
     try:
         channel = interaction.guild.get_channel(channel_id)
@@ -5492,14 +7340,10 @@ async def rolepaneldelete(interaction: discord.Interaction, panel_id: int):
 @app_commands.default_permissions(administrator=True)
 async def rolepanellist(interaction: discord.Interaction):
     """List all panels"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT panel_id, channel_id, title FROM reaction_role_panels WHERE guild_id=?',
-              (interaction.guild.id,))
-    panels = c.fetchall()
+    panels = await db.fetchall('SELECT panel_id, channel_id, title FROM reaction_role_panels WHERE guild_id=?',
+                               (interaction.guild.id,))
     
     if not panels:
-        conn.close()
         await interaction.response.send_message(
             "📭 No role panels yet!\n\n"
             "**Quick setup:**\n"
@@ -5512,8 +7356,7 @@ async def rolepanellist(interaction: discord.Interaction):
     embed = discord.Embed(title="🎭 Your Role Panels", color=discord.Color.blurple())
     
     for pid, ch_id, p_title in panels:
-        c.execute('SELECT role_id, label FROM reaction_roles WHERE panel_id=?', (pid,))
-        roles = c.fetchall()
+        roles = await db.fetchall('SELECT role_id, label FROM reaction_roles WHERE panel_id=?', (pid,))
         
         role_text = ""
         for role_id, lab in roles:
@@ -5530,7 +7373,6 @@ async def rolepanellist(interaction: discord.Interaction):
             inline=False
         )
     
-    conn.close()
     embed.set_footer(text="Use /rolepaneladd, /rolepanelremove, or /rolepaneldelete to manage panels")
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -5590,14 +7432,10 @@ async def reactionrole(
         try:
             msg = await channel.send(embed=embed)
             
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('''
+            await db.execute('''
                 INSERT INTO emoji_reaction_messages (message_id, channel_id, guild_id, title, description)
                 VALUES (?, ?, ?, ?, ?)
             ''', (msg.id, channel.id, interaction.guild.id, title, description))
-            conn.commit()
-            conn.close()
             
             await interaction.response.send_message(
                 f"✅ Reaction role message created!\n"
@@ -5627,10 +7465,7 @@ async def reactionrole(
         try:
             msg_id = int(message_id)
             
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT channel_id FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
-            result = c.fetchone()
+            result = await db.fetchone('SELECT channel_id FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
             
             if not result:
                 await interaction.response.send_message(
@@ -5638,36 +7473,31 @@ async def reactionrole(
                     f"Create one first with `/reactionrole create`",
                     ephemeral=True
                 )
-                conn.close()
                 return
             
             channel_id = result[0]
             
             try:
-                c.execute('''
+                await db.execute('''
                     INSERT INTO emoji_reaction_pairs (message_id, emoji, role_id)
                     VALUES (?, ?, ?)
                 ''', (msg_id, emoji, role.id))
-                conn.commit()
             except sqlite3.IntegrityError:
                 await interaction.response.send_message(
                     f"❌ Emoji {emoji} is already used on this message!\n"
                     f"Remove it first with `/reactionrole remove {msg_id} {emoji}`",
                     ephemeral=True
                 )
-                conn.close()
                 return
             
             channel = interaction.guild.get_channel(channel_id)
             message = await channel.fetch_message(msg_id)
             await message.add_reaction(emoji)
             
-            c.execute('''
+            pairs = await db.fetchall('''
                 SELECT emoji, role_id FROM emoji_reaction_pairs
                 WHERE message_id = ?
             ''', (msg_id,))
-            pairs = c.fetchall()
-            conn.close()
             
             role_list = []
             for emoji_str, role_id in pairs:
@@ -5708,24 +7538,17 @@ async def reactionrole(
         
         try:
             msg_id = int(message_id)
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
             
-            c.execute('DELETE FROM emoji_reaction_pairs WHERE message_id = ? AND emoji = ?', (msg_id, emoji))
+            result = await db.execute('DELETE FROM emoji_reaction_pairs WHERE message_id = ? AND emoji = ?', (msg_id, emoji))
             
-            if c.rowcount == 0:
+            if result.rowcount == 0:
                 await interaction.response.send_message(
                     f"❌ No role found for emoji {emoji} on message `{msg_id}`",
                     ephemeral=True
                 )
-                conn.close()
                 return
             
-            conn.commit()
-            
-            c.execute('SELECT channel_id FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
-            result = c.fetchone()
-            conn.close()
+            result = await db.fetchone('SELECT channel_id FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
             
             if result:
                 channel = interaction.guild.get_channel(result[0])
@@ -5745,15 +7568,11 @@ async def reactionrole(
     
     # LIST ALL REACTION ROLE MESSAGES
     elif action == "list":
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('''
+        messages = await db.fetchall('''
             SELECT message_id, channel_id, title, description, mode
             FROM emoji_reaction_messages
             WHERE guild_id = ?
         ''', (interaction.guild.id,))
-        messages = c.fetchall()
-        conn.close()
         
         if not messages:
             await interaction.response.send_message("✨ No emoji reaction role messages found!", ephemeral=True)
@@ -5765,11 +7584,7 @@ async def reactionrole(
             channel = interaction.guild.get_channel(channel_id)
             channel_mention = channel.mention if channel else f"<#{channel_id}>"
             
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT COUNT(*) FROM emoji_reaction_pairs WHERE message_id = ?', (msg_id,))
-            role_count = c.fetchone()[0]
-            conn.close()
+            role_count = (await db.fetchone('SELECT COUNT(*) FROM emoji_reaction_pairs WHERE message_id = ?', (msg_id,)))[0]
             
             embed.add_field(
                 name=f"{title_text or 'Untitled'}",
@@ -5794,23 +7609,17 @@ async def reactionrole(
         
         try:
             msg_id = int(message_id)
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
             
-            c.execute('SELECT channel_id FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
-            result = c.fetchone()
+            result = await db.fetchone('SELECT channel_id FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
             
             if not result:
                 await interaction.response.send_message(
                     f"❌ Message `{msg_id}` not found in database!",
                     ephemeral=True
                 )
-                conn.close()
                 return
             
-            c.execute('DELETE FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
-            conn.commit()
-            conn.close()
+            await db.execute('DELETE FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
             
             try:
                 channel = interaction.guild.get_channel(result[0])
@@ -5840,28 +7649,21 @@ async def reactionrole(
         
         try:
             msg_id = int(message_id)
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
             
-            c.execute('''
+            result = await db.execute('''
                 UPDATE emoji_reaction_messages
                 SET description = ?, title = ?
                 WHERE message_id = ?
             ''', (description, title, msg_id))
             
-            if c.rowcount == 0:
+            if result.rowcount == 0:
                 await interaction.response.send_message(
                     f"❌ Message `{msg_id}` not found!",
                     ephemeral=True
                 )
-                conn.close()
                 return
             
-            conn.commit()
-            
-            c.execute('SELECT channel_id FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,))
-            channel_id = c.fetchone()[0]
-            conn.close()
+            channel_id = (await db.fetchone('SELECT channel_id FROM emoji_reaction_messages WHERE message_id = ?', (msg_id,)))[0]
             
             channel = interaction.guild.get_channel(channel_id)
             message = await channel.fetch_message(msg_id)
@@ -5904,22 +7706,16 @@ async def reactionrole(
         
         try:
             msg_id = int(message_id)
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
             
-            c.execute('UPDATE emoji_reaction_messages SET mode = ? WHERE message_id = ?', (mode, msg_id))
+            result = await db.execute('UPDATE emoji_reaction_messages SET mode = ? WHERE message_id = ?', (mode, msg_id))
             
-            if c.rowcount == 0:
+            if result.rowcount == 0:
                 await interaction.response.send_message(
                     f"❌ Message `{msg_id}` not found!",
                     ephemeral=True
                 )
-                conn.close()
                 return
             
-            conn.commit()
-            conn.close()
-            
             mode_descriptions = {
                 'normal': 'Users can have multiple roles',
                 'unique': 'Users can only have ONE role (removes others)',
@@ -5953,42 +7749,30 @@ async def on_raw_reaction_add(payload):
     if payload.user_id == bot.user.id:
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    c.execute('''
+    result = await db.fetchone('''
         SELECT mode FROM emoji_reaction_messages
         WHERE message_id = ? AND guild_id = ?
     ''', (payload.message_id, payload.guild_id))
-    
-    result = c.fetchone()
     if not result:
-        conn.close()
         return
     
     mode = result[0]
     
     emoji_str = str(payload.emoji)
-    c.execute('''
+    role_result = await db.fetchone('''
         SELECT role_id FROM emoji_reaction_pairs
         WHERE message_id = ? AND emoji = ?
     ''', (payload.message_id, emoji_str))
-    
-    role_result = c.fetchone()
     if not role_result:
-        conn.close()
         return
     
     role_id = role_result[0]
     
     if mode == 'unique':
-        c.execute('''
+        all_role_ids = [r[0] for r in await db.fetchall('''
             SELECT role_id FROM emoji_reaction_pairs
             WHERE message_id = ?
-        ''', (payload.message_id,))
-        all_role_ids = [r[0] for r in c.fetchall()]
-    
-    conn.close()
+        ''', (payload.message_id,))]
     
     guild = bot.get_guild(payload.guild_id)
     if not guild:
@@ -6023,30 +7807,21 @@ async def on_raw_reaction_remove(payload):
     if payload.user_id == bot.user.id:
         return
     
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    c.execute('''
+    result = await db.fetchone('''
         SELECT mode FROM emoji_reaction_messages
         WHERE message_id = ? AND guild_id = ?
     ''', (payload.message_id, payload.guild_id))
-    
-    result = c.fetchone()
     if not result:
-        conn.close()
         return
     
     mode = result[0]
     
     emoji_str = str(payload.emoji)
-    c.execute('''
+    role_result = await db.fetchone('''
         SELECT role_id FROM emoji_reaction_pairs
         WHERE message_id = ? AND emoji = ?
     ''', (payload.message_id, emoji_str))
     
-    role_result = c.fetchone()
-    conn.close()
-    
     if not role_result:
         return
     
@@ -6178,7 +7953,8 @@ async def help_command(interaction: discord.Interaction):
         value=(
             "`/lobbydetails` - Lobby info template\n"
             "`/commandlog` `/activitylog` - View logs\n"
-            "`/sync` - Sync commands"
+            "`/sync` - Sync commands\n"
+            "`/perfstats` - Performance metrics"
         ),
         inline=False
     )
@@ -6263,6 +8039,205 @@ async def sync(interaction: discord.Interaction):
     except Exception as e:
         await interaction.followup.send(f'❌ Error: {e}')
 
+@bot.tree.command(name="perfstats", description="🔧 UTIL — Show performance metrics (Admin only)")
+@app_commands.default_permissions(administrator=True)
+async def perfstats(interaction: discord.Interaction):
+    """Show database pool/executor usage and where query time is going"""
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("❌ Only admins can use this command!", ephemeral=True)
+        return
+
+    embed = discord.Embed(title="📈 Performance Metrics", color=discord.Color.blue())
+
+    pool = db_pool.stats()
+    embed.add_field(
+        name="🗄️ Connection Pool",
+        value=f"Open: **{pool['open']}** (idle {pool['idle']}, in use {pool['in_use']})\n"
+              f"Size: {pool['size']} + {pool['max_overflow']} overflow\n"
+              f"Checkouts: {pool['checkouts']:,} | Waits: {pool['waits']:,} | Overflow opens: {pool['overflow_opened']:,}",
+        inline=False
+    )
+
+    lanes = db.stats()
+    embed.add_field(
+        name="🧵 Database Executor",
+        value="\n".join(
+            f"**{lane.title()}**: pending {st['pending']} (peak {st['peak_pending']}) | "
+            f"done {st['completed']:,}, failed {st['failed']:,} | "
+            f"wait avg {st['avg_wait_ms']:.1f}ms, max {st['max_wait_ms']:.0f}ms | run avg {st['avg_run_ms']:.1f}ms"
+            for lane, st in lanes.items()
+        ),
+        inline=False
+    )
+
+    logs = audit_log.stats()
+    embed.add_field(
+        name="📝 Audit Log Buffer",
+        value=f"Pending: **{logs['pending']}** | Written: {logs['written']:,} in {logs['flushes']:,} flushes\n"
+              f"Dropped (buffer full): {logs['dropped']:,} | Failed: {logs['failed']:,}",
+        inline=False
+    )
+
+    cache_lines = []
+    for name, cache in TTLCache.registry.items():
+        st = cache.stats()
+        cache_lines.append(
+            f"`{name}`: {st['size']:,}/{st['maxsize']:,} entries | "
+            f"hits {st['hits']:,}, misses {st['misses']:,} ({st['hit_rate']:.0f}%) | evicted {st['evictions']:,}"
+        )
+    balance = team_balancer.stats()
+    embed.add_field(
+        name="⚖️ Team Balancer",
+        value=f"Runs: {balance['runs']:,} (exact {balance['exact']:,}, heuristic {balance['heuristic']:,}) | "
+              f"budget hits {balance['budget_hits']:,}\n"
+              f"Time avg {balance['avg_ms']:.1f}ms, max {balance['max_ms']:.1f}ms | avg MMR gap {balance['avg_diff']:.1f}",
+        inline=False
+    )
+
+    ranks = rank_reconciler.stats()
+    embed.add_field(
+        name="🏅 Rank Roles",
+        value=f"Pending: **{ranks['pending']}** across {ranks['guilds']} guilds | queued {ranks['queued']:,}, "
+              f"coalesced {ranks['coalesced']:,}\n"
+              f"Edits: {ranks['edits']:,} | already correct {ranks['unchanged']:,} | failed {ranks['failed']:,}",
+        inline=False
+    )
+
+    channels = channel_provisioner.stats()
+    embed.add_field(
+        name="📁 Match Channels",
+        value=f"Provisioned: **{channels['provisioned']:,}** | failed {channels['failed']:,}\n"
+              f"Latency avg {channels['avg_ms']:.0f}ms, max {channels['max_ms']:.0f}ms, last {channels['last_ms']:.0f}ms",
+        inline=False
+    )
+
+    moves = voice_mover.stats()
+    embed.add_field(
+        name="🔊 Voice Auto-Move",
+        value=f"Batches: **{moves['batches']:,}** | avg {moves['avg_ms']:.0f}ms, max {moves['max_ms']:.0f}ms | "
+              f"retries {moves['retried']:,}\n"
+              + (", ".join(f"{outcome.replace('_', ' ')} {count:,}" for outcome, count in sorted(moves['outcomes'].items()))
+                 or "No moves yet"),
+        inline=False
+    )
+
+    renders = queue_renderer.stats()
+    embed.add_field(
+        name="🖼️ Queue Embeds",
+        value=f"Refresh requests: **{renders['requests']:,}** | edits {renders['renders']:,} | "
+              f"saved {renders['saved']:,} | rendering {renders['active']}",
+        inline=False
+    )
+
+    sticky = sticky_manager.stats()
+    embed.add_field(
+        name="📌 Sticky Queues",
+        value=f"Channels: **{sticky['channels']}** | reposts {sticky['reposts']:,}, in-place edits {sticky['edits']:,}\n"
+              f"Skipped (still near bottom) {sticky['skipped']:,} | coalesced {sticky['coalesced']:,}",
+        inline=False
+    )
+
+    engines = [engine for queues in guild_queues.values() for engine in queues.values()]
+    states = {}
+    for engine in engines:
+        states[engine.state] = states.get(engine.state, 0) + 1
+    state_text = ", ".join(f"{state} {count}" for state, count in sorted(states.items())) or "none"
+    embed.add_field(
+        name="🎮 Queues",
+        value=f"Tracked: **{len(engines)}** ({state_text})\n"
+              f"Matches started: {sum(e.starts for e in engines):,} | "
+              f"start attempts refused: {sum(e.rejected_starts for e in engines):,}",
+        inline=False
+    )
+
+    streams = stream_poller.stats()
+    shared = stream_status.stats()
+    polling = stream_planner.stats()
+    youtube = youtube_checker.stats()
+    embed.add_field(
+        name="📡 Stream Checks",
+        value=f"Cycles: **{streams['cycles']:,}** | last {streams['last_duration']:.1f}s, avg {streams['avg_duration']:.1f}s, "
+              f"max {streams['max_duration']:.1f}s (interval {STREAM_CHECK_MINUTES * 60}s)\n"
+              f"Start lag: last {streams['last_lag']:.1f}s, max {streams['max_lag']:.1f}s | "
+              f"checks {streams['jobs']:,}, failed {streams['failed']:,}, past deadline {streams['timed_out']:,}\n"
+              + (" | ".join(f"{platform} {count:,} req ({streams['throttled'].get(platform, 0):.0f}s throttled)"
+                            for platform, count in sorted(streams['requests'].items())) or "No requests yet")
+              + f"\nChannels: **{shared['channels']:,}** unique for {shared['subscriptions']:,} guild subscriptions | "
+              f"lookups {shared['lookups']:,}, saved by sharing {shared['saved']:,}\n"
+              f"Adaptive polling: {polling['fast']:,}/{polling['channels']:,} channels on the fast interval, "
+              f"slowest every {polling['max_interval']:.0f}m | last cycle {polling['last_due']:,} due, "
+              f"{polling['last_skipped']:,} skipped | total skipped {polling['skipped']:,}\n"
+              f"YouTube: {youtube['units']:,} quota units | {youtube['channels']:,} channels resolved "
+              f"({youtube['resolved']:,} lookups) | {youtube['feed_reads']:,} feeds, {youtube['playlist_reads']:,} playlist reads, "
+              f"{youtube['video_batches']:,} videos.list batches | watching {youtube['watching']:,} videos",
+        inline=False
+    )
+
+    hosts = http_client.stats()
+    embed.add_field(
+        name="🌐 Outbound HTTP",
+        value="\n".join(
+            f"`{host}`: {st['requests']:,} requests | avg {st['avg_ms']:.0f}ms, max {st['max_ms']:.0f}ms | "
+            + ", ".join(f"{status} {count:,}" for status, count in sorted(st['statuses'].items()))
+            + f" | errors {st['errors']:,}"
+            for host, st in sorted(hosts.items(), key=lambda item: -item[1]['requests'])[:8]
+        ) or "No requests yet",
+        inline=False
+    )
+
+    schedule = task_scheduler.stats()
+    embed.add_field(
+        name="⏰ Scheduled Tasks",
+        value=f"On timer: **{schedule['queued']}** | next run {schedule['next_run'] or 'none'}\n"
+              f"Fired: {schedule['fired']:,} (avg {schedule['avg_late_ms']:.0f}ms late) | failed {schedule['failed']:,} | "
+              f"loads {schedule['loads']:,}",
+        inline=False
+    )
+
+    votes = match_votes.stats()
+    vote_tallies = vote_renderer.stats()
+    embed.add_field(
+        name="🗳️ Match Votes",
+        value=f"Open: **{votes['open']:,}** | opened {votes['opened']:,}, closed {votes['closed']:,}\n"
+              f"Votes: {votes['votes']:,} | games decided {votes['games']:,} | cache misses {votes['db_lookups']:,}\n"
+              f"Message edits: {vote_tallies['renders']:,} for {vote_tallies['requests']:,} updates "
+              f"(saved {vote_tallies['saved']:,})",
+        inline=False
+    )
+
+    journal = state_journal.stats()
+    embed.add_field(
+        name="💾 State Journal",
+        value=f"Pending: **{journal['pending']}** | changes {journal['recorded']:,}, coalesced {journal['coalesced']:,}\n"
+              f"Written: {journal['written']:,} in {journal['flushes']:,} flushes | "
+              f"compactions {journal['compactions']:,} | failed {journal['failed']:,}",
+        inline=False
+    )
+
+    embed.add_field(name="🧠 Caches", value="\n".join(cache_lines) or "None", inline=False)
+
+    regressions = await db.read(check_query_plans)
+    embed.add_field(
+        name="🔎 Query Plans",
+        value="\n".join(f"⚠️ `{label}`: {detail}" for label, detail in regressions.items())
+              or f"✅ All {len(HOT_QUERIES)} hot queries use an index",
+        inline=False
+    )
+
+    op_lines = []
+    for op in db_pool.operation_stats()[:10]:
+        op_lines.append(
+            f"`{op['operation'][:28]}` ×{op['count']:,} — "
+            f"total {op['total_ms']:.0f}ms, avg {op['avg_ms']:.2f}ms, max {op['max_ms']:.1f}ms"
+        )
+    embed.add_field(
+        name="⏱️ Slowest Operations (by total time)",
+        value="\n".join(op_lines) if op_lines else "No queries recorded yet",
+        inline=False
+    )
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # ============================================================================
 # WELCOMER, FAREWELL, GREET & LOG CHANNEL (Carl-bot Style)
 # ============================================================================
@@ -6322,23 +8297,15 @@ async def welcomer(
         await interaction.response.send_message("❌ Only admins can use this!", ephemeral=True)
         return
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
     # Ensure row exists
-    c.execute('INSERT OR IGNORE INTO welcomer_settings (guild_id) VALUES (?)', (interaction.guild.id,))
-    conn.commit()
+    await db.execute('INSERT OR IGNORE INTO welcomer_settings (guild_id) VALUES (?)', (interaction.guild.id,))
 
     if action == "enable":
-        c.execute('UPDATE welcomer_settings SET enabled=1 WHERE guild_id=?', (interaction.guild.id,))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE welcomer_settings SET enabled=1 WHERE guild_id=?', (interaction.guild.id,))
         await interaction.response.send_message("✅ Welcomer **enabled**! Make sure to set a channel with `/welcomer_channel`.", ephemeral=True)
 
     elif action == "disable":
-        c.execute('UPDATE welcomer_settings SET enabled=0 WHERE guild_id=?', (interaction.guild.id,))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE welcomer_settings SET enabled=0 WHERE guild_id=?', (interaction.guild.id,))
         await interaction.response.send_message("✅ Welcomer **disabled**.", ephemeral=True)
 
     elif action == "set":
@@ -6368,14 +8335,11 @@ async def welcomer(
             params.append(thumbnail_url)
 
         if not updates:
-            conn.close()
             await interaction.response.send_message("❌ Provide at least one setting to change!", ephemeral=True)
             return
 
         params.append(interaction.guild.id)
-        c.execute(f'UPDATE welcomer_settings SET {", ".join(updates)} WHERE guild_id=?', params)
-        conn.commit()
-        conn.close()
+        await db.execute(f'UPDATE welcomer_settings SET {", ".join(updates)} WHERE guild_id=?', params)
         await interaction.response.send_message("✅ Welcomer settings updated!\n\n**Variables you can use:**\n"
             "`{user}` - Mentions the user\n"
             "`{user_name}` - Username (no mention)\n"
@@ -6386,9 +8350,7 @@ async def welcomer(
             "`{server_icon}` - Server icon URL", ephemeral=True)
 
     elif action == "view":
-        c.execute('SELECT * FROM welcomer_settings WHERE guild_id=?', (interaction.guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM welcomer_settings WHERE guild_id=?', (interaction.guild.id,))
 
         if not row:
             await interaction.response.send_message("❌ No welcomer configured yet!", ephemeral=True)
@@ -6407,8 +8369,6 @@ async def welcomer(
         if eimg:
             info_embed.add_field(name="Image URL", value=eimg[:50] + "...", inline=True)
         await interaction.response.send_message(embed=info_embed, ephemeral=True)
-    else:
-        conn.close()
 
     log_command(interaction.guild.id, interaction.user.id, 'welcomer')
 
@@ -6422,12 +8382,8 @@ async def welcomer_channel(interaction: discord.Interaction, channel: discord.Te
         await interaction.response.send_message("❌ Only admins can use this!", ephemeral=True)
         return
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT OR IGNORE INTO welcomer_settings (guild_id) VALUES (?)', (interaction.guild.id,))
-    c.execute('UPDATE welcomer_settings SET channel_id=? WHERE guild_id=?', (channel.id, interaction.guild.id))
-    conn.commit()
-    conn.close()
+    await db.execute('INSERT OR IGNORE INTO welcomer_settings (guild_id) VALUES (?)', (interaction.guild.id,))
+    await db.execute('UPDATE welcomer_settings SET channel_id=? WHERE guild_id=?', (channel.id, interaction.guild.id))
 
     await interaction.response.send_message(f"✅ Welcome messages will be sent to {channel.mention}!", ephemeral=True)
     log_command(interaction.guild.id, interaction.user.id, 'welcomer_channel')
@@ -6441,11 +8397,7 @@ async def welcomer_test(interaction: discord.Interaction):
         await interaction.response.send_message("❌ Only admins can use this!", ephemeral=True)
         return
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT * FROM welcomer_settings WHERE guild_id=?', (interaction.guild.id,))
-    row = c.fetchone()
-    conn.close()
+    row = await db.fetchone('SELECT * FROM welcomer_settings WHERE guild_id=?', (interaction.guild.id,))
 
     if not row:
         await interaction.response.send_message("❌ No welcomer configured! Use `/welcomer set` first.", ephemeral=True)
@@ -6505,21 +8457,14 @@ async def greet(
         await interaction.response.send_message("❌ Only admins can use this!", ephemeral=True)
         return
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT OR IGNORE INTO greet_settings (guild_id) VALUES (?)', (interaction.guild.id,))
-    conn.commit()
+    await db.execute('INSERT OR IGNORE INTO greet_settings (guild_id) VALUES (?)', (interaction.guild.id,))
 
     if action == "enable":
-        c.execute('UPDATE greet_settings SET enabled=1 WHERE guild_id=?', (interaction.guild.id,))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE greet_settings SET enabled=1 WHERE guild_id=?', (interaction.guild.id,))
         await interaction.response.send_message("✅ Greet DMs **enabled**! New members will receive a DM when they join.", ephemeral=True)
 
     elif action == "disable":
-        c.execute('UPDATE greet_settings SET enabled=0 WHERE guild_id=?', (interaction.guild.id,))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE greet_settings SET enabled=0 WHERE guild_id=?', (interaction.guild.id,))
         await interaction.response.send_message("✅ Greet DMs **disabled**.", ephemeral=True)
 
     elif action == "set":
@@ -6536,20 +8481,15 @@ async def greet(
             params.append(title)
 
         if not updates:
-            conn.close()
             await interaction.response.send_message("❌ Provide at least a message!", ephemeral=True)
             return
 
         params.append(interaction.guild.id)
-        c.execute(f'UPDATE greet_settings SET {", ".join(updates)} WHERE guild_id=?', params)
-        conn.commit()
-        conn.close()
+        await db.execute(f'UPDATE greet_settings SET {", ".join(updates)} WHERE guild_id=?', params)
         await interaction.response.send_message("✅ Greet DM settings updated!", ephemeral=True)
 
     elif action == "view":
-        c.execute('SELECT * FROM greet_settings WHERE guild_id=?', (interaction.guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM greet_settings WHERE guild_id=?', (interaction.guild.id,))
         if not row:
             await interaction.response.send_message("❌ No greet settings configured!", ephemeral=True)
             return
@@ -6560,8 +8500,6 @@ async def greet(
         info_embed.add_field(name="Embed Mode", value="Yes" if embed_on else "No", inline=True)
         info_embed.add_field(name="Message", value=msg or "Default", inline=False)
         await interaction.response.send_message(embed=info_embed, ephemeral=True)
-    else:
-        conn.close()
 
     log_command(interaction.guild.id, interaction.user.id, 'greet')
 
@@ -6602,31 +8540,21 @@ async def farewell(
         await interaction.response.send_message("❌ Only admins can use this!", ephemeral=True)
         return
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT OR IGNORE INTO farewell_settings (guild_id) VALUES (?)', (interaction.guild.id,))
-    conn.commit()
+    await db.execute('INSERT OR IGNORE INTO farewell_settings (guild_id) VALUES (?)', (interaction.guild.id,))
 
     if action == "enable":
-        c.execute('UPDATE farewell_settings SET enabled=1 WHERE guild_id=?', (interaction.guild.id,))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE farewell_settings SET enabled=1 WHERE guild_id=?', (interaction.guild.id,))
         await interaction.response.send_message("✅ Farewell messages **enabled**! Set a channel with `/farewell` → Set Channel.", ephemeral=True)
 
     elif action == "disable":
-        c.execute('UPDATE farewell_settings SET enabled=0 WHERE guild_id=?', (interaction.guild.id,))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE farewell_settings SET enabled=0 WHERE guild_id=?', (interaction.guild.id,))
         await interaction.response.send_message("✅ Farewell messages **disabled**.", ephemeral=True)
 
     elif action == "channel":
         if not channel:
-            conn.close()
             await interaction.response.send_message("❌ Please specify a channel!", ephemeral=True)
             return
-        c.execute('UPDATE farewell_settings SET channel_id=? WHERE guild_id=?', (channel.id, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE farewell_settings SET channel_id=? WHERE guild_id=?', (channel.id, interaction.guild.id))
         await interaction.response.send_message(f"✅ Farewell messages will be sent to {channel.mention}!", ephemeral=True)
 
     elif action == "set":
@@ -6650,20 +8578,15 @@ async def farewell(
                 pass
 
         if not updates:
-            conn.close()
             await interaction.response.send_message("❌ Provide at least one setting to change!", ephemeral=True)
             return
 
         params.append(interaction.guild.id)
-        c.execute(f'UPDATE farewell_settings SET {", ".join(updates)} WHERE guild_id=?', params)
-        conn.commit()
-        conn.close()
+        await db.execute(f'UPDATE farewell_settings SET {", ".join(updates)} WHERE guild_id=?', params)
         await interaction.response.send_message("✅ Farewell settings updated!\n\n**Variables:** `{user_name}`, `{server}`, `{membercount}`, `{user_display}`, `{user_id}`", ephemeral=True)
 
     elif action == "test":
-        c.execute('SELECT * FROM farewell_settings WHERE guild_id=?', (interaction.guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM farewell_settings WHERE guild_id=?', (interaction.guild.id,))
         if not row:
             await interaction.response.send_message("❌ No farewell configured!", ephemeral=True)
             return
@@ -6683,9 +8606,7 @@ async def farewell(
             await interaction.response.send_message(f"**📋 Farewell Message Preview:**\n{formatted}", ephemeral=True)
 
     elif action == "view":
-        c.execute('SELECT * FROM farewell_settings WHERE guild_id=?', (interaction.guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM farewell_settings WHERE guild_id=?', (interaction.guild.id,))
         if not row:
             await interaction.response.send_message("❌ No farewell configured!", ephemeral=True)
             return
@@ -6699,8 +8620,6 @@ async def farewell(
         info_embed.add_field(name="Embed Mode", value="Yes" if embed_on else "No", inline=True)
         info_embed.add_field(name="Message", value=msg or "Default", inline=False)
         await interaction.response.send_message(embed=info_embed, ephemeral=True)
-    else:
-        conn.close()
 
     log_command(interaction.guild.id, interaction.user.id, 'farewell')
 
@@ -6745,30 +8664,21 @@ async def logchannel(
         await interaction.response.send_message("❌ Only admins can use this!", ephemeral=True)
         return
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT OR IGNORE INTO log_settings (guild_id) VALUES (?)', (interaction.guild.id,))
-    conn.commit()
+    await db.execute('INSERT OR IGNORE INTO log_settings (guild_id) VALUES (?)', (interaction.guild.id,))
 
     if action == "set":
         if not channel:
-            conn.close()
             await interaction.response.send_message("❌ Please specify a channel!", ephemeral=True)
             return
-        c.execute('UPDATE log_settings SET log_channel_id=? WHERE guild_id=?', (channel.id, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE log_settings SET log_channel_id=? WHERE guild_id=?', (channel.id, interaction.guild.id))
         await interaction.response.send_message(f"✅ Server logs will be sent to {channel.mention}!\n\nAll event types are enabled by default. Use `/logchannel toggle` to turn specific events on/off.", ephemeral=True)
 
     elif action == "remove":
-        c.execute('UPDATE log_settings SET log_channel_id=NULL WHERE guild_id=?', (interaction.guild.id,))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE log_settings SET log_channel_id=NULL WHERE guild_id=?', (interaction.guild.id,))
         await interaction.response.send_message("✅ Log channel removed. Logging is now **disabled**.", ephemeral=True)
 
     elif action == "toggle":
         if not event:
-            conn.close()
             await interaction.response.send_message("❌ Please specify an event to toggle!", ephemeral=True)
             return
 
@@ -6784,24 +8694,18 @@ async def logchannel(
         }
         col = col_map.get(event)
         if not col:
-            conn.close()
             await interaction.response.send_message("❌ Invalid event type!", ephemeral=True)
             return
 
-        c.execute(f'SELECT {col} FROM log_settings WHERE guild_id=?', (interaction.guild.id,))
-        current = c.fetchone()[0]
+        current = (await db.fetchone(f'SELECT {col} FROM log_settings WHERE guild_id=?', (interaction.guild.id,)))[0]
         new_val = 0 if current else 1
-        c.execute(f'UPDATE log_settings SET {col}=? WHERE guild_id=?', (new_val, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute(f'UPDATE log_settings SET {col}=? WHERE guild_id=?', (new_val, interaction.guild.id))
 
         status = "✅ Enabled" if new_val else "❌ Disabled"
         await interaction.response.send_message(f"{status} logging for **{event.replace('_', ' ').title()}**.", ephemeral=True)
 
     elif action == "view":
-        c.execute('SELECT * FROM log_settings WHERE guild_id=?', (interaction.guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM log_settings WHERE guild_id=?', (interaction.guild.id,))
 
         if not row:
             await interaction.response.send_message("❌ No log settings configured!", ephemeral=True)
@@ -6825,8 +8729,6 @@ async def logchannel(
         )
         em.add_field(name="Events", value=events_status, inline=False)
         await interaction.response.send_message(embed=em, ephemeral=True)
-    else:
-        conn.close()
 
     log_command(interaction.guild.id, interaction.user.id, 'logchannel')
 
@@ -6835,14 +8737,10 @@ async def logchannel(
 # WELCOMER / FAREWELL / GREET / LOG EVENT HANDLERS
 # ============================================================================
 
-def get_log_channel(guild_id: int):
+async def get_log_channel(guild_id: int):
     """Get log channel and settings for a guild"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('SELECT * FROM log_settings WHERE guild_id=?', (guild_id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM log_settings WHERE guild_id=?', (guild_id,))
         if row:
             return {
                 'channel_id': row[1],
@@ -6858,7 +8756,7 @@ def get_log_channel(guild_id: int):
 
 async def send_log(guild: discord.Guild, embed: discord.Embed, event_key: str):
     """Send a log embed to the guild's log channel if the event is enabled"""
-    settings = get_log_channel(guild.id)
+    settings = await get_log_channel(guild.id)
     if not settings or not settings['channel_id']:
         return
     if not settings.get(event_key, True):
@@ -6878,11 +8776,7 @@ async def on_member_join(member: discord.Member):
 
     # --- Welcomer (channel message) ---
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('SELECT * FROM welcomer_settings WHERE guild_id=?', (guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM welcomer_settings WHERE guild_id=?', (guild.id,))
 
         if row:
             guild_id, enabled, channel_id, msg, embed_on, etitle, ecolor, eimg, ethumb = row
@@ -6911,11 +8805,7 @@ async def on_member_join(member: discord.Member):
 
     # --- Greet (DM) ---
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('SELECT * FROM greet_settings WHERE guild_id=?', (guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM greet_settings WHERE guild_id=?', (guild.id,))
 
         if row:
             guild_id, enabled, msg, embed_on, etitle, ecolor = row
@@ -6960,11 +8850,7 @@ async def on_member_remove(member: discord.Member):
 
     # --- Farewell (channel message) ---
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('SELECT * FROM farewell_settings WHERE guild_id=?', (guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT * FROM farewell_settings WHERE guild_id=?', (guild.id,))
 
         if row:
             guild_id, enabled, channel_id, msg, embed_on, etitle, ecolor = row
@@ -7139,211 +9025,436 @@ async def on_voice_state_update(member: discord.Member, before: discord.VoiceSta
 
 
 
+# ============================================================================
+# OUTBOUND HTTP
+# ============================================================================
+
+class _HostStats:
+    __slots__ = ('requests', 'errors', 'statuses', 'total_ms', 'max_ms')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.statuses: Dict[str, int] = {}  # '2xx' -> count
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class HttpClient:
+    """The one aiohttp ClientSession used for all outbound HTTP (stream checks, OAuth).
+
+    Connections are kept alive per host (HTTP_POOL_LIMIT in total, HTTP_POOL_LIMIT_PER_HOST
+    per host, idle for up to HTTP_KEEPALIVE_SECONDS so they survive between stream check
+    cycles), DNS answers are cached for HTTP_DNS_CACHE_SECONDS and every request gets the
+    HTTP_*TIMEOUT_SECONDS limits. Latency (time to response headers), status classes and
+    errors are recorded per host."""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._hosts: Dict[str, _HostStats] = {}
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_SECONDS,
+                keepalive_timeout=HTTP_KEEPALIVE_SECONDS
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS, sock_connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+            )
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """`async with http_client.request(...) as resp` - like ClientSession.request, with per-host metrics"""
+        await self.start()
+        host = urlsplit(url).hostname or '?'
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = _HostStats()
+        stats.requests += 1
+        start = time.perf_counter()
+        try:
+            async with self._session.request(method, url, **kwargs) as resp:
+                elapsed = (time.perf_counter() - start) * 1000
+                stats.total_ms += elapsed
+                stats.max_ms = max(stats.max_ms, elapsed)
+                status_class = f"{resp.status // 100}xx"
+                stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+                yield resp
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            stats.errors += 1
+            raise
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        result = {}
+        for host, st in self._hosts.items():
+            answered = sum(st.statuses.values())
+            result[host] = {
+                'requests': st.requests,
+                'errors': st.errors,
+                'statuses': dict(st.statuses),
+                'avg_ms': st.total_ms / answered if answered else 0.0,
+                'max_ms': st.max_ms,
+            }
+        return result
+
+
+http_client = HttpClient()
+
 # ============================================================================
 # 🔴 STREAM NOTIFICATIONS (SXLive Style)
 # ============================================================================
 
-# In-memory cache for Twitch OAuth tokens
-_twitch_tokens = {}  # guild_id -> {'token': str, 'expires_at': datetime}
+# In-memory cache for Twitch app access tokens
+_twitch_tokens = {}  # client_id -> {'token': str, 'expires_at': datetime}
 
 
-async def get_twitch_token(guild_id: int) -> Optional[str]:
-    """Get or refresh Twitch app access token for a guild"""
+async def get_twitch_token(client_id: str, client_secret: str) -> Optional[str]:
+    """Get or refresh the Twitch app access token for a set of API credentials"""
     # Check cache
-    if guild_id in _twitch_tokens:
-        cached = _twitch_tokens[guild_id]
-        if cached['expires_at'] > datetime.now():
-            return cached['token']
-    
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT twitch_client_id, twitch_client_secret FROM stream_settings WHERE guild_id=?', (guild_id,))
-    row = c.fetchone()
-    conn.close()
-    
-    if not row or not row[0] or not row[1]:
-        return None
-    
-    client_id, client_secret = row
+    cached = _twitch_tokens.get(client_id)
+    if cached and cached['expires_at'] > datetime.now():
+        return cached['token']
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post('https://id.twitch.tv/oauth2/token', params={
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'grant_type': 'client_credentials'
-            }) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    token = data['access_token']
-                    expires_in = data.get('expires_in', 3600)
-                    _twitch_tokens[guild_id] = {
-                        'token': token,
-                        'expires_at': datetime.now() + timedelta(seconds=expires_in - 60)
-                    }
-                    return token
+        async with http_client.post('https://id.twitch.tv/oauth2/token', params={
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'grant_type': 'client_credentials'
+        }) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                token = data['access_token']
+                expires_in = data.get('expires_in', 3600)
+                _twitch_tokens[client_id] = {
+                    'token': token,
+                    'expires_at': datetime.now() + timedelta(seconds=expires_in - 60)
+                }
+                return token
     except Exception as e:
         logger.error(f"Failed to get Twitch token: {e}")
     return None
 
 
-async def check_twitch_live(guild_id: int, username: str) -> Optional[Dict]:
-    """Check if a Twitch streamer is live"""
-    token = await get_twitch_token(guild_id)
+def _twitch_stream_result(stream: Dict, username: str) -> Dict:
+    return {
+        'is_live': True,
+        'title': stream.get('title', 'No Title'),
+        'game': stream.get('game_name', 'Unknown'),
+        'viewers': stream.get('viewer_count', 0),
+        'thumbnail': stream.get('thumbnail_url', '').replace('{width}', '440').replace('{height}', '248'),
+        'started_at': stream.get('started_at', ''),
+        'url': f'https://twitch.tv/{username}',
+        'platform': 'twitch',
+        'username': username,
+        'display_name': stream.get('user_name', username),
+    }
+
+
+async def check_twitch_live_batch(client_id: str, client_secret: str, usernames) -> Dict[str, Dict]:
+    """Live status of many Twitch logins, one Helix /streams request per TWITCH_STREAMS_BATCH logins.
+
+    Returns {login: result}; logins whose request failed are left out (status unknown)."""
+    token = await get_twitch_token(client_id, client_secret)
     if not token:
-        return None
-    
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT twitch_client_id FROM stream_settings WHERE guild_id=?', (guild_id,))
-    row = c.fetchone()
-    conn.close()
-    if not row:
-        return None
+        return {}
     
-    client_id = row[0]
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                'Client-ID': client_id,
-                'Authorization': f'Bearer {token}'
-            }
-            async with session.get(
-                f'https://api.twitch.tv/helix/streams?user_login={username}',
-                headers=headers
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if data['data']:
-                        stream = data['data'][0]
-                        return {
-                            'is_live': True,
-                            'title': stream.get('title', 'No Title'),
-                            'game': stream.get('game_name', 'Unknown'),
-                            'viewers': stream.get('viewer_count', 0),
-                            'thumbnail': stream.get('thumbnail_url', '').replace('{width}', '440').replace('{height}', '248'),
-                            'started_at': stream.get('started_at', ''),
-                            'url': f'https://twitch.tv/{username}',
-                            'platform': 'twitch',
-                            'username': username,
-                            'display_name': stream.get('user_name', username),
-                        }
-                    return {'is_live': False}
-    except Exception as e:
-        logger.error(f"Twitch API error for {username}: {e}")
-    return None
+    headers = {
+        'Client-ID': client_id,
+        'Authorization': f'Bearer {token}'
+    }
+    logins = sorted({username.lower() for username in usernames})
+    results = {}
+    for start in range(0, len(logins), TWITCH_STREAMS_BATCH):
+        chunk = logins[start:start + TWITCH_STREAMS_BATCH]
+        params = [('user_login', login) for login in chunk] + [('first', str(TWITCH_STREAMS_BATCH))]
+        data = None
+        try:
+            for attempt in range(2):
+                async with http_client.get('https://api.twitch.tv/helix/streams', params=params, headers=headers) as resp:
+                    if resp.status == 200:
+                        data = await resp.json()
+                        break
+                    if resp.status == 401 and attempt == 0:
+                        # Token expired or revoked - fetch a fresh one and retry this chunk once
+                        _twitch_tokens.pop(client_id, None)
+                        token = await get_twitch_token(client_id, client_secret)
+                        if token:
+                            headers['Authorization'] = f'Bearer {token}'
+                            continue
+                    logger.warning(f"Twitch API returned {resp.status} for {len(chunk)} logins")
+                    break
+        except Exception as e:
+            logger.error(f"Twitch API error for {len(chunk)} logins: {e}")
+        if data is None:
+            continue
+        
+        live = {stream.get('user_login', '').lower(): stream for stream in data.get('data', [])}
+        for login in chunk:
+            results[login] = _twitch_stream_result(live[login], login) if login in live else {'is_live': False}
+    return results
 
 
 async def check_kick_live(username: str) -> Optional[Dict]:
     """Check if a Kick streamer is live"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f'https://kick.com/api/v2/channels/{username}',
-                headers={'Accept': 'application/json'}
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    livestream = data.get('livestream')
-                    if livestream and livestream.get('is_live'):
-                        return {
-                            'is_live': True,
-                            'title': livestream.get('session_title', 'No Title'),
-                            'game': livestream.get('categories', [{}])[0].get('name', 'Unknown') if livestream.get('categories') else 'Unknown',
-                            'viewers': livestream.get('viewer_count', 0),
-                            'thumbnail': livestream.get('thumbnail', {}).get('url', '') if isinstance(livestream.get('thumbnail'), dict) else '',
-                            'url': f'https://kick.com/{username}',
-                            'platform': 'kick',
-                            'username': username,
-                            'display_name': data.get('user', {}).get('username', username),
-                        }
-                    return {'is_live': False}
+        async with http_client.get(
+            f'https://kick.com/api/v2/channels/{username}',
+            headers={'Accept': 'application/json'}
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                livestream = data.get('livestream')
+                if livestream and livestream.get('is_live'):
+                    return {
+                        'is_live': True,
+                        'title': livestream.get('session_title', 'No Title'),
+                        'game': livestream.get('categories', [{}])[0].get('name', 'Unknown') if livestream.get('categories') else 'Unknown',
+                        'viewers': livestream.get('viewer_count', 0),
+                        'thumbnail': livestream.get('thumbnail', {}).get('url', '') if isinstance(livestream.get('thumbnail'), dict) else '',
+                        'url': f'https://kick.com/{username}',
+                        'platform': 'kick',
+                        'username': username,
+                        'display_name': data.get('user', {}).get('username', username),
+                    }
+                return {'is_live': False}
     except Exception as e:
         logger.error(f"Kick API error for {username}: {e}")
     return None
 
 
-async def check_youtube_live(guild_id: int, channel_id_or_handle: str) -> Optional[Dict]:
-    """Check if a YouTube channel is live"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT youtube_api_key FROM stream_settings WHERE guild_id=?', (guild_id,))
-    row = c.fetchone()
-    conn.close()
-    
-    if not row or not row[0]:
+class YouTubeLiveChecker:
+    """Detects live YouTube broadcasts without the 100-unit search.list call.
+
+    Each tracked handle is resolved to its channel ID once (channels.list forHandle, 1 unit)
+    and cached in youtube_channels. Every check reads the channel's public RSS feed, which
+    costs no quota, and diffs it against the video IDs seen last time; new uploads and videos
+    still upcoming or live are confirmed with videos.list, 50 IDs per call (1 unit). When a
+    feed can't be read the uploads playlist (playlistItems.list, 1 unit) is used instead."""
+
+    API = 'https://www.googleapis.com/youtube/v3'
+    FEED = 'https://www.youtube.com/feeds/videos.xml'
+    VIDEO_BATCH = 50  # videos.list maximum
+    FIRST_LOOK = 3  # newest videos confirmed the first time a channel's feed is read
+    RESOLVE_RETRY_SECONDS = 3600  # how long an unknown handle is left alone
+    _VIDEO_ID = re.compile(r'<yt:videoId>([\w-]{11})</yt:videoId>')
+    _CHANNEL_ID = re.compile(r'UC[\w-]{22}')
+
+    def __init__(self, executor: 'DatabaseExecutor'):
+        self.executor = executor
+        self._channels: Dict[str, Tuple[str, str]] = {}  # handle -> (channel_id, title)
+        self._unresolved: Dict[str, float] = {}  # handle -> monotonic time of the failed lookup
+        self._seen: Dict[str, set] = {}  # channel_id -> video IDs in its last feed
+        self._watch: Dict[str, set] = {}  # channel_id -> video IDs that are or may become live
+        self._loaded = False
+        self.units = 0
+        self.resolved = 0
+        self.feed_reads = 0
+        self.playlist_reads = 0
+        self.video_batches = 0
+
+    async def _load(self):
+        rows = await self.executor.fetchall('SELECT handle, channel_id, title FROM youtube_channels')
+        self._channels.update((handle, (channel_id, title)) for handle, channel_id, title in rows)
+        self._loaded = True
+
+    async def _get(self, url: str, params: Dict, as_json: bool = True):
+        """GET a feed or API response; None when the request fails, so one bad read only
+        affects its own channel (or moves _api on to the next key)"""
+        endpoint = url.rsplit('/', 1)[-1]
+        try:
+            async with http_client.get(url, params=params) as resp:
+                if resp.status != 200:
+                    logger.warning(f"YouTube request to {endpoint} returned {resp.status}")
+                    return None
+                return await resp.json() if as_json else await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.warning(f"YouTube request to {endpoint} failed: {e!r}")
+            return None
+
+    async def _api(self, api_keys: List[str], endpoint: str, params: Dict, cost: int = 1) -> Optional[Dict]:
+        """Call a Data API endpoint, trying each API key in turn until one succeeds"""
+        for api_key in api_keys:
+            self.units += cost
+            data = await stream_poller.fetch('youtube', self._get, f'{self.API}/{endpoint}', {**params, 'key': api_key})
+            if data is not None:
+                return data
         return None
-    
-    api_key = row[0]
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            # First resolve channel ID if it's a handle
-            search_query = channel_id_or_handle
-            
-            async with session.get(
-                'https://www.googleapis.com/youtube/v3/search',
-                params={
-                    'part': 'snippet',
-                    'channelId': channel_id_or_handle if channel_id_or_handle.startswith('UC') else None,
-                    'q': channel_id_or_handle if not channel_id_or_handle.startswith('UC') else None,
-                    'type': 'video',
-                    'eventType': 'live',
-                    'key': api_key,
-                    'maxResults': 1
-                }
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    items = data.get('items', [])
-                    if items:
-                        snippet = items[0]['snippet']
-                        video_id = items[0]['id'].get('videoId', '')
-                        return {
-                            'is_live': True,
-                            'title': snippet.get('title', 'No Title'),
-                            'game': 'YouTube Live',
-                            'viewers': 0,
-                            'thumbnail': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
-                            'url': f'https://youtube.com/watch?v={video_id}',
-                            'platform': 'youtube',
-                            'username': channel_id_or_handle,
-                            'display_name': snippet.get('channelTitle', channel_id_or_handle),
-                        }
-                    return {'is_live': False}
-    except Exception as e:
-        logger.error(f"YouTube API error for {channel_id_or_handle}: {e}")
-    return None
+
+    async def _resolve(self, api_keys: List[str], handle: str) -> Optional[Tuple[str, str]]:
+        """Channel ID and title of a handle, looked up once and then cached"""
+        if handle in self._channels:
+            return self._channels[handle]
+        if time.monotonic() - self._unresolved.get(handle, float('-inf')) < self.RESOLVE_RETRY_SECONDS:
+            return None
+        
+        channel = None
+        if self._CHANNEL_ID.fullmatch(handle):
+            channel = (handle, handle)
+        elif self._CHANNEL_ID.fullmatch(handle[:2].upper() + handle[2:]):
+            # A channel ID stored lowercased; IDs are case-sensitive, so find it by search once
+            data = await self._api(api_keys, 'search', {'part': 'snippet', 'type': 'channel', 'q': handle, 'maxResults': 5}, cost=100)
+            for item in (data or {}).get('items', []):
+                if item['snippet']['channelId'].lower() == handle:
+                    channel = (item['snippet']['channelId'], item['snippet'].get('title', handle))
+                    break
+        else:
+            data = await self._api(api_keys, 'channels', {'part': 'snippet', 'forHandle': f'@{handle}'})
+            items = (data or {}).get('items', [])
+            if items:
+                channel = (items[0]['id'], items[0]['snippet'].get('title', handle))
+        
+        if not channel:
+            self._unresolved[handle] = time.monotonic()
+            logger.warning(f"Could not resolve YouTube channel '{handle}'")
+            return None
+        self._channels[handle] = channel
+        self.resolved += 1
+        self.executor.execute_nowait('INSERT OR REPLACE INTO youtube_channels (handle, channel_id, title, resolved_at) VALUES (?, ?, ?, ?)',
+                                     (handle, *channel, datetime.now().isoformat()))
+        return channel
+
+    async def _recent_videos(self, api_keys: List[str], channel_id: str) -> Optional[List[str]]:
+        """Newest video IDs of a channel from its RSS feed, or its uploads playlist as a fallback"""
+        feed = await stream_poller.fetch('youtube_feed', self._get, self.FEED, {'channel_id': channel_id}, False)
+        if feed is not None:
+            self.feed_reads += 1
+            return self._VIDEO_ID.findall(feed)
+        data = await self._api(api_keys, 'playlistItems', {'part': 'contentDetails', 'playlistId': 'UU' + channel_id[2:], 'maxResults': 15})
+        if data is None:
+            return None
+        self.playlist_reads += 1
+        return [item['contentDetails']['videoId'] for item in data.get('items', [])]
+
+    async def check_many(self, api_keys: List[str], handles: List[str]) -> Dict[str, Dict]:
+        """Live status of many channels. Returns {handle: result}; channels that couldn't be read are left out."""
+        if not self._loaded:
+            await self._load()
+        
+        resolved = await asyncio.gather(*(self._resolve(api_keys, handle) for handle in handles))
+        channels = {handle: channel for handle, channel in zip(handles, resolved) if channel}
+        channel_ids = sorted({channel_id for channel_id, _ in channels.values()})
+        feeds = await asyncio.gather(*(self._recent_videos(api_keys, channel_id) for channel_id in channel_ids))
+        
+        readable = set()
+        for channel_id, videos in zip(channel_ids, feeds):
+            if videos is None:
+                continue
+            seen = self._seen.get(channel_id)
+            fresh = videos[:self.FIRST_LOOK] if seen is None else [v for v in videos if v not in seen]
+            self._seen[channel_id] = set(videos)
+            self._watch.setdefault(channel_id, set()).update(fresh)
+            readable.add(channel_id)
+        
+        video_ids = sorted({v for channel_id in readable for v in self._watch[channel_id]})
+        details, failed = {}, set()
+        for start in range(0, len(video_ids), self.VIDEO_BATCH):
+            batch = video_ids[start:start + self.VIDEO_BATCH]
+            data = await self._api(api_keys, 'videos', {'part': 'snippet,liveStreamingDetails', 'id': ','.join(batch),
+                                                        'maxResults': self.VIDEO_BATCH})
+            if data is None:
+                failed.update(batch)
+                continue
+            self.video_batches += 1
+            details.update((item['id'], item) for item in data.get('items', []))
+        
+        results = {}
+        for handle, (channel_id, title) in channels.items():
+            watch = self._watch.get(channel_id)
+            if channel_id not in readable or watch & failed:
+                continue
+            live = None
+            for video_id in sorted(watch):
+                item = details.get(video_id)
+                state = item['snippet'].get('liveBroadcastContent', 'none') if item else 'none'
+                if state == 'none':
+                    watch.discard(video_id)  # ended, a regular upload, or gone
+                elif state == 'live' and live is None:
+                    live = item
+            results[handle] = self._live_result(handle, title, live) if live else {'is_live': False}
+        return results
+
+    def channel_id(self, handle: str) -> Optional[str]:
+        """Cached channel ID of a handle, if it has been resolved"""
+        channel = self._channels.get(handle)
+        return channel[0] if channel else None
+
+    def forget(self, channel_id: str):
+        """Drop the feed diff state of a channel nobody tracks any more"""
+        self._seen.pop(channel_id, None)
+        self._watch.pop(channel_id, None)
+
+    @staticmethod
+    def _live_result(handle: str, title: str, item: Dict) -> Dict:
+        snippet = item['snippet']
+        thumbnails = snippet.get('thumbnails', {})
+        return {
+            'is_live': True,
+            'title': snippet.get('title', 'No Title'),
+            'game': 'YouTube Live',
+            'viewers': int(item.get('liveStreamingDetails', {}).get('concurrentViewers', 0) or 0),
+            'thumbnail': (thumbnails.get('maxres') or thumbnails.get('high') or {}).get('url', ''),
+            'url': f"https://youtube.com/watch?v={item['id']}",
+            'platform': 'youtube',
+            'username': handle,
+            'display_name': snippet.get('channelTitle', title),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            'units': self.units,
+            'channels': len(self._channels),
+            'resolved': self.resolved,
+            'feed_reads': self.feed_reads,
+            'playlist_reads': self.playlist_reads,
+            'video_batches': self.video_batches,
+            'watching': sum(len(watch) for watch in self._watch.values()),
+        }
+
+
+youtube_checker = YouTubeLiveChecker(db)
 
 
 async def check_tiktok_live(username: str) -> Optional[Dict]:
     """Check if a TikTok user is live (scrape-based, no API key needed)"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f'https://www.tiktok.com/@{username}/live',
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                },
-                allow_redirects=True
-            ) as resp:
-                if resp.status == 200:
-                    text = await resp.text()
-                    # If redirected away from /live, they're not live
-                    if '/live' in str(resp.url) and '"isLiveStreaming":true' in text:
-                        return {
-                            'is_live': True,
-                            'title': f'{username} is LIVE on TikTok!',
-                            'game': 'TikTok Live',
-                            'viewers': 0,
-                            'thumbnail': '',
-                            'url': f'https://www.tiktok.com/@{username}/live',
-                            'platform': 'tiktok',
-                            'username': username,
-                            'display_name': username,
-                        }
-                    return {'is_live': False}
+        async with http_client.get(
+            f'https://www.tiktok.com/@{username}/live',
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            },
+            allow_redirects=True
+        ) as resp:
+            if resp.status == 200:
+                text = await resp.text()
+                # If redirected away from /live, they're not live
+                if '/live' in str(resp.url) and '"isLiveStreaming":true' in text:
+                    return {
+                        'is_live': True,
+                        'title': f'{username} is LIVE on TikTok!',
+                        'game': 'TikTok Live',
+                        'viewers': 0,
+                        'thumbnail': '',
+                        'url': f'https://www.tiktok.com/@{username}/live',
+                        'platform': 'tiktok',
+                        'username': username,
+                        'display_name': username,
+                    }
+                return {'is_live': False}
     except Exception as e:
         logger.error(f"TikTok check error for {username}: {e}")
     return None
@@ -7439,15 +9550,11 @@ async def stream_cmd(
         await interaction.response.send_message("❌ You need Manage Server permission!", ephemeral=True)
         return
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT OR IGNORE INTO stream_settings (guild_id) VALUES (?)', (interaction.guild.id,))
-    conn.commit()
+    await db.execute('INSERT OR IGNORE INTO stream_settings (guild_id) VALUES (?)', (interaction.guild.id,))
 
     # --- ADD STREAMER ---
     if action == "add":
         if not platform or not username:
-            conn.close()
             await interaction.response.send_message(
                 "❌ Usage: `/stream add <platform> <username>`\n"
                 "Example: `/stream add twitch ninja`\n"
@@ -7461,12 +9568,10 @@ async def stream_cmd(
         username_clean = username.lower().strip().lstrip('@')
 
         try:
-            c.execute(
+            await db.execute(
                 'INSERT INTO tracked_streamers (guild_id, platform, username, display_name, added_by, added_at) VALUES (?, ?, ?, ?, ?, ?)',
                 (interaction.guild.id, platform, username_clean, username, interaction.user.id, datetime.now().isoformat())
             )
-            conn.commit()
-            conn.close()
 
             platform_emoji = {'twitch': '🟣', 'kick': '🟢', 'youtube': '🔴', 'tiktok': '🎵'}.get(platform, '📺')
             await interaction.response.send_message(
@@ -7475,34 +9580,32 @@ async def stream_cmd(
                 ephemeral=True
             )
         except sqlite3.IntegrityError:
-            conn.close()
             await interaction.response.send_message(f"❌ **{username}** on {platform.title()} is already tracked!", ephemeral=True)
 
     # --- REMOVE STREAMER ---
     elif action == "remove":
         if not platform or not username:
-            conn.close()
             await interaction.response.send_message("❌ Usage: `/stream remove <platform> <username>`", ephemeral=True)
             return
 
         username_clean = username.lower().strip().lstrip('@')
-        c.execute('DELETE FROM tracked_streamers WHERE guild_id=? AND platform=? AND username=?',
-                  (interaction.guild.id, platform, username_clean))
-        deleted = c.rowcount
-        conn.commit()
-        conn.close()
+        result = await db.execute('DELETE FROM tracked_streamers WHERE guild_id=? AND platform=? AND username=?',
+                                  (interaction.guild.id, platform, username_clean))
+        deleted = result.rowcount
 
         if deleted:
+            if await stream_planner.forget(platform, username_clean) and platform == 'youtube':
+                channel_id = youtube_checker.channel_id(username_clean)
+                if channel_id:
+                    youtube_checker.forget(channel_id)
             await interaction.response.send_message(f"✅ Removed **{username}** ({platform.title()}) from stream notifications.", ephemeral=True)
         else:
             await interaction.response.send_message(f"❌ **{username}** on {platform.title()} was not being tracked.", ephemeral=True)
 
     # --- LIST STREAMERS ---
     elif action == "list":
-        c.execute('SELECT platform, username, display_name, is_live FROM tracked_streamers WHERE guild_id=? ORDER BY platform, username',
-                  (interaction.guild.id,))
-        streamers = c.fetchall()
-        conn.close()
+        streamers = await db.fetchall('SELECT platform, username, display_name, is_live FROM tracked_streamers WHERE guild_id=? ORDER BY platform, username',
+                                      (interaction.guild.id,))
 
         if not streamers:
             await interaction.response.send_message("📺 No streamers being tracked. Add one with `/stream add`!", ephemeral=True)
@@ -7526,40 +9629,30 @@ async def stream_cmd(
     # --- SET CHANNEL ---
     elif action == "setchannel":
         if not channel:
-            conn.close()
             await interaction.response.send_message("❌ Please specify a channel!", ephemeral=True)
             return
-        c.execute('UPDATE stream_settings SET notify_channel_id=? WHERE guild_id=?', (channel.id, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE stream_settings SET notify_channel_id=? WHERE guild_id=?', (channel.id, interaction.guild.id))
         await interaction.response.send_message(f"✅ Stream notifications will be sent to {channel.mention}!", ephemeral=True)
 
     # --- SET LIVE ROLE ---
     elif action == "liverole":
         if not role:
-            conn.close()
             await interaction.response.send_message("❌ Please specify a role to assign when someone goes live!", ephemeral=True)
             return
-        c.execute('UPDATE stream_settings SET live_role_id=? WHERE guild_id=?', (role.id, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE stream_settings SET live_role_id=? WHERE guild_id=?', (role.id, interaction.guild.id))
         await interaction.response.send_message(f"✅ **{role.name}** will be assigned to members when they go live on Discord!", ephemeral=True)
 
     # --- SET PING ROLE ---
     elif action == "pingrole":
         if not role:
-            conn.close()
             await interaction.response.send_message("❌ Please specify a role to ping when someone goes live!", ephemeral=True)
             return
-        c.execute('UPDATE stream_settings SET ping_role_id=? WHERE guild_id=?', (role.id, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE stream_settings SET ping_role_id=? WHERE guild_id=?', (role.id, interaction.guild.id))
         await interaction.response.send_message(f"✅ {role.mention} will be pinged when a streamer goes live!", ephemeral=True)
 
     # --- SET CUSTOM MESSAGE ---
     elif action == "setmessage":
         if not message:
-            conn.close()
             await interaction.response.send_message(
                 "❌ Usage: `/stream setmessage` with a message.\n\n"
                 "**Variables you can use:**\n"
@@ -7575,15 +9668,12 @@ async def stream_cmd(
                 ephemeral=True
             )
             return
-        c.execute('UPDATE stream_settings SET custom_message=? WHERE guild_id=?', (message, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE stream_settings SET custom_message=? WHERE guild_id=?', (message, interaction.guild.id))
         await interaction.response.send_message(f"✅ Custom stream notification message set!", ephemeral=True)
 
     # --- SET COOLDOWN ---
     elif action == "cooldown":
         if not message:
-            conn.close()
             await interaction.response.send_message("❌ Usage: `/stream cooldown` with a value like `30` (minutes).", ephemeral=True)
             return
         try:
@@ -7592,19 +9682,14 @@ async def stream_cmd(
                 minutes = 5
             if minutes > 480:
                 minutes = 480
-            c.execute('UPDATE stream_settings SET cooldown_minutes=? WHERE guild_id=?', (minutes, interaction.guild.id))
-            conn.commit()
-            conn.close()
+            await db.execute('UPDATE stream_settings SET cooldown_minutes=? WHERE guild_id=?', (minutes, interaction.guild.id))
             await interaction.response.send_message(f"✅ Stream notification cooldown set to **{minutes} minutes**.", ephemeral=True)
         except ValueError:
-            conn.close()
             await interaction.response.send_message("❌ Please provide a number (in minutes). Example: `30`", ephemeral=True)
 
     # --- TEST ---
     elif action == "test":
-        c.execute('SELECT notify_channel_id FROM stream_settings WHERE guild_id=?', (interaction.guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT notify_channel_id FROM stream_settings WHERE guild_id=?', (interaction.guild.id,))
 
         if not row or not row[0]:
             await interaction.response.send_message("❌ Set a notification channel first with `/stream setchannel`!", ephemeral=True)
@@ -7625,11 +9710,8 @@ async def stream_cmd(
 
     # --- VIEW SETTINGS ---
     elif action == "view":
-        c.execute('SELECT * FROM stream_settings WHERE guild_id=?', (interaction.guild.id,))
-        row = c.fetchone()
-        c.execute('SELECT COUNT(*) FROM tracked_streamers WHERE guild_id=?', (interaction.guild.id,))
-        streamer_count = c.fetchone()[0]
-        conn.close()
+        row = await db.fetchone('SELECT * FROM stream_settings WHERE guild_id=?', (interaction.guild.id,))
+        streamer_count = (await db.fetchone('SELECT COUNT(*) FROM tracked_streamers WHERE guild_id=?', (interaction.guild.id,)))[0]
 
         if not row:
             await interaction.response.send_message("❌ No stream settings configured!", ephemeral=True)
@@ -7651,8 +9733,6 @@ async def stream_cmd(
         if custom_msg:
             em.add_field(name="Custom Message", value=custom_msg[:200], inline=False)
         await interaction.response.send_message(embed=em, ephemeral=True)
-    else:
-        conn.close()
 
     log_command(interaction.guild.id, interaction.user.id, 'stream')
 
@@ -7678,13 +9758,10 @@ async def streamkey(interaction: discord.Interaction, platform: str, key1: str,
         await interaction.response.send_message("❌ Only admins can set API keys!", ephemeral=True)
         return
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('INSERT OR IGNORE INTO stream_settings (guild_id) VALUES (?)', (interaction.guild.id,))
+    await db.execute('INSERT OR IGNORE INTO stream_settings (guild_id) VALUES (?)', (interaction.guild.id,))
 
     if platform == "twitch":
         if not key2:
-            conn.close()
             await interaction.response.send_message(
                 "❌ Twitch requires both a **Client ID** and **Client Secret**.\n\n"
                 "1. Go to https://dev.twitch.tv/console/apps\n"
@@ -7694,18 +9771,14 @@ async def streamkey(interaction: discord.Interaction, platform: str, key1: str,
                 ephemeral=True
             )
             return
-        c.execute('UPDATE stream_settings SET twitch_client_id=?, twitch_client_secret=? WHERE guild_id=?',
-                  (key1, key2, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE stream_settings SET twitch_client_id=?, twitch_client_secret=? WHERE guild_id=?',
+                         (key1, key2, interaction.guild.id))
         # Clear cached token
-        _twitch_tokens.pop(interaction.guild.id, None)
+        _twitch_tokens.pop(key1, None)
         await interaction.response.send_message("✅ Twitch API credentials saved! You can now track Twitch streamers.", ephemeral=True)
 
     elif platform == "youtube":
-        c.execute('UPDATE stream_settings SET youtube_api_key=? WHERE guild_id=?', (key1, interaction.guild.id))
-        conn.commit()
-        conn.close()
+        await db.execute('UPDATE stream_settings SET youtube_api_key=? WHERE guild_id=?', (key1, interaction.guild.id))
         await interaction.response.send_message("✅ YouTube API key saved! You can now track YouTube streamers.", ephemeral=True)
 
     log_command(interaction.guild.id, interaction.user.id, 'streamkey')
@@ -7715,22 +9788,384 @@ async def streamkey(interaction: discord.Interaction, platform: str, key1: str,
 # Background task: Check streamers
 # ==========================================
 
-@tasks.loop(minutes=2)
+async def apply_stream_status(guild: discord.Guild, channel, notify: Tuple, streamer: Tuple, result: Dict):
+    """Store a streamer's live status and announce them if they just went live"""
+    ping_role_id, custom_msg, cooldown = notify
+    streamer_id, platform, username, display_name, was_live, last_notified = streamer
+    is_live = result.get('is_live', False)
+    
+    # Update status in DB
+    if is_live:
+        await db.execute('UPDATE tracked_streamers SET is_live=1, last_live_at=?, display_name=? WHERE id=?',
+                         (datetime.now().isoformat(), result.get('display_name', display_name), streamer_id))
+    else:
+        await db.execute('UPDATE tracked_streamers SET is_live=0 WHERE id=?', (streamer_id,))
+    
+    # Send notification if just went live (was offline, now live)
+    if is_live and not was_live:
+        # Check cooldown
+        if last_notified:
+            last_time = datetime.fromisoformat(last_notified)
+            if datetime.now() - last_time < timedelta(minutes=cooldown):
+                return
+        
+        # Build and send notification
+        ping_text = ""
+        if ping_role_id:
+            ping_role = guild.get_role(ping_role_id)
+            if ping_role:
+                ping_text = ping_role.mention
+        
+        # Custom message
+        content_text = ping_text
+        if custom_msg:
+            formatted = custom_msg.replace('{STREAMER}', result.get('display_name', username))
+            formatted = formatted.replace('{PLATFORM}', platform.title())
+            formatted = formatted.replace('{TITLE}', result.get('title', ''))
+            formatted = formatted.replace('{GAME}', result.get('game', ''))
+            formatted = formatted.replace('{URL}', result.get('url', ''))
+            formatted = formatted.replace('{VIEWERS}', str(result.get('viewers', 0)))
+            formatted = formatted.replace('{EVERYONE}', '@everyone')
+            formatted = formatted.replace('{HERE}', '@here')
+            content_text = f"{ping_text} {formatted}".strip()
+        
+        embed = build_stream_embed(result)
+        
+        try:
+            await channel.send(content=content_text if content_text else None, embed=embed)
+            await db.execute('UPDATE tracked_streamers SET last_notified_at=? WHERE id=?',
+                             (datetime.now().isoformat(), streamer_id))
+            logger.info(f"Sent stream notification for {username} ({platform}) in guild {guild.id}")
+        except Exception as e:
+            logger.error(f"Failed to send stream notification: {e}")
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second on average, bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.waited = 0.0  # total seconds callers spent waiting for a token
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.acquired += 1
+                return
+            wait = (1 - self.tokens) / self.rate
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+
+class StreamPoller:
+    """Runs the stream checks of one cycle concurrently.
+
+    Every platform API call goes through fetch(): it waits for a token from that platform's
+    bucket (STREAM_RATE_LIMITS), then runs under a global cap of STREAM_CHECK_CONCURRENCY
+    requests in flight. run_cycle() starts all jobs at once and cancels whatever is still
+    running after STREAM_CHECK_DEADLINE_SECONDS so a slow platform can't push the next cycle
+    back. Cycle duration and start lag versus the loop interval are tracked."""
+
+    def __init__(self, interval: float = STREAM_CHECK_MINUTES * 60, concurrency: int = STREAM_CHECK_CONCURRENCY,
+                 deadline: float = STREAM_CHECK_DEADLINE_SECONDS, rate_limits: Dict = STREAM_RATE_LIMITS):
+        self.interval = interval
+        self.deadline = deadline
+        self.buckets = {platform: TokenBucket(rate, burst) for platform, (rate, burst) in rate_limits.items()}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._last_start = None
+        self.cycles = 0
+        self.jobs = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.requests: Dict[str, int] = {}
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    async def fetch(self, platform: str, check, *args):
+        """Run one platform API check under its rate limit and the global concurrency cap"""
+        bucket = self.buckets.get(platform)
+        if bucket:
+            await bucket.acquire()
+        async with self._semaphore:
+            self.requests[platform] = self.requests.get(platform, 0) + 1
+            return await check(*args)
+
+    async def run_cycle(self, jobs: List):
+        """Run a cycle's job coroutines concurrently, cancelling any still running at the deadline"""
+        started = time.monotonic()
+        if self._last_start is not None:
+            self.last_lag = max(0.0, started - self._last_start - self.interval)
+            self.max_lag = max(self.max_lag, self.last_lag)
+        self._last_start = started
+        
+        running = [asyncio.create_task(job) for job in jobs]
+        if running:
+            done, pending = await asyncio.wait(running, timeout=self.deadline)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"Stream check cycle hit its {self.deadline:.0f}s deadline; cancelled {len(pending)} checks")
+            self.timed_out += len(pending)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    self.failed += 1
+                    logger.error(f"Stream check failed: {task.exception()}")
+        
+        self.cycles += 1
+        self.jobs += len(running)
+        self.last_duration = time.monotonic() - started
+        self.max_duration = max(self.max_duration, self.last_duration)
+        self.total_duration += self.last_duration
+
+    def stats(self) -> Dict:
+        return {
+            'cycles': self.cycles,
+            'jobs': self.jobs,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'last_duration': self.last_duration,
+            'avg_duration': self.total_duration / self.cycles if self.cycles else 0.0,
+            'max_duration': self.max_duration,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+            'requests': dict(self.requests),
+            'throttled': {platform: bucket.waited for platform, bucket in self.buckets.items()},
+        }
+
+
+stream_poller = StreamPoller()
+
+
+class _ChannelPollState:
+    __slots__ = ('live', 'last_live', 'first_seen', 'go_live', 'next_check')
+
+    def __init__(self, first_seen: datetime, last_live: Optional[datetime] = None, live: bool = False):
+        self.live = live
+        self.last_live = last_live
+        self.first_seen = first_seen
+        self.go_live = deque(maxlen=STREAM_GO_LIVE_HISTORY)  # minute of day of recent go-lives
+        self.next_check = None  # None = due on the next cycle
+
+
+class StreamPollPlanner:
+    """Decides which channels are due for a lookup on each stream check cycle.
+
+    Live channels, channels that went offline within STREAM_POLL_OFFLINE_GRACE_MINUTES and
+    channels inside a window around one of their recent go-live times of day are checked
+    every cycle. Otherwise the interval doubles for every day since the channel was last
+    live, capped at STREAM_POLL_MAX_MINUTES and never skipping past the next go-live window.
+    Go-live times are kept in stream_go_live so the pattern survives a restart."""
+
+    def __init__(self, executor: 'DatabaseExecutor'):
+        self.executor = executor
+        self._channels: Dict[Tuple[str, str], _ChannelPollState] = {}
+        self.loaded = False
+        self.checked = 0
+        self.skipped = 0
+        self.last_due = 0
+        self.last_skipped = 0
+
+    async def load(self):
+        """Seed channel state from tracked_streamers and the go-live history"""
+        now = datetime.now()
+        # History of channels nobody tracks any more (removed while the bot was down, say)
+        await self.executor.execute('''DELETE FROM stream_go_live WHERE NOT EXISTS (
+                                         SELECT 1 FROM tracked_streamers ts
+                                         WHERE ts.platform = stream_go_live.platform AND ts.username = stream_go_live.username)''')
+        rows = await self.executor.fetchall('''SELECT platform, username, MAX(last_live_at), MAX(is_live), MIN(added_at)
+                                               FROM tracked_streamers GROUP BY platform, username''')
+        for platform, username, last_live_at, is_live, added_at in rows:
+            self._channels[(platform, username.lower())] = _ChannelPollState(
+                datetime.fromisoformat(added_at) if added_at else now,
+                datetime.fromisoformat(last_live_at) if last_live_at else None,
+                bool(is_live))
+        for platform, username, started_at in await self.executor.fetchall(
+                'SELECT platform, username, started_at FROM stream_go_live ORDER BY started_at'):
+            state = self._channels.get((platform, username))
+            if state:
+                started = datetime.fromisoformat(started_at)
+                state.go_live.append(started.hour * 60 + started.minute)
+        self.loaded = True
+
+    async def forget(self, platform: str, username: str) -> bool:
+        """Drop a channel's polling state and go-live history once no guild tracks it;
+        returns whether it was dropped"""
+        if not await self.executor.transaction(self._forget, platform, username):
+            return False
+        self._channels.pop((platform, username), None)
+        return True
+
+    @staticmethod
+    def _forget(conn, platform: str, username: str) -> bool:
+        if conn.execute('SELECT 1 FROM tracked_streamers WHERE platform=? AND username=? LIMIT 1',
+                        (platform, username)).fetchone():
+            return False
+        conn.execute('DELETE FROM stream_go_live WHERE platform=? AND username=?', (platform, username))
+        return True
+
+    def due(self, platform: str, username: str, now: datetime) -> bool:
+        state = self._channels.get((platform, username))
+        # Half a cycle of slack so a channel due just after this tick isn't pushed back a whole cycle
+        return (state is None or state.next_check is None
+                or state.next_check <= now + timedelta(minutes=STREAM_CHECK_MINUTES / 2))
+
+    def plan(self, channels: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Filter {platform: [username]} down to the channels due this cycle"""
+        now = datetime.now()
+        due = {platform: [u for u in usernames if self.due(platform, u, now)] for platform, usernames in channels.items()}
+        total = sum(len(usernames) for usernames in channels.values())
+        self.last_due = sum(len(usernames) for usernames in due.values())
+        self.last_skipped = total - self.last_due
+        self.checked += self.last_due
+        self.skipped += self.last_skipped
+        return due
+
+    def interval(self, state: _ChannelPollState, now: datetime) -> float:
+        """Minutes until a channel's next lookup"""
+        base = STREAM_CHECK_MINUTES
+        if state.live:
+            return base
+        if state.last_live and now - state.last_live < timedelta(minutes=STREAM_POLL_OFFLINE_GRACE_MINUTES):
+            return base
+        minute = now.hour * 60 + now.minute
+        window = STREAM_POLL_GO_LIVE_WINDOW_MINUTES
+        until_window = 24 * 60
+        for start in state.go_live:
+            offset = (start - minute) % (24 * 60)
+            if offset <= window or offset >= 24 * 60 - window:
+                return base
+            until_window = min(until_window, offset - window)
+        idle_days = (now - (state.last_live or state.first_seen)).days
+        backoff = min(STREAM_POLL_MAX_MINUTES, base * 2 ** min(idle_days, 16))
+        return max(base, min(backoff, until_window))
+
+    def observe(self, platform: str, username: str, result: Optional[Dict]):
+        """Record a lookup's result and schedule the channel's next check"""
+        if not result:
+            return  # lookup failed: leave the channel due so the next cycle retries it
+        now = datetime.now()
+        key = (platform, username)
+        state = self._channels.get(key)
+        if state is None:
+            state = self._channels[key] = _ChannelPollState(now)
+        is_live = bool(result.get('is_live'))
+        if is_live:
+            if not state.live:
+                state.go_live.append(now.hour * 60 + now.minute)
+                self.executor.execute_nowait('INSERT OR IGNORE INTO stream_go_live (platform, username, started_at) VALUES (?, ?, ?)',
+                                             (platform, username, now.isoformat()))
+                self.executor.execute_nowait('''DELETE FROM stream_go_live WHERE platform=? AND username=? AND started_at <
+                                                (SELECT started_at FROM stream_go_live WHERE platform=? AND username=?
+                                                 ORDER BY started_at DESC LIMIT 1 OFFSET ?)''',
+                                             (platform, username, platform, username, STREAM_GO_LIVE_HISTORY - 1))
+            state.last_live = now
+        state.live = is_live
+        state.next_check = now + timedelta(minutes=self.interval(state, now))
+
+    def stats(self) -> Dict:
+        now = datetime.now()
+        intervals = [self.interval(state, now) for state in self._channels.values()]
+        return {
+            'channels': len(self._channels),
+            'fast': sum(1 for minutes in intervals if minutes <= STREAM_CHECK_MINUTES),
+            'max_interval': max(intervals, default=0),
+            'last_due': self.last_due,
+            'last_skipped': self.last_skipped,
+            'checked': self.checked,
+            'skipped': self.skipped,
+        }
+
+
+stream_planner = StreamPollPlanner(db)
+
+
+class StreamStatusBoard:
+    """Live status of each (platform, username) for the current check cycle.
+
+    While a cycle is planned every guild subscribes to the channels it tracks; each unique
+    channel is then fetched once, published here, and fanned out to all of its subscribers.
+    Notification and cooldown decisions stay per guild in apply_stream_status."""
+
+    def __init__(self):
+        self._subscribers: Dict[Tuple[str, str], List[Tuple]] = {}
+        self._status: Dict[Tuple[str, str], Dict] = {}
+        self.lookups = 0
+        self.subscriptions = 0
+        self.last_channels = 0
+        self.last_subscriptions = 0
+
+    def begin_cycle(self):
+        self._subscribers = {}
+        self._status = {}
+
+    def subscribe(self, platform: str, username: str, subscriber: Tuple):
+        """Register (guild, channel, notify, streamer) as interested in a channel this cycle"""
+        self._subscribers.setdefault((platform, username.lower()), []).append(subscriber)
+
+    def channels(self, platform: str) -> List[str]:
+        return sorted(username for (p, username) in self._subscribers if p == platform)
+
+    def get(self, platform: str, username: str) -> Optional[Dict]:
+        return self._status.get((platform, username.lower()))
+
+    async def publish(self, platform: str, username: str, result: Optional[Dict]):
+        """Store a channel's status for the cycle and apply it for every subscribing guild"""
+        key = (platform, username.lower())
+        self.lookups += 1
+        stream_planner.observe(*key, result)
+        if not result:
+            return
+        self._status[key] = result
+        for guild, channel, notify, streamer in self._subscribers.get(key, ()):
+            try:
+                await apply_stream_status(guild, channel, notify, streamer, result)
+            except Exception as e:
+                logger.error(f"Error applying {platform} status of {username} in guild {guild.id}: {e}")
+
+    def end_planning(self):
+        self.last_channels = len(self._subscribers)
+        self.last_subscriptions = sum(len(subs) for subs in self._subscribers.values())
+        self.subscriptions += self.last_subscriptions
+
+    def stats(self) -> Dict:
+        return {
+            'channels': self.last_channels,
+            'subscriptions': self.last_subscriptions,
+            'lookups': self.lookups,
+            'saved': max(0, self.subscriptions - self.lookups),
+        }
+
+
+stream_status = StreamStatusBoard()
+
+
+@tasks.loop(minutes=STREAM_CHECK_MINUTES)
 async def check_streamers_task():
     """Periodically check all tracked streamers across all guilds"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        
         # Get all guilds with stream settings
-        c.execute('''SELECT DISTINCT ts.guild_id, ss.notify_channel_id, ss.ping_role_id, 
-                     ss.custom_message, ss.cooldown_minutes, ss.embed_enabled
-                     FROM tracked_streamers ts
-                     JOIN stream_settings ss ON ts.guild_id = ss.guild_id
-                     WHERE ss.notify_channel_id IS NOT NULL''')
-        guilds_data = c.fetchall()
-        
-        for guild_id, channel_id, ping_role_id, custom_msg, cooldown, embed_on in guilds_data:
+        guilds_data = await db.fetchall('''SELECT DISTINCT ts.guild_id, ss.notify_channel_id, ss.ping_role_id, 
+                                           ss.custom_message, ss.cooldown_minutes, ss.embed_enabled,
+                                           ss.twitch_client_id, ss.twitch_client_secret, ss.youtube_api_key
+                                           FROM tracked_streamers ts
+                                           JOIN stream_settings ss ON ts.guild_id = ss.guild_id
+                                           WHERE ss.notify_channel_id IS NOT NULL''')
+        
+        stream_status.begin_cycle()
+        twitch_credentials = {}  # login -> (client_id, client_secret) of the first guild that can look it up
+        youtube_keys = {}  # handle -> API keys of the guilds tracking it
+        for guild_id, channel_id, ping_role_id, custom_msg, cooldown, embed_on, twitch_id, twitch_secret, youtube_key in guilds_data:
             guild = bot.get_guild(guild_id)
             if not guild:
                 continue
@@ -7740,87 +10175,78 @@ async def check_streamers_task():
                 continue
             
             # Get all streamers for this guild
-            c.execute('SELECT id, platform, username, display_name, is_live, last_notified_at FROM tracked_streamers WHERE guild_id=?',
-                      (guild_id,))
-            streamers = c.fetchall()
-            
-            for streamer_id, platform, username, display_name, was_live, last_notified in streamers:
-                try:
-                    # Check live status based on platform
-                    result = None
-                    if platform == 'twitch':
-                        result = await check_twitch_live(guild_id, username)
-                    elif platform == 'kick':
-                        result = await check_kick_live(username)
-                    elif platform == 'youtube':
-                        result = await check_youtube_live(guild_id, username)
-                    elif platform == 'tiktok':
-                        result = await check_tiktok_live(username)
-                    
-                    if not result:
-                        continue
-                    
-                    is_live = result.get('is_live', False)
-                    
-                    # Update status in DB
-                    if is_live:
-                        c.execute('UPDATE tracked_streamers SET is_live=1, last_live_at=?, display_name=? WHERE id=?',
-                                  (datetime.now().isoformat(), result.get('display_name', display_name), streamer_id))
-                    else:
-                        c.execute('UPDATE tracked_streamers SET is_live=0 WHERE id=?', (streamer_id,))
-                    conn.commit()
-                    
-                    # Send notification if just went live (was offline, now live)
-                    if is_live and not was_live:
-                        # Check cooldown
-                        if last_notified:
-                            last_time = datetime.fromisoformat(last_notified)
-                            if datetime.now() - last_time < timedelta(minutes=cooldown):
-                                continue
-                        
-                        # Build and send notification
-                        ping_text = ""
-                        if ping_role_id:
-                            ping_role = guild.get_role(ping_role_id)
-                            if ping_role:
-                                ping_text = ping_role.mention
-                        
-                        # Custom message
-                        content_text = ping_text
-                        if custom_msg:
-                            formatted = custom_msg.replace('{STREAMER}', result.get('display_name', username))
-                            formatted = formatted.replace('{PLATFORM}', platform.title())
-                            formatted = formatted.replace('{TITLE}', result.get('title', ''))
-                            formatted = formatted.replace('{GAME}', result.get('game', ''))
-                            formatted = formatted.replace('{URL}', result.get('url', ''))
-                            formatted = formatted.replace('{VIEWERS}', str(result.get('viewers', 0)))
-                            formatted = formatted.replace('{EVERYONE}', '@everyone')
-                            formatted = formatted.replace('{HERE}', '@here')
-                            content_text = f"{ping_text} {formatted}".strip()
-                        
-                        embed = build_stream_embed(result)
-                        
-                        try:
-                            await channel.send(content=content_text if content_text else None, embed=embed)
-                            c.execute('UPDATE tracked_streamers SET last_notified_at=? WHERE id=?',
-                                      (datetime.now().isoformat(), streamer_id))
-                            conn.commit()
-                            logger.info(f"Sent stream notification for {username} ({platform}) in guild {guild_id}")
-                        except Exception as e:
-                            logger.error(f"Failed to send stream notification: {e}")
-                    
-                    # Small delay between checks to avoid rate limits
-                    await asyncio.sleep(1)
-                    
-                except Exception as e:
-                    logger.error(f"Error checking {username} on {platform}: {e}")
+            streamers = await db.fetchall('SELECT id, platform, username, display_name, is_live, last_notified_at FROM tracked_streamers WHERE guild_id=?',
+                                          (guild_id,))
+            
+            notify = (ping_role_id, custom_msg, cooldown)
+            for streamer in streamers:
+                platform, username = streamer[1], streamer[2].lower()
+                stream_status.subscribe(platform, username, (guild, channel, notify, streamer))
+                if platform == 'twitch' and twitch_id and twitch_secret:
+                    twitch_credentials.setdefault(username, (twitch_id, twitch_secret))
+                elif platform == 'youtube' and youtube_key:
+                    keys = youtube_keys.setdefault(username, [])
+                    if youtube_key not in keys:
+                        keys.append(youtube_key)
+        stream_status.end_planning()
+        
+        # Every channel is looked up at most once per cycle, however many guilds track it,
+        # and only when its adaptive polling interval says it's due
+        if not stream_planner.loaded:
+            await stream_planner.load()
+        due = stream_planner.plan({
+            'twitch': sorted(twitch_credentials),
+            'kick': stream_status.channels('kick'),
+            'tiktok': stream_status.channels('tiktok'),
+            'youtube': sorted(youtube_keys),
+        })
         
-        conn.close()
+        jobs = []
+        by_credentials = {}
+        for login in due['twitch']:
+            by_credentials.setdefault(twitch_credentials[login], []).append(login)
+        for credentials, logins in by_credentials.items():
+            for start in range(0, len(logins), TWITCH_STREAMS_BATCH):
+                jobs.append(_check_twitch_chunk(credentials, logins[start:start + TWITCH_STREAMS_BATCH]))
+        for username in due['kick']:
+            jobs.append(_check_channel('kick', username, check_kick_live, username))
+        for username in due['tiktok']:
+            jobs.append(_check_channel('tiktok', username, check_tiktok_live, username))
+        by_keys = {}
+        for username in due['youtube']:
+            by_keys.setdefault(tuple(youtube_keys[username]), []).append(username)
+        for api_keys, handles in by_keys.items():
+            jobs.append(_check_youtube_batch(list(api_keys), handles))
+        
+        await stream_poller.run_cycle(jobs)
         
     except Exception as e:
         logger.error(f"Error in check_streamers_task: {e}")
 
 
+async def _check_channel(platform: str, username: str, check, *args):
+    """Look up one channel on a platform without bulk lookups"""
+    try:
+        result = await stream_poller.fetch(platform, check, *args)
+        await stream_status.publish(platform, username, result)
+    except Exception as e:
+        logger.error(f"Error checking {username} on {platform}: {e}")
+
+
+async def _check_youtube_batch(api_keys: List[str], handles: List[str]):
+    """Look up YouTube channels tracked with the same API keys, sharing videos.list batches"""
+    results = await youtube_checker.check_many(api_keys, handles)
+    for handle in handles:
+        await stream_status.publish('youtube', handle, results.get(handle))
+
+
+async def _check_twitch_chunk(credentials: Tuple[str, str], logins: List[str]):
+    """One Helix request for up to 100 logins"""
+    results = await stream_poller.fetch('twitch', check_twitch_live_batch, *credentials, logins)
+    for login, result in results.items():
+        await stream_status.publish('twitch', login, result)
+
+
 @check_streamers_task.before_loop
 async def before_check_streamers():
     await bot.wait_until_ready()
@@ -7836,11 +10262,7 @@ async def on_presence_update(before: discord.Member, after: discord.Member):
     guild = after.guild
     
     try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('SELECT live_role_id, notify_channel_id FROM stream_settings WHERE guild_id=?', (guild.id,))
-        row = c.fetchone()
-        conn.close()
+        row = await db.fetchone('SELECT live_role_id, notify_channel_id FROM stream_settings WHERE guild_id=?', (guild.id,))
         
         if not row:
             return
@@ -7946,4 +10368,9 @@ if __name__ == "__main__":
         except Exception as e:
             logger.critical(f"Bot crashed: {e}", exc_info=True)
             raise
+        finally:
+            audit_log.flush_nowait()
+            state_journal.flush_nowait()
+            db.shutdown()
+            db_pool.close_all()
 
@@ -22,11 +22,7 @@
 async def check_premium(user_id: int) -> bool:
     """Check if user has premium (Durable SKU)"""
     try:
-        conn = sqlite3.connect('jarvisqueue_full.db')
-        c = conn.cursor()
-        c.execute('SELECT user_id FROM premium_users WHERE user_id = ?', (user_id,))
-        result = c.fetchone()
-        conn.close()
+        result = await db.fetchone('SELECT user_id FROM premium_users WHERE user_id = ?', (user_id,))
         return result is not None
     except Exception as e:
         print(f"Error checking premium: {e}")
@@ -35,14 +31,10 @@ async def check_premium(user_id: int) -> bool:
 async def grant_premium(user_id: int, sku_id: str, entitlement_id: str):
     """Grant premium to a user"""
     try:
-        conn = sqlite3.connect('jarvisqueue_full.db')
-        c = conn.cursor()
-        c.execute('''INSERT OR REPLACE INTO premium_users 
-                     (user_id, sku_id, purchased_at, entitlement_id, profile_color, profile_badge)
-                     VALUES (?, ?, ?, ?, ?, ?)''',
-                  (user_id, sku_id, datetime.utcnow().isoformat(), entitlement_id, '#FFD700', '👑'))
-        conn.commit()
-        conn.close()
+        await db.execute('''INSERT OR REPLACE INTO premium_users 
+                            (user_id, sku_id, purchased_at, entitlement_id, profile_color, profile_badge)
+                            VALUES (?, ?, ?, ?, ?, ?)''',
+                         (user_id, sku_id, datetime.utcnow().isoformat(), entitlement_id, '#FFD700', '👑'))
         print(f"✅ Granted premium to user {user_id}")
     except Exception as e:
         print(f"Error granting premium: {e}")
@@ -50,24 +42,16 @@ async def grant_premium(user_id: int, sku_id: str, entitlement_id: str):
 async def revoke_premium(user_id: int):
     """Revoke premium from a user (if refunded)"""
     try:
-        conn = sqlite3.connect('jarvisqueue_full.db')
-        c = conn.cursor()
-        c.execute('DELETE FROM premium_users WHERE user_id = ?', (user_id,))
-        conn.commit()
-        conn.close()
+        await db.execute('DELETE FROM premium_users WHERE user_id = ?', (user_id,))
         print(f"❌ Revoked premium from user {user_id}")
     except Exception as e:
         print(f"Error revoking premium: {e}")
 
-def get_premium_settings(user_id: int) -> dict:
+async def get_premium_settings(user_id: int) -> dict:
     """Get user's premium customization settings"""
     try:
-        conn = sqlite3.connect('jarvisqueue_full.db')
-        c = conn.cursor()
-        c.execute('SELECT profile_color, profile_badge, custom_title FROM premium_users WHERE user_id = ?', 
-                  (user_id,))
-        result = c.fetchone()
-        conn.close()
+        result = await db.fetchone('SELECT profile_color, profile_badge, custom_title FROM premium_users WHERE user_id = ?', 
+                                   (user_id,))
         
         if result:
             return {
@@ -169,7 +153,7 @@ async def premium_info(interaction: discord.Interaction):
     
     if is_premium:
         # User already has premium
-        premium_settings = get_premium_settings(interaction.user.id)
+        premium_settings = await get_premium_settings(interaction.user.id)
         embed = discord.Embed(
             title="👑 You Have Premium!",
             description="Thank you for supporting Jarvis! You have access to all premium features.",
@@ -299,17 +283,14 @@ async def premium_customize(
     
     # Update database
     try:
-        conn = sqlite3.connect('jarvisqueue_full.db')
-        c = conn.cursor()
+        def _apply_updates(conn):
+            for column, value in updates:
+                conn.execute(f'UPDATE premium_users SET {column} = ? WHERE user_id = ?', (value, interaction.user.id))
         
-        for column, value in updates:
-            c.execute(f'UPDATE premium_users SET {column} = ? WHERE user_id = ?', (value, interaction.user.id))
-        
-        conn.commit()
-        conn.close()
+        await db.transaction(_apply_updates)
         
         # Show updated profile
-        settings = get_premium_settings(interaction.user.id)
+        settings = await get_premium_settings(interaction.user.id)
         embed = discord.Embed(
             title="✅ Premium Profile Updated!",
             description="Your settings have been saved.",
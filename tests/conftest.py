@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def jarvis(tmp_path_factory):
+    """Import the bot with its database in a temporary directory"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("db"))
+    try:
+        import jarvis
+        jarvis.init_db()
+        yield jarvis
+    finally:
+        os.chdir(cwd)
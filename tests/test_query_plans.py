@@ -0,0 +1,38 @@
+import sqlite3
+
+
+def test_hot_queries_use_indexes(jarvis):
+    assert jarvis.check_query_plans() == {}
+
+
+def test_missing_index_is_reported(jarvis):
+    conn = sqlite3.connect(jarvis.DB_FILE)
+    try:
+        conn.execute("DROP INDEX idx_queue_stats_mmr")
+        conn.commit()
+        regressions = jarvis.check_query_plans()
+        assert "leaderboard (queue)" in regressions
+        assert regressions["leaderboard (queue)"].startswith("SCAN")
+    finally:
+        table, columns = jarvis.SECONDARY_INDEXES["idx_queue_stats_mmr"]
+        conn.execute(f"CREATE INDEX idx_queue_stats_mmr ON {table} ({', '.join(columns)})")
+        conn.commit()
+        conn.close()
+
+
+def test_only_managed_indexes_are_dropped(jarvis):
+    conn = sqlite3.connect(jarvis.DB_FILE)
+    try:
+        conn.execute("CREATE INDEX idx_players_username ON players (username)")
+        conn.execute("CREATE INDEX idx_retired ON players (join_date)")
+        conn.execute("INSERT INTO managed_indexes (name, table_name, columns) VALUES ('idx_retired', 'players', 'join_date')")
+        conn.commit()
+        created, dropped = jarvis._ensure_secondary_indexes(conn.cursor())
+        conn.commit()
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert created == [] and dropped == ["idx_retired"]
+        assert "idx_players_username" in names and "idx_retired" not in names
+    finally:
+        conn.execute("DROP INDEX IF EXISTS idx_players_username")
+        conn.commit()
+        conn.close()
@@ -0,0 +1,60 @@
+import asyncio
+import contextlib
+
+import aiohttp
+
+GOOD = "UC" + "a" * 22
+BROKEN = "UC" + "b" * 22
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+
+    async def json(self):
+        return self._body
+
+    async def text(self):
+        return self._body
+
+
+def fake_get(jarvis):
+    @contextlib.asynccontextmanager
+    async def get(url, params=None, **kwargs):
+        if url == jarvis.YouTubeLiveChecker.FEED:
+            if params["channel_id"] == BROKEN:
+                raise aiohttp.ClientConnectionError("connection reset")
+            yield FakeResponse(200, "<entry><yt:videoId>liveVideo01</yt:videoId></entry>")
+        elif url.endswith("/videos"):
+            yield FakeResponse(200, {"items": [
+                {"id": video_id, "snippet": {"title": "Live", "channelTitle": "Good", "liveBroadcastContent": "live"}}
+                for video_id in params["id"].split(",")
+            ]})
+        else:
+            # playlistItems fallback for the broken channel times out as well
+            raise asyncio.TimeoutError()
+    return get
+
+
+def test_failed_feed_only_drops_its_own_channel(jarvis, monkeypatch):
+    monkeypatch.setattr(jarvis.http_client, "get", fake_get(jarvis))
+    checker = jarvis.YouTubeLiveChecker(jarvis.db)
+
+    results = asyncio.run(checker.check_many(["key"], [GOOD, BROKEN]))
+
+    assert BROKEN not in results
+    assert results[GOOD]["is_live"] is True
+    assert results[GOOD]["url"].endswith("liveVideo01")
+
+
+def test_forget_drops_feed_state(jarvis, monkeypatch):
+    monkeypatch.setattr(jarvis.http_client, "get", fake_get(jarvis))
+    checker = jarvis.YouTubeLiveChecker(jarvis.db)
+    asyncio.run(checker.check_many(["key"], [GOOD]))
+    assert checker.stats()["watching"] == 1
+
+    checker.forget(checker.channel_id(GOOD))
+
+    assert checker.stats()["watching"] == 0
+    assert GOOD not in checker._seen